@@ -0,0 +1,117 @@
+"""
+Benchmark: Python loop of calculate_score vs the batched TagMatrix scorer,
+over the whole catalog and over the candidates from its tag postings.
+
+Run from the backend directory:
+    uv run python bench_tag_scoring.py
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add src to path
+sys.path.append(str(Path(__file__).parent / "src"))
+
+from src.blinkit_merchant import calculate_score, get_product_tags
+from src.tag_scoring import TagMatrix, rank
+
+CATEGORIES = ["dairy", "bakery", "snacks", "beverages", "vegetables", "fruits"]
+WORDS = [
+    "amul", "fresh", "milk", "masala", "bread", "brown", "white", "chips", "cola",
+    "paneer", "curd", "onion", "tomato", "potato", "banana", "mango", "juice",
+    "cookies", "cashew", "organic", "spicy", "classic", "family", "pack", "mini",
+]
+QUERIES = ["milk", "fresh bread", "spicy chips", "healthy", "fizzy drink", "organic mango juice"]
+
+
+def synthetic_products(n: int, seed: int = 7):
+    rng = random.Random(seed)
+    return [
+        {
+            "id": f"syn-{i:06d}",
+            "name": " ".join(rng.sample(WORDS, rng.randint(2, 4))).title() + f" {i}",
+            "price": rng.randint(10, 500),
+            "currency": "INR",
+            "category": rng.choice(CATEGORIES),
+        }
+        for i in range(n)
+    ]
+
+
+def loop_search(products, tags, query):
+    query_tokens = set(query.split())
+    scored = []
+    for p, t in zip(products, tags):
+        score = calculate_score(query_tokens, t)
+        if query in p["name"].lower():
+            score += 1.0
+        if score > 0.1:
+            scored.append((score, p))
+    scored.sort(key=lambda x: x[0], reverse=True)
+    return [p["id"] for _, p in scored]
+
+
+def loop_rank(tags, query):
+    query_tokens = set(query.split())
+    scored = [(s, i) for i, t in enumerate(tags) if (s := calculate_score(query_tokens, t)) > 0.1]
+    scored.sort(key=lambda x: x[0], reverse=True)
+    return [i for _, i in scored]
+
+
+def matrix_search(products, matrix, names, query, top_k=None):
+    scores = matrix.jaccard(set(query.split()))
+    for i, name in enumerate(names):
+        if query in name:
+            scores[i] += 1.0
+    return [products[i]["id"] for i in rank(scores, threshold=0.1, top_k=top_k)]
+
+
+def candidate_search(products, matrix, names, query, top_k=None):
+    name_rows = [i for i, name in enumerate(names) if query in name]
+    rows, scores = matrix.score_candidates(set(query.split()), extra_rows=name_rows)
+    scores[np.isin(rows, name_rows)] += 1.0
+    return [products[rows[i]]["id"] for i in rank(scores, threshold=0.1, top_k=top_k)]
+
+
+def candidate_rank(matrix, query):
+    rows, scores = matrix.score_candidates(set(query.split()))
+    return rows[rank(scores)]
+
+
+def timed(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    print(f"{'products':>10} {'loop ms':>10} {'matrix ms':>10} {'top-10 ms':>10} {'postings ms':>12} {'speedup':>8}")
+    for n in (1_000, 10_000, 100_000):
+        products = synthetic_products(n)
+        tags = [frozenset(get_product_tags(p)) for p in products]
+        matrix = TagMatrix(tags)
+        names = [p["name"].lower() for p in products]
+
+        for q in QUERIES:
+            assert loop_search(products, tags, q) == matrix_search(products, matrix, names, q)
+            assert loop_search(products, tags, q) == candidate_search(products, matrix, names, q)
+
+        # The name-substring boost is shared by both paths, so only scoring is timed.
+        loop_ms = timed(lambda tags=tags: [loop_rank(tags, q) for q in QUERIES])
+        matrix_ms = timed(lambda matrix=matrix: [rank(matrix.jaccard(set(q.split()))) for q in QUERIES])
+        topk_ms = timed(lambda matrix=matrix: [rank(matrix.jaccard(set(q.split())), top_k=10) for q in QUERIES])
+        postings_ms = timed(lambda matrix=matrix: [candidate_rank(matrix, q) for q in QUERIES])
+        print(
+            f"{n:>10} {loop_ms:>10.2f} {matrix_ms:>10.2f} {topk_ms:>10.2f} {postings_ms:>12.2f}"
+            f" {loop_ms / postings_ms:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -27,11 +27,45 @@ from livekit.agents import (
 from livekit.plugins import silero, google, deepgram, noise_cancellation, murf
 from livekit.plugins.turn_detector.multilingual import MultilingualModel
 from . import blinkit_merchant as merchant
+from .tool_output import format_product_results
+from .async_merchant import MerchantBusyError, MerchantTimeoutError, merchant_async
+from .preferences import customer_key
+from .cached_tts import CachedTTS, prewarm_utterances
+from .tts_cache import tts_cache
+from .warmup import PrewarmTimer, shared
+from .latency_metrics import SessionLatency, serve_metrics
+from .tool_tracing import bind_trace, tool_tracer, traced_tool
 
 logger = logging.getLogger("blinkit-agent")
 
+LLM_MODEL = "gemini-2.5-flash"
+TTS_MODEL = "FALCON"
+TTS_VOICE = "Matthew"
+TTS_STYLE = "Promo"
+GREETING = "Hi! I'm NOVA, your quantum shopping assistant. What groceries do you need today?"
+# Spoken verbatim on every call: synthesized once into the TTS cache and pinned in prewarm
+FIXED_UTTERANCES = [GREETING]
+# Participant attribute with a stable customer id, set by the token service.
+# Without it preferences stay keyed by the room and end with the call.
+CUSTOMER_ID_ATTRIBUTE = "customer_id"
+# Seconds prewarm may spend synthesizing FIXED_UTTERANCES; the process init
+# timeout is LiveKit's 10s default for the model loads plus this budget
+TTS_WARM_TIMEOUT = 5.0
+INITIALIZE_PROCESS_TIMEOUT = 10.0 + TTS_WARM_TIMEOUT
+
+
+def build_tts(http_session=None) -> CachedTTS:
+    return CachedTTS(
+        murf.TTS(model=TTS_MODEL, voice=TTS_VOICE, style=TTS_STYLE, http_session=http_session),
+        tts_cache,
+        voice=TTS_VOICE,
+        style=TTS_STYLE,
+    )
+
 class BlinkitAgent(Agent):
-    def __init__(self) -> None:
+    def __init__(self, session_id: str = merchant.DEFAULT_SESSION) -> None:
+        # Key for this caller's preferences (the room, or the customer's key once known)
+        self.session_id = session_id
         super().__init__(
             instructions=self._get_instructions(),
         )
@@ -65,51 +99,73 @@ class BlinkitAgent(Agent):
         """
 
     @function_tool
+    @traced_tool
     async def update_preferences(self, key: str, value: str):
         """
         Update user preferences (e.g., diet='vegan', likes='spicy').
         """
         logger.info(f"update_preferences: {key}={value}")
-        merchant.update_user_context(key, value)
+        try:
+            await merchant_async.update_user_context(key, value, session_id=self.session_id)
+        except (MerchantBusyError, MerchantTimeoutError) as e:
+            logger.warning(f"update_preferences: {e}")
+            return "Couldn't save that preference right now, Captain. Please try again in a moment."
         return f"Updated context: {key} is now {value}."
 
     @function_tool
+    @traced_tool
     async def list_products(self, query: Annotated[str, "The search query or category name"] = ""):
         """
         Search for products (smart vector search).
         """
         logger.info(f"list_products called with query='{query}'")
-        products = merchant.list_products(query)
+        try:
+            products = await merchant_async.list_products(query, session_id=self.session_id)
+        except (MerchantBusyError, MerchantTimeoutError) as e:
+            logger.warning(f"list_products: {e}")
+            return "The catalog is responding slowly right now, Captain. Please try that search again in a moment."
         logger.info(f"list_products found {len(products)} items")
         
         if not products:
             return "No matching products found in this sector, Captain."
         
-        result_str = "Found the following items:\n"
-        for p in products:
-            result_str += f"- {p['name']} (ID: {p['id']}): ₹{p['price']}\n"
-        return result_str
+        return format_product_results(products)
 
     @function_tool
+    @traced_tool
     async def create_order(self, 
                            items: Annotated[List[Dict[str, Any]], "List of items to order. Each item must have 'product_id' and optionally 'quantity'."]):
         """
         Place a grocery order.
         """
         logger.info(f"create_order called with items={items}")
-        result = merchant.create_order(items)
+        try:
+            result = await merchant_async.create_order(items)
+        except MerchantTimeoutError as e:
+            logger.warning(f"create_order: {e}")
+            if e.started:
+                return "Your order is still being placed. Ask me for your last order in a moment to confirm it."
+            return "Couldn't place the order right now, Captain. Please try again in a moment."
+        except MerchantBusyError as e:
+            logger.warning(f"create_order: {e}")
+            return "Couldn't place the order right now, Captain. Please try again in a moment."
         if "error" in result:
             return f"Failed to place order: {result['error']}"
         
         return f"Order placed successfully! Order ID: {result['id']}. Total: ₹{result['total_amount']}."
 
     @function_tool
+    @traced_tool
     async def get_last_order(self):
         """
         Retrieve details of the most recent order.
         """
         logger.info("get_last_order called")
-        order = merchant.get_last_order()
+        try:
+            order = await merchant_async.get_last_order()
+        except (MerchantBusyError, MerchantTimeoutError) as e:
+            logger.warning(f"get_last_order: {e}")
+            return "Order history is responding slowly right now. Please ask again in a moment."
         if not order:
             return "No recent orders found."
         
@@ -119,15 +175,29 @@ class BlinkitAgent(Agent):
 def prewarm(proc: JobProcess):
     try:
         logger.info("Starting prewarm...")
-        proc.userdata["vad"] = silero.VAD.load()
-        proc.userdata["stt"] = deepgram.STT(model="nova-3")
+        timer = PrewarmTimer()
+        with timer.step("vad"):
+            proc.userdata["vad"] = silero.VAD.load()
+        with timer.step("stt", required=False):
+            proc.userdata["stt"] = deepgram.STT(model="nova-3")
+        with timer.step("llm", required=False):
+            proc.userdata["llm"] = google.LLM(model=LLM_MODEL)
+        with timer.step("tts", required=False):
+            proc.userdata["tts"] = build_tts()
         
         if not os.getenv("DEEPGRAM_API_KEY"):
             logger.error("DEEPGRAM_API_KEY is missing")
         if not os.getenv("GOOGLE_API_KEY"):
             logger.error("GOOGLE_API_KEY is missing")
+
+        if os.getenv("MURF_API_KEY"):
+            with timer.step("tts_cache", required=False):
+                ready = prewarm_utterances(build_tts, FIXED_UTTERANCES, timeout=TTS_WARM_TIMEOUT)
+                logger.info(f"TTS cache: {ready}/{len(FIXED_UTTERANCES)} fixed utterances ready")
+        else:
+            logger.error("MURF_API_KEY is missing")
             
-        logger.info("Prewarm completed")
+        logger.info(f"Prewarm completed: {timer.summary()}")
     except Exception as e:
         logger.error(f"Prewarm failed: {e}", exc_info=True)
         raise e
@@ -137,34 +207,50 @@ async def entrypoint(ctx: JobContext):
         logger.info("Entrypoint started")
         ctx.log_context_fields = {"room": ctx.room.name}
         
-        agent = BlinkitAgent()
+        agent = BlinkitAgent(session_id=ctx.room.name)
+        # Built in prewarm; created here only if that step failed
+        userdata = ctx.proc.userdata
+        tts = shared(userdata, "tts", build_tts)
         
         session = AgentSession(
-            stt=ctx.proc.userdata.get("stt") or deepgram.STT(model="nova-3"),
-            llm=google.LLM(model="gemini-2.5-flash"),
-            tts=murf.TTS(
-                model="FALCON",
-                voice="Matthew",
-                style="Promo",
-            ),
-            turn_detection=ctx.proc.userdata.get("turn_detection") or MultilingualModel(),
+            stt=shared(userdata, "stt", lambda: deepgram.STT(model="nova-3")),
+            llm=shared(userdata, "llm", lambda: google.LLM(model=LLM_MODEL)),
+            tts=tts,
+            # Needs the job's inference client, so it is created with the first job
+            turn_detection=shared(userdata, "turn_detection", MultilingualModel),
             vad=ctx.proc.userdata["vad"],
             preemptive_generation=True,
         )
         
         usage_collector = metrics.UsageCollector()
         
+        # Per-stage latency histograms (EOU, LLM TTFT, tools, TTS TTFB) for this session
+        latency = SessionLatency(ctx.room.name)
+
+        # One trace per conversation for the tool spans
+        bind_trace(ctx.room.name, service_name="nova-agent")
+        ctx.add_shutdown_callback(tool_tracer.aflush)
+
         @session.on("metrics_collected")
         def _on_metrics_collected(ev: MetricsCollectedEvent):
             metrics.log_metrics(ev.metrics)
             usage_collector.collect(ev.metrics)
+            latency.observe(ev.metrics)
 
         async def log_usage():
             summary = usage_collector.get_summary()
             logger.info(f"Usage: {summary}")
+            logger.info(f"Merchant pool: {merchant_async.stats()}")
+            logger.info(await latency.aclose())
 
         ctx.add_shutdown_callback(log_usage)
 
+        async def drop_room_preferences():
+            # Room names are reused, so a later call must not inherit this one's preferences
+            await merchant_async.clear_user_context(ctx.room.name)
+
+        ctx.add_shutdown_callback(drop_room_preferences)
+
         logger.info("Starting session...")
         await session.start(
             agent=agent,
@@ -177,9 +263,20 @@ async def entrypoint(ctx: JobContext):
         logger.info("Connecting to room...")
         await ctx.connect()
         logger.info("Connected to room")
+
+        # Returning customers warm-start from preferences stored under their stable id.
+        # participant.identity is random per connection, so it is never used as a key.
+        participant = await ctx.wait_for_participant()
+        customer_id = participant.attributes.get(CUSTOMER_ID_ATTRIBUTE)
+        if customer_id:
+            try:
+                await merchant_async.rekey_user_context(agent.session_id, customer_key(customer_id))
+                agent.session_id = customer_key(customer_id)
+            except (MerchantBusyError, MerchantTimeoutError) as e:
+                logger.warning(f"Keeping room-scoped preferences: {e}")
         
-        # Initial greeting
-        await session.say("Hi! I'm NOVA, your quantum shopping assistant. What groceries do you need today?", add_to_chat_ctx=True)
+        # Initial greeting (played from the TTS cache once warm)
+        await session.say(GREETING, audio=tts.audio(GREETING), add_to_chat_ctx=True)
         logger.info("Initial greeting sent")
 
     except Exception as e:
@@ -187,10 +284,12 @@ async def entrypoint(ctx: JobContext):
         raise e
 
 if __name__ == "__main__":
+    serve_metrics()
     cli.run_app(
         WorkerOptions(
             entrypoint_fnc=entrypoint, 
             prewarm_fnc=prewarm,
+            initialize_process_timeout=INITIALIZE_PROCESS_TIMEOUT,
             agent_name="blinkit-agent",
             ws_url=os.getenv("LIVEKIT_URL"),
             api_key=os.getenv("LIVEKIT_API_KEY"),
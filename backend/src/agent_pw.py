@@ -7,7 +7,6 @@ import os
 env_path = Path(__file__).parent.parent / ".env.local"
 load_dotenv(dotenv_path=env_path)
 
-import json
 import traceback
 from datetime import datetime
 from typing import Annotated, Dict, Any
@@ -29,71 +28,99 @@ from livekit.agents import (
 from livekit.plugins import openai, silero, google, deepgram, noise_cancellation
 from livekit.plugins.turn_detector.multilingual import MultilingualModel
 
+from .content_registry import registry as content_registry
+from .faq_index import FAQIndex, format_faq_results
+from .lead_sink import LeadSink, open_lead_sink
+from .warmup import PrewarmTimer, shared
+from .latency_metrics import LATENCY_DIR, LatencyStore, SessionLatency, serve_metrics
+from .tool_tracing import bind_trace, tool_tracer, traced_tool
+
 logger = logging.getLogger("pw-sdr-agent")
 
+FAQ_TOP_K = int(os.getenv("PW_FAQ_TOP_K", "3"))
+# Kept apart from NOVA's snapshots so each worker's endpoint reports only its own agent
+pw_latency_store = LatencyStore(LATENCY_DIR / "pw-sdr")
+
+
+def render_sdr_instructions(content: Dict[str, Any]) -> str:
+    company_info = content.get("company_info", {})
+    verticals = content.get("verticals", [])
+    
+    # Only the offering names go in the prompt; details and FAQs come from answer_faq
+    verticals_str = ", ".join(v["name"] for v in verticals)
+    
+    return f"""
+    You are a friendly and energetic Sales Development Representative (SDR) for **{company_info.get('name', 'Physics Wallah')}**.
+    
+    **COMPANY OVERVIEW:**
+    {company_info.get('description')}
+    Mission: {company_info.get('mission')}
+    
+    **KEY OFFERINGS:**
+    {verticals_str}
+    
+    **KNOWLEDGE BASE:**
+    For any question about courses, fees, study material, doubt support, lectures or an offering's details,
+    call the `answer_faq` tool with the caller's question and answer only from what it returns.
+    
+    **YOUR GOAL:**
+    1.  **Qualify the Lead:** Warmly engage with the student or parent. Find out who they are (Student/Parent), their Class/Grade, and what Exam they are targeting (JEE, NEET, Boards, etc.).
+    2.  **Answer Questions:** Use `answer_faq` to answer questions about courses, pricing (mention affordability), and faculties.
+    3.  **Close:** Once you have their details and have answered their questions, summarize their interest and end the call with high energy ("Padhai Karte Raho!", "All the best!").
+    
+    **YOUR PERSONA:**
+    - **Tone:** Professional, Warm, Efficient, and Encouraging. You are an expert Admission Counselor.
+    - **Greeting:** "Hello! Welcome to Physics Wallah's Admission Cell. I am your AI Counselor. I can help you find the perfect course and batch for your goals. To get started, may I know your name?"
+    - **Behavior:**
+      - Be concise and professional.
+      - Focus on gathering requirements (Class, Exam, Goals) to suggest the best batch.
+      - Provide clear, accurate information about fee structures and scholarships.
+      - Guide the user towards enrollment.
+    
+    **LEAD CAPTURE:**
+    You must collect: Name, Role (Student/Parent), Class/Grade, Target Exam, Email, Timeline (When they want to join).
+    When the user indicates they are done (e.g., "That's all", "Thanks"), or after you have collected all info:
+    1.  Verbally summarize what you have recorded (e.g., "Thank you [Name]. I have noted your interest in [Exam] for Class [Class]...").
+    2.  Call the `save_lead` tool.
+    """
+
 
 class PhysicsWallahSDRAgent(Agent):
-    def __init__(self) -> None:
-        # Load content
-        self.content = self._load_content()
-        self.leads_path = Path(__file__).resolve().parent.parent.parent / "shared-data" / "leads.json"
+    def __init__(self, leads: LeadSink) -> None:
+        # This job's lead store; closed by the job's shutdown callback
+        self.leads = leads
+        # Parsed and rendered once per worker process (see content_registry.py)
+        try:
+            self.content = content_registry.get("pw").data
+            instructions = content_registry.render("pw", render_sdr_instructions)
+        except Exception as e:
+            logger.error(f"Error loading content: {e}")
+            self.content = {}
+            instructions = render_sdr_instructions(self.content)
         
         super().__init__(
-            instructions=self._get_instructions(),
+            instructions=instructions,
         )
 
-    def _load_content(self) -> Dict[str, Any]:
+    @function_tool
+    @traced_tool
+    async def answer_faq(
+        self,
+        ctx: RunContext,
+        query: Annotated[str, "The caller's question, in their words"],
+    ):
+        """Look up course, fee and offering information. Returns the most relevant FAQ entries."""
         try:
-            content_path = Path(__file__).resolve().parent.parent.parent / "shared-data" / "pw_content.json"
-            with open(content_path, "r") as f:
-                return json.load(f)
+            index = content_registry.derive("pw", FAQIndex.from_content)
         except Exception as e:
-            logger.error(f"Error loading content: {e}")
-            return {}
-
-    def _get_instructions(self) -> str:
-        company_info = self.content.get("company_info", {})
-        verticals = self.content.get("verticals", [])
-        faqs = self.content.get("faqs", [])
-        
-        verticals_str = "\n".join([f"- {v['name']}: {v['description']}" for v in verticals])
-        faqs_str = "\n".join([f"Q: {f['question']}\nA: {f['answer']}" for f in faqs])
-        
-        return f"""
-        You are a friendly and energetic Sales Development Representative (SDR) for **{company_info.get('name', 'Physics Wallah')}**.
-        
-        **COMPANY OVERVIEW:**
-        {company_info.get('description')}
-        Mission: {company_info.get('mission')}
-        
-        **KEY OFFERINGS:**
-        {verticals_str}
-        
-        **FAQ KNOWLEDGE BASE:**
-        {faqs_str}
-        
-        **YOUR GOAL:**
-        1.  **Qualify the Lead:** Warmly engage with the student or parent. Find out who they are (Student/Parent), their Class/Grade, and what Exam they are targeting (JEE, NEET, Boards, etc.).
-        2.  **Answer Questions:** Use the FAQ and Offerings info to answer questions about courses, pricing (mention affordability), and faculties.
-        3.  **Close:** Once you have their details and have answered their questions, summarize their interest and end the call with high energy ("Padhai Karte Raho!", "All the best!").
-        
-        **YOUR PERSONA:**
-        - **Tone:** Professional, Warm, Efficient, and Encouraging. You are an expert Admission Counselor.
-        - **Greeting:** "Hello! Welcome to Physics Wallah's Admission Cell. I am your AI Counselor. I can help you find the perfect course and batch for your goals. To get started, may I know your name?"
-        - **Behavior:**
-          - Be concise and professional.
-          - Focus on gathering requirements (Class, Exam, Goals) to suggest the best batch.
-          - Provide clear, accurate information about fee structures and scholarships.
-          - Guide the user towards enrollment.
-        
-        **LEAD CAPTURE:**
-        You must collect: Name, Role (Student/Parent), Class/Grade, Target Exam, Email, Timeline (When they want to join).
-        When the user indicates they are done (e.g., "That's all", "Thanks"), or after you have collected all info:
-        1.  Verbally summarize what you have recorded (e.g., "Thank you [Name]. I have noted your interest in [Exam] for Class [Class]...").
-        2.  Call the `save_lead` tool.
-        """
+            logger.error(f"Error loading FAQ index: {e}")
+            return "The knowledge base is unavailable right now. Offer to have a counselor follow up."
+        results = index.search(query, top_k=FAQ_TOP_K)
+        logger.info(f"answer_faq({query!r}) -> {[p['title'] for _, p in results]}")
+        return format_faq_results(results)
 
     @function_tool
+    @traced_tool
     async def save_lead(
         self,
         ctx: RunContext,
@@ -122,20 +149,8 @@ class PhysicsWallahSDRAgent(Agent):
                 "company": company # Mapping School/College to company field for consistency with prompt requirements
             }
             
-            # Load existing leads
-            leads = []
-            if self.leads_path.exists():
-                with open(self.leads_path, "r") as f:
-                    try:
-                        leads = json.load(f)
-                    except json.JSONDecodeError:
-                        leads = []
-            
-            leads.append(lead_data)
-            
-            # Save back
-            with open(self.leads_path, "w") as f:
-                json.dump(leads, f, indent=2)
+            # Queued to the lead store's batched writer (deduplicated by email)
+            await self.leads.save(lead_data)
                 
             logger.info(f"Lead saved: {name}, {target_exam}")
             return "Lead saved successfully. All the best for your preparation!"
@@ -146,11 +161,24 @@ class PhysicsWallahSDRAgent(Agent):
 
 def prewarm(proc: JobProcess):
     """Preload models to minimize first-call latency"""
-    # Preload VAD model
-    proc.userdata["vad"] = silero.VAD.load()
-    
-    # Preload STT model to reduce initialization time
-    proc.userdata["stt"] = deepgram.STT(model="nova-3")
+    timer = PrewarmTimer()
+    with timer.step("vad"):
+        proc.userdata["vad"] = silero.VAD.load()
+
+    # Preload STT, LLM and TTS clients to reduce initialization time
+    with timer.step("stt", required=False):
+        proc.userdata["stt"] = deepgram.STT(model="nova-3")
+    with timer.step("llm", required=False):
+        proc.userdata["llm"] = google.LLM(model="gemini-2.5-flash")
+    with timer.step("tts", required=False):
+        proc.userdata["tts"] = deepgram.TTS(model="aura-helios-en")
+
+    # Load and validate content packs, render the SDR instructions and build the FAQ index, once per process
+    with timer.step("content"):
+        content_registry.load_all()
+        content_registry.render("pw", render_sdr_instructions)
+        content_registry.derive("pw", FAQIndex.from_content)
+    logger.info(f"Prewarm completed: {timer.summary()}")
 
 
 async def entrypoint(ctx: JobContext):
@@ -159,35 +187,43 @@ async def entrypoint(ctx: JobContext):
             "room": ctx.room.name,
         }
 
-        # Initialize the agent
-        agent = PhysicsWallahSDRAgent()
+        # Initialize the agent with a lead store of its own
+        leads = open_lead_sink()
+        agent = PhysicsWallahSDRAgent(leads)
 
+        userdata = ctx.proc.userdata
         session = AgentSession(
-            stt=ctx.proc.userdata.get("stt") or deepgram.STT(model="nova-3"),
-            llm=google.LLM(
-                model="gemini-2.5-flash",
-            ),
-            # Use Deepgram Aura TTS (reliable fallback)
-            tts=deepgram.TTS(
-                model="aura-helios-en",  # Professional male voice
-            ), 
-            turn_detection=MultilingualModel(),
+            stt=shared(userdata, "stt", lambda: deepgram.STT(model="nova-3")),
+            llm=shared(userdata, "llm", lambda: google.LLM(model="gemini-2.5-flash")),
+            # Use Deepgram Aura TTS (reliable fallback), professional male voice
+            tts=shared(userdata, "tts", lambda: deepgram.TTS(model="aura-helios-en")),
+            turn_detection=shared(userdata, "turn_detection", MultilingualModel),
             vad=ctx.proc.userdata["vad"],
             preemptive_generation=True,
         )
         
         usage_collector = metrics.UsageCollector()
 
+        # Per-stage latency histograms (EOU, LLM TTFT, tools, TTS TTFB) for this session
+        latency = SessionLatency(ctx.room.name, store=pw_latency_store)
+
+        # One trace per conversation for the tool spans
+        bind_trace(ctx.room.name, service_name="pw-sdr-agent")
+        ctx.add_shutdown_callback(tool_tracer.aflush)
+
         @session.on("metrics_collected")
         def _on_metrics_collected(ev: MetricsCollectedEvent):
             metrics.log_metrics(ev.metrics)
             usage_collector.collect(ev.metrics)
+            latency.observe(ev.metrics)
 
         async def log_usage():
             summary = usage_collector.get_summary()
             logger.info(f"Usage: {summary}")
+            logger.info(await latency.aclose())
 
         ctx.add_shutdown_callback(log_usage)
+        ctx.add_shutdown_callback(leads.aclose)
 
         await session.start(
             agent=agent,
@@ -206,6 +242,7 @@ async def entrypoint(ctx: JobContext):
 
 
 if __name__ == "__main__":
+    serve_metrics(int(os.getenv("PW_METRICS_PORT", "9465")), store=pw_latency_store)
     cli.run_app(
         WorkerOptions(
             entrypoint_fnc=entrypoint, 
@@ -0,0 +1,175 @@
+"""
+Async facade over the Blinkit merchant for the agent's tools.
+
+The tools called `merchant.list_products` (a scoring pass over the catalog),
+`create_order` (an order-log write and fsync) and `get_last_order` directly
+on the event loop that also streams audio, so a slow disk or a large catalog
+stalled speech and barge-in for the whole job. Here every merchant call runs
+on a small dedicated thread pool:
+
+  - bounded: at most `max_queue` calls may wait for a worker; beyond that a
+    call fails fast with `MerchantBusyError` instead of piling up
+  - per-call deadlines: a call that has not finished in time raises
+    `MerchantTimeoutError`. One still queued is cancelled; one already
+    running cannot be interrupted and completes in the background, which
+    `started` reports (an order may still be placed).
+  - metrics: current and peak queue depth, counters, and queue-wait / run
+    time per operation in the session's latency histograms
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from . import blinkit_merchant
+from .latency_metrics import MERCHANT_QUEUE, MERCHANT_RUN, record_stage
+
+logger = logging.getLogger("async-merchant")
+
+MERCHANT_WORKERS = int(os.getenv("MERCHANT_WORKERS", "2"))
+MERCHANT_MAX_QUEUE = int(os.getenv("MERCHANT_MAX_QUEUE", "32"))
+# Seconds per operation
+DEFAULT_DEADLINES = {
+    "list_products": 2.0,
+    "update_user_context": 2.0,
+    "rekey_user_context": 2.0,
+    "clear_user_context": 2.0,
+    "get_last_order": 2.0,
+    "create_order": 10.0,
+}
+
+
+class MerchantBusyError(RuntimeError):
+    pass
+
+
+class MerchantTimeoutError(TimeoutError):
+    def __init__(self, op: str, deadline: float, started: bool):
+        super().__init__(f"{op} did not finish within {deadline:.1f}s")
+        self.op = op
+        self.deadline = deadline
+        self.started = started
+
+
+class BoundedExecutor:
+    def __init__(self, max_workers: int = MERCHANT_WORKERS, max_queue: int = MERCHANT_MAX_QUEUE, name: str = "merchant"):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.peak_queued = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.rejected = 0
+
+    async def run(self, op: str, fn: Callable[..., Any], *args, deadline: float, **kwargs) -> Any:
+        """`fn(*args, **kwargs)` on the pool, awaited for at most `deadline` seconds."""
+        with self._lock:
+            if self.queued >= self.max_queue:
+                self.rejected += 1
+                raise MerchantBusyError(f"{op} rejected: {self.queued} merchant calls already queued")
+            self.queued += 1
+            self.peak_queued = max(self.peak_queued, self.queued)
+
+        submitted = time.perf_counter()
+        timing: Dict[str, float] = {}
+
+        def _work():
+            started = time.perf_counter()
+            with self._lock:
+                self.queued -= 1
+                self.running += 1
+            timing["queue_wait"] = started - submitted
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                timing["run"] = time.perf_counter() - started
+                with self._lock:
+                    self.running -= 1
+
+        future = self._executor.submit(_work)
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(future), deadline)
+        except asyncio.TimeoutError:
+            # cancel() only succeeds for a call that never left the queue
+            started = not future.cancel()
+            with self._lock:
+                self.timeouts += 1
+                if not started:
+                    self.queued -= 1
+            logger.warning(f"Merchant {op} missed its {deadline:.1f}s deadline ({'running' if started else 'dropped from queue'})")
+            raise MerchantTimeoutError(op, deadline, started) from None
+        except asyncio.CancelledError:
+            # The tool was interrupted (barge-in): drop the call if it has not started
+            if future.cancel():
+                with self._lock:
+                    self.queued -= 1
+            raise
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            if "queue_wait" in timing:
+                record_stage(MERCHANT_QUEUE, timing["queue_wait"], label=op)
+            if "run" in timing:
+                record_stage(MERCHANT_RUN, timing["run"], label=op)
+        with self._lock:
+            self.completed += 1
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "queued": self.queued,
+                "running": self.running,
+                "peak_queued": self.peak_queued,
+                "completed": self.completed,
+                "failed": self.failed,
+                "timeouts": self.timeouts,
+                "rejected": self.rejected,
+            }
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+class AsyncMerchant:
+    def __init__(self, merchant=blinkit_merchant, executor: Optional[BoundedExecutor] = None, deadlines: Optional[Dict[str, float]] = None):
+        self.merchant = merchant
+        self.executor = executor or BoundedExecutor()
+        self.deadlines = {**DEFAULT_DEADLINES, **(deadlines or {})}
+
+    def _run(self, op: str, *args, **kwargs):
+        return self.executor.run(op, getattr(self.merchant, op), *args, deadline=self.deadlines[op], **kwargs)
+
+    async def list_products(self, query: str = "", limit: Optional[int] = None, session_id: str = blinkit_merchant.DEFAULT_SESSION) -> List[Dict]:
+        return await self._run("list_products", query, limit=limit, session_id=session_id)
+
+    async def update_user_context(self, key: str, value: str, session_id: str = blinkit_merchant.DEFAULT_SESSION):
+        return await self._run("update_user_context", key, value, session_id=session_id)
+
+    async def rekey_user_context(self, old_session_id: str, new_session_id: str):
+        return await self._run("rekey_user_context", old_session_id, new_session_id)
+
+    async def clear_user_context(self, session_id: str):
+        return await self._run("clear_user_context", session_id)
+
+    async def create_order(self, items: List[Dict]) -> Dict:
+        return await self._run("create_order", items)
+
+    async def get_last_order(self) -> Optional[Dict]:
+        return await self._run("get_last_order")
+
+    def stats(self) -> Dict[str, int]:
+        return self.executor.stats()
+
+
+# Shared facade for the Blinkit agent in this process
+merchant_async = AsyncMerchant()
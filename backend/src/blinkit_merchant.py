@@ -1,37 +1,61 @@
 
-import json
+import logging
 import os
-import uuid
+import threading
+from bisect import bisect_right
 from datetime import datetime
-from typing import List, Dict, Optional, Annotated
-from src.blinkit_catalog import PRODUCTS
+from typing import List, Dict, Optional, Annotated, Set
+
+import numpy as np
 
-ORDERS_FILE = "orders.json"
-
-def _load_orders() -> List[Dict]:
-    if not os.path.exists(ORDERS_FILE):
-        return []
-    try:
-        with open(ORDERS_FILE, "r") as f:
-            return json.load(f)
-    except json.JSONDecodeError:
-        return []
-
-def _save_orders(orders: List[Dict]):
-    with open(ORDERS_FILE, "w") as f:
-        json.dump(orders, f, indent=2)
-
-# User Context for Personalization
-user_context = {
-    "diet": [], # e.g., "vegan", "gluten-free"
-    "likes": [], # e.g., "spicy", "sweet"
-}
-
-def update_user_context(key: str, value: str):
-    """Updates the user's context/preferences."""
-    if key in user_context:
-        if value not in user_context[key]:
-            user_context[key].append(value)
+from src.blinkit_catalog import PRODUCTS
+from src.catalog import Catalog
+from src.catalog_snapshot import compile_snapshot
+from src.order_ids import new_order_id
+from src.order_log import OrderLog, migrate_json_orders
+from src.preferences import SessionPreferenceStore
+from src.tag_scoring import TagMatrix, rank
+
+ORDERS_FILE = "orders.jsonl"
+LEGACY_ORDERS_FILE = "orders.json"
+
+logger = logging.getLogger("blinkit-merchant")
+
+_order_log: Optional[OrderLog] = None
+_order_log_lock = threading.Lock()
+
+def _get_order_log() -> OrderLog:
+    """Opens the order log on first use, migrating a legacy orders.json once."""
+    global _order_log
+    if _order_log is None:
+        # Merchant calls run on a thread pool: only one of them may open and migrate
+        with _order_log_lock:
+            if _order_log is None:
+                log = OrderLog(ORDERS_FILE)
+                if not os.path.exists(ORDERS_FILE) and os.path.exists(LEGACY_ORDERS_FILE):
+                    # Re-checked under the log's file lock: another worker may be migrating too
+                    migrate_json_orders(LEGACY_ORDERS_FILE, log)
+                _order_log = log
+    return _order_log
+
+# User Context for Personalization, scoped per session (room, or customer_key once known).
+# e.g. diet: "vegan", "gluten-free"; likes: "spicy", "sweet"
+DEFAULT_SESSION = "default"
+preferences = SessionPreferenceStore(db_path=os.getenv("NOVA_PREFERENCES_DB"))
+
+def update_user_context(key: str, value: str, session_id: str = DEFAULT_SESSION):
+    """Updates the user's context/preferences for one session."""
+    preferences.update(session_id, key, value)
+
+def get_user_context(session_id: str = DEFAULT_SESSION) -> Dict[str, List[str]]:
+    return preferences.get(session_id)
+
+def rekey_user_context(old_session_id: str, new_session_id: str):
+    """Moves a session's preferences to a new key (the room's to the caller's customer_key)."""
+    preferences.rekey(old_session_id, new_session_id)
+
+def clear_user_context(session_id: str):
+    preferences.clear(session_id)
 
 def get_product_tags(p):
     """Generates a 'vector' of tags for a product."""
@@ -58,50 +82,120 @@ def calculate_score(query_tokens, product_tags):
     if intersection == 0: return 0
     return intersection / len(query_tokens.union(product_tags)) # Jaccard Index
 
+NON_VEGAN_CATEGORIES = ["dairy", "bakery"]
+
+class TagIndex:
+    """
+    Tag index over one catalog snapshot, built once per catalog load.
+    Caches every product's tag set as a sparse tag matrix with inverted
+    postings for candidate scoring, plus lowercased names and the
+    personalization masks.
+    """
+
+    def __init__(self, products: List[Dict], version: int = 0):
+        self.version = version
+        self.products = list(products)
+        self.tags: List[frozenset] = [frozenset(get_product_tags(p)) for p in self.products]
+        self.matrix = TagMatrix(self.tags)
+        self.non_vegan = np.array(
+            [p["category"].lower() in NON_VEGAN_CATEGORIES for p in self.products], dtype=bool
+        )
+
+        names = [p["name"].lower() for p in self.products]
+        # All names joined into one blob so substring matches are found with
+        # str.find instead of a per-product Python loop.
+        self._name_blob = "\n".join(names)
+        self._name_starts = []
+        offset = 0
+        for name in names:
+            self._name_starts.append(offset)
+            offset += len(name) + 1
+
+    def name_matches(self, query: str) -> Set[int]:
+        """Positions of products whose lowercased name contains `query`."""
+        matches = set()
+        if not query or "\n" in query:
+            return matches
+        pos = self._name_blob.find(query)
+        while pos != -1:
+            i = bisect_right(self._name_starts, pos) - 1
+            matches.add(i)
+            # Skip to the next name; one hit per product is enough.
+            next_start = self._name_starts[i + 1] if i + 1 < len(self._name_starts) else len(self._name_blob)
+            pos = self._name_blob.find(query, next_start)
+        return matches
+
+
+# Set BLINKIT_CATALOG_SNAPSHOT to serve the catalog from a hot-reloadable,
+# memory-mapped snapshot (compiled from PRODUCTS if the file does not exist yet).
+BLINKIT_CATALOG_SNAPSHOT = os.getenv("BLINKIT_CATALOG_SNAPSHOT")
+if BLINKIT_CATALOG_SNAPSHOT:
+    if not os.path.exists(BLINKIT_CATALOG_SNAPSHOT):
+        try:
+            compile_snapshot(PRODUCTS, BLINKIT_CATALOG_SNAPSHOT)
+        except OSError as e:
+            logger.error(f"Failed to write catalog snapshot {BLINKIT_CATALOG_SNAPSHOT}: {e}")
+    catalog = Catalog.from_snapshot(BLINKIT_CATALOG_SNAPSHOT)
+    if not len(catalog.products):
+        # No snapshot to serve: fall back to the built-in product list
+        catalog.reload(PRODUCTS)
+else:
+    catalog = Catalog(PRODUCTS)
+_search_index: Optional[TagIndex] = None
+
+def _get_search_index() -> TagIndex:
+    """Tag index for the current catalog snapshot, rebuilt when the catalog reloads."""
+    global _search_index
+    snapshot = catalog.snapshot
+    index = _search_index
+    if index is None or index.version != snapshot.version:
+        index = TagIndex(snapshot.products, version=snapshot.version)
+        _search_index = index
+    return index
+
+_get_search_index()
+
 def list_products(
     query: Annotated[str, "The search query or category name"] = "",
+    limit: Annotated[Optional[int], "Return only the top-k matches"] = None,
+    session_id: str = DEFAULT_SESSION,
 ) -> List[Dict]:
     """
     Smart Search: Uses tag-based scoring (Vector-lite) and Personalization.
+    Only products sharing a tag with the query (or matching it by name) are
+    scored, in one batched pass over their rows of the tag matrix.
     """
     query = query.lower().strip()
     if not query:
-        return PRODUCTS
+        return list(catalog.products)
 
     query_tokens = set(query.split())
-    
-    scored_products = []
-    
-    for p in PRODUCTS:
-        # 1. Personalization Filter
-        # If user is vegan, skip dairy (unless explicitly asked for)
-        if "vegan" in user_context["diet"] and p["category"].lower() in ["dairy", "bakery"] and "milk" not in query:
-            continue
-            
-        # 2. Vector-lite Scoring
-        tags = get_product_tags(p)
-        score = calculate_score(query_tokens, tags)
-        
-        # Boost for exact substring match
-        if query in p["name"].lower():
-            score += 1.0
-            
-        if score > 0.1: # Threshold
-            scored_products.append((score, p))
-            
-    # Sort by score desc
-    scored_products.sort(key=lambda x: x[0], reverse=True)
-    
-    return [p for _, p in scored_products]
+    search_index = _get_search_index()
+
+    # 1. Vector-lite Scoring (Jaccard against the candidates from the tag postings)
+    name_matches = search_index.name_matches(query)
+    rows, scores = search_index.matrix.score_candidates(query_tokens, extra_rows=name_matches)
+
+    # Boost for exact substring match
+    if name_matches:
+        scores[np.isin(rows, list(name_matches))] += 1.0
+
+    # 2. Personalization Filter
+    # If user is vegan, skip dairy (unless explicitly asked for)
+    if "vegan" in preferences.get(session_id)["diet"] and "milk" not in query:
+        scores[search_index.non_vegan[rows]] = 0
+
+    # Threshold 0.1, sorted by score desc (candidate rows are in catalog order, so ties keep it)
+    return [search_index.products[rows[i]] for i in rank(scores, threshold=0.1, top_k=limit)]
 
 def create_order(
     items: Annotated[List[Dict], "List of items to order. Each item must have 'product_id' and 'quantity'."]
 ) -> Dict:
     """
     Create a new order for the specified items.
-    Calculates total, generates ID, and saves to orders.json.
+    Calculates total, generates ID, and appends it to the order log.
     """
-    order_id = f"BLK-{uuid.uuid4().hex[:8].upper()}"
+    order_id = new_order_id("BLK-")
     order_items = []
     total_amount = 0
     currency = "INR"
@@ -111,7 +205,7 @@ def create_order(
         quantity = item.get("quantity", 1)
         
         # Find product
-        product = next((p for p in PRODUCTS if p["id"] == product_id), None)
+        product = catalog.get(product_id)
         if product:
             item_total = product["price"] * quantity
             total_amount += item_total
@@ -133,9 +227,7 @@ def create_order(
         "status": "placed"
     }
 
-    orders = _load_orders()
-    orders.append(order)
-    _save_orders(orders)
+    _get_order_log().append(order)
 
     return order
 
@@ -144,7 +236,4 @@ def get_last_order() -> Annotated[Dict | None, "Returns the most recent order de
     Retrieve the details of the last placed order.
     Useful for 'What did I just buy?' queries.
     """
-    orders = _load_orders()
-    if not orders:
-        return None
-    return orders[-1]
+    return _get_order_log().last()
@@ -0,0 +1,149 @@
+"""
+TTS wrapper that serves repeated utterances from the PCM cache.
+
+`CachedTTS` wraps the configured TTS (Murf for NOVA). `synthesize()` - used
+for whole, known utterances such as the greeting - answers from `tts_cache`
+when the (text, voice, style, model) audio is already on disk, and otherwise
+streams the upstream synthesis through while saving it for next time.
+`stream()` is passed through untouched, so LLM replies keep the upstream's
+incremental synthesis.
+
+`prewarm_utterances` runs in the worker's prewarm: it synthesizes any fixed
+utterance not yet on disk and pins all of them in memory, so the first
+session on a fresh worker plays its greeting without waiting on Murf.
+Its synthesis budget has to fit inside LiveKit's `initialize_process_timeout`
+(10s by default), or the worker kills the process before prewarm returns.
+"""
+import asyncio
+import logging
+from typing import AsyncIterator, Callable, Iterable, List
+
+import aiohttp
+from livekit import rtc
+from livekit.agents import DEFAULT_API_CONNECT_OPTIONS, APIConnectOptions, tts, utils
+
+from .tts_cache import PCMCache, cache_key
+
+logger = logging.getLogger("cached-tts")
+
+
+class CachedTTS(tts.TTS):
+    def __init__(self, wrapped: tts.TTS, cache: PCMCache, *, voice: str, style: str = ""):
+        super().__init__(
+            capabilities=wrapped.capabilities,
+            sample_rate=wrapped.sample_rate,
+            num_channels=wrapped.num_channels,
+        )
+        self._wrapped = wrapped
+        self._cache = cache
+        self._voice = voice
+        self._style = style
+        self._wrapped.on("metrics_collected", self._forward_metrics)
+
+    @property
+    def model(self) -> str:
+        return self._wrapped.model
+
+    @property
+    def provider(self) -> str:
+        return self._wrapped.provider
+
+    def key_for(self, text: str) -> str:
+        return cache_key(text, self._voice, self._style, self.model, self.sample_rate, self.num_channels)
+
+    def synthesize(
+        self, text: str, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS
+    ) -> "CachedChunkedStream":
+        return CachedChunkedStream(tts=self, input_text=text, conn_options=conn_options)
+
+    def stream(self, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS) -> tts.SynthesizeStream:
+        return self._wrapped.stream(conn_options=conn_options)
+
+    async def audio(self, text: str) -> AsyncIterator[rtc.AudioFrame]:
+        """Frames for `text`, for `session.say(text, audio=...)`."""
+        async with self.synthesize(text) as stream:
+            async for ev in stream:
+                yield ev.frame
+
+    async def warm(self, texts: Iterable[str]) -> List[str]:
+        """Synthesize any of `texts` not cached yet. Returns the ones that were synthesized."""
+        synthesized = []
+        for text in texts:
+            if self.key_for(text) in self._cache:
+                continue
+            async with self.synthesize(text) as stream:
+                async for _ in stream:
+                    pass
+            synthesized.append(text)
+        return synthesized
+
+    def pin(self, texts: Iterable[str]) -> int:
+        """Hold the cached audio for `texts` in memory. Returns how many were cached."""
+        return sum(self._cache.pin(self.key_for(text)) for text in texts)
+
+    def prewarm(self) -> None:
+        self._wrapped.prewarm()
+
+    def _forward_metrics(self, *args, **kwargs) -> None:
+        self.emit("metrics_collected", *args, **kwargs)
+
+    async def aclose(self) -> None:
+        self._wrapped.off("metrics_collected", self._forward_metrics)
+        await self._wrapped.aclose()
+
+
+class CachedChunkedStream(tts.ChunkedStream):
+    def __init__(self, *, tts: CachedTTS, input_text: str, conn_options: APIConnectOptions) -> None:
+        super().__init__(tts=tts, input_text=input_text, conn_options=conn_options)
+        self._cached_tts = tts
+
+    async def _run(self, output_emitter: tts.AudioEmitter) -> None:
+        cached_tts = self._cached_tts
+        key = cached_tts.key_for(self._input_text)
+        output_emitter.initialize(
+            request_id=utils.shortuuid(),
+            sample_rate=cached_tts.sample_rate,
+            num_channels=cached_tts.num_channels,
+            mime_type="audio/pcm",
+        )
+
+        pcm = await asyncio.to_thread(cached_tts._cache.get, key)
+        if pcm is not None:
+            output_emitter.push(pcm)
+            output_emitter.flush()
+            return
+
+        chunks = []
+        async with cached_tts._wrapped.synthesize(self._input_text, conn_options=self._conn_options) as upstream:
+            async for ev in upstream:
+                data = ev.frame.data.tobytes()
+                chunks.append(data)
+                output_emitter.push(data)
+        output_emitter.flush()
+        await asyncio.to_thread(cached_tts._cache.put, key, b"".join(chunks))
+
+
+def prewarm_utterances(
+    make_tts: Callable[[aiohttp.ClientSession], CachedTTS], texts: List[str], timeout: float = 5.0
+) -> int:
+    """Blocking, for `prewarm`: synthesize uncached `texts` on a private loop and pin all of them in memory.
+
+    `make_tts` builds the cached TTS on the given HTTP session (there is no job context yet).
+    Utterances not synthesized within `timeout` seconds are left to the first session.
+    Returns how many of `texts` are ready to play from memory.
+    """
+
+    async def _warm() -> int:
+        async with aiohttp.ClientSession() as http_session:
+            cached = make_tts(http_session)
+            try:
+                synthesized = await asyncio.wait_for(cached.warm(texts), timeout)
+                if synthesized:
+                    logger.info(f"Synthesized {len(synthesized)} utterances into the TTS cache")
+            except Exception as e:
+                logger.warning(f"TTS cache warm-up incomplete: {e}")
+            finally:
+                await cached.aclose()
+            return cached.pin(texts)
+
+    return asyncio.run(_warm())
@@ -0,0 +1,217 @@
+"""
+Shared in-memory catalog used by both merchants.
+
+A CatalogSnapshot is an immutable set of indexes over one version of the
+product list: an id -> position hash map, positions grouped by category and a
+price-sorted array for range filters. Catalog.reload builds a complete new
+snapshot and swaps it in with a single reference assignment, so readers
+always see either the old or the new catalog, never a half-built one. The
+category and price indexes are also the ones catalog_query.QueryIndex plans
+multi-filter queries with.
+
+A Catalog can also be backed by a memory-mapped snapshot file (see
+catalog_snapshot.py). It then checks the file every few seconds and swaps in
+new versions as they are published; sessions holding the previous snapshot
+keep using it until they are done. If the snapshot cannot be written or read,
+the source JSON is served from memory instead, as before snapshots existed.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from .catalog_snapshot import MappedCatalog, compile_snapshot, read_build_id
+
+logger = logging.getLogger("catalog")
+
+
+class CatalogSnapshot:
+    def __init__(
+        self,
+        products: Iterable[Dict[str, Any]],
+        version: int,
+        ids: Optional[List[str]] = None,
+        categories: Optional[List[str]] = None,
+        prices: Optional[Sequence] = None,
+    ):
+        self.version = version
+        self.products: Sequence = products if isinstance(products, Sequence) else list(products)
+        # Columns can be supplied directly (e.g. from a mapped snapshot) so that
+        # building the indexes does not have to decode every product.
+        if ids is None:
+            ids = [p["id"] for p in self.products]
+        if categories is None:
+            categories = [p.get("category", "") for p in self.products]
+        if prices is None:
+            prices = [p.get("price", 0) for p in self.products]
+
+        self._positions: Dict[str, int] = {pid: i for i, pid in enumerate(ids)}
+        self.by_category: Dict[str, List[int]] = {}
+        for i, category in enumerate(categories):
+            self.by_category.setdefault(category.lower(), []).append(i)
+
+        # Positions sorted by price, with a parallel key array for bisect.
+        self.price_order = sorted(range(len(prices)), key=prices.__getitem__)
+        self.prices = [prices[i] for i in self.price_order]
+
+    @classmethod
+    def from_mapped(cls, mapped: MappedCatalog, version: int) -> "CatalogSnapshot":
+        return cls(mapped, version, ids=mapped.ids(), categories=mapped.categories(), prices=mapped.prices)
+
+    def get(self, product_id: str) -> Optional[Dict[str, Any]]:
+        pos = self._positions.get(product_id)
+        return None if pos is None else self.products[pos]
+
+    def in_category(self, category: str) -> List[Dict[str, Any]]:
+        return [self.products[i] for i in self.by_category.get(category.lower(), [])]
+
+    def price_slice(self, min_price: Optional[float] = None, max_price: Optional[float] = None) -> slice:
+        """Slice of the price order with min_price <= price <= max_price."""
+        lo = 0 if min_price is None else bisect_left(self.prices, min_price)
+        hi = len(self.prices) if max_price is None else bisect_right(self.prices, max_price)
+        return slice(lo, max(lo, hi))
+
+    def price_range(self, min_price: Optional[float] = None, max_price: Optional[float] = None) -> List[Dict[str, Any]]:
+        return [self.products[i] for i in self.price_order[self.price_slice(min_price, max_price)]]
+
+
+class Catalog:
+    def __init__(self, products: Iterable[Dict[str, Any]] = ()):
+        self._snapshot = CatalogSnapshot(products, version=1)
+        self._refresh_lock = threading.Lock()
+        self._snapshot_path: Optional[str] = None
+        self._source_json: Optional[str] = None
+        self._check_interval = 0.0
+        self._next_check = 0.0
+        self._build_id: Optional[int] = None
+        self._bad_source_mtime: Optional[float] = None
+        # Source JSON version served from memory because its snapshot could not be written
+        self._memory_source_mtime: Optional[float] = None
+
+    @classmethod
+    def from_json(cls, path: Path) -> "Catalog":
+        catalog = cls()
+        catalog.reload_json(path)
+        return catalog
+
+    @classmethod
+    def from_snapshot(
+        cls,
+        snapshot_path: Path,
+        source_json: Optional[Path] = None,
+        check_interval: float = 2.0,
+    ) -> "Catalog":
+        """
+        Serve the catalog from a memory-mapped snapshot file. If `source_json`
+        is given, the snapshot is recompiled whenever the JSON is newer, and
+        the JSON is loaded into memory if no snapshot can be served.
+        """
+        catalog = cls()
+        catalog._snapshot_path = str(snapshot_path)
+        catalog._source_json = str(source_json) if source_json else None
+        catalog._check_interval = check_interval
+        try:
+            catalog.refresh()
+        except Exception as e:
+            logger.error(f"Failed to load catalog snapshot: {e}")
+        if catalog._build_id is None and catalog._memory_source_mtime is None and catalog._source_json:
+            # No snapshot to serve: read the JSON directly. Only if that fails too is the
+            # catalog empty (rather than failing the import); the periodic check retries.
+            catalog.reload_json(catalog._source_json)
+        return catalog
+
+    @property
+    def snapshot(self) -> CatalogSnapshot:
+        if self._snapshot_path and time.monotonic() >= self._next_check:
+            # Only one caller pays for the check; the rest keep the current snapshot.
+            if self._refresh_lock.acquire(blocking=False):
+                try:
+                    self._next_check = time.monotonic() + self._check_interval
+                    self._refresh_locked()
+                except Exception as e:
+                    logger.error(f"Catalog refresh failed: {e}")
+                finally:
+                    self._refresh_lock.release()
+        return self._snapshot
+
+    @property
+    def version(self) -> int:
+        return self.snapshot.version
+
+    @property
+    def products(self) -> Sequence:
+        return self.snapshot.products
+
+    def reload(self, products: Iterable[Dict[str, Any]]) -> None:
+        """Build the new indexes off to the side, then swap them in atomically."""
+        self._snapshot = CatalogSnapshot(products, version=self._snapshot.version + 1)
+
+    def reload_json(self, path: Path) -> bool:
+        try:
+            with open(path, "r") as f:
+                products = json.load(f)
+        except Exception as e:
+            logger.error(f"Failed to load catalog: {e}")
+            return False
+        self.reload(products)
+        return True
+
+    def refresh(self) -> bool:
+        """Check the snapshot file now and swap in a new version if one was published."""
+        with self._refresh_lock:
+            self._next_check = time.monotonic() + self._check_interval
+            return self._refresh_locked()
+
+    def _refresh_locked(self) -> bool:
+        path = self._snapshot_path
+        if self._source_json and os.path.exists(self._source_json):
+            source_mtime = os.path.getmtime(self._source_json)
+            stale = not os.path.exists(path) or source_mtime > os.path.getmtime(path)
+            if stale and source_mtime == self._memory_source_mtime:
+                return False
+            if stale and source_mtime != self._bad_source_mtime:
+                try:
+                    with open(self._source_json, "r") as f:
+                        products = json.load(f)
+                except (OSError, ValueError) as e:
+                    # Keep serving the last good catalog; retry once the JSON changes again.
+                    self._bad_source_mtime = source_mtime
+                    logger.error(f"Failed to read catalog {self._source_json}: {e}")
+                else:
+                    try:
+                        compile_snapshot(products, path)
+                        logger.info(f"Compiled catalog snapshot {path}")
+                    except OSError as e:
+                        # The snapshot cannot be written: serve this JSON from memory instead
+                        # (until the JSON changes or a newer snapshot is published).
+                        logger.error(f"Failed to write catalog snapshot {path}, serving {self._source_json} from memory: {e}")
+                        self.reload(products)
+                        self._memory_source_mtime = source_mtime
+                        self._build_id = None
+                        return True
+        if not os.path.exists(path):
+            logger.error(f"Catalog snapshot not found: {path}")
+            return False
+
+        build_id = read_build_id(path)
+        if build_id == self._build_id:
+            return False
+        mapped = MappedCatalog(path)
+        self._snapshot = CatalogSnapshot.from_mapped(mapped, version=self._snapshot.version + 1)
+        self._build_id = mapped.build_id
+        logger.info(f"Loaded catalog snapshot {path} ({len(mapped)} products, build {mapped.build_id})")
+        return True
+
+    def get(self, product_id: str) -> Optional[Dict[str, Any]]:
+        return self.snapshot.get(product_id)
+
+    def in_category(self, category: str) -> List[Dict[str, Any]]:
+        return self.snapshot.in_category(category)
+
+    def price_range(self, min_price: Optional[float] = None, max_price: Optional[float] = None) -> List[Dict[str, Any]]:
+        return self.snapshot.price_range(min_price, max_price)
@@ -0,0 +1,153 @@
+"""
+Indexed multi-filter queries over a catalog snapshot.
+
+QueryIndex works from the snapshot's own category index and price order
+(range filters via bisect) and adds, per snapshot:
+- a color index built from `attributes.color`,
+- a trigram index over lowercased names and descriptions for `search`.
+
+A query estimates how many products each filter admits, starts from the most
+selective index, and then either intersects the next posting list or, when
+only a few candidates are left, checks the remaining filters directly on
+them. Results keep catalog order. `count_only` returns the total number of
+matches without building the result list, and `limit`/`offset` paginate.
+"""
+import heapq
+from bisect import bisect_left, bisect_right
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
+
+from .catalog import CatalogSnapshot
+
+NGRAM = 3
+# Below this many candidates, re-checking a filter per product beats merging a posting list.
+VERIFY_THRESHOLD = 64
+
+
+def _ngrams(text: str) -> Set[str]:
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+class QueryIndex:
+    def __init__(self, snapshot: CatalogSnapshot):
+        self.version = snapshot.version
+        self.products = snapshot.products
+        self.categories: List[str] = []
+        self.colors: List[str] = []
+        self.names: List[str] = []
+        self.descriptions: List[str] = []
+
+        self.by_category: Dict[str, List[int]] = snapshot.by_category
+        self.by_color: Dict[str, List[int]] = {}
+        self.by_ngram: Dict[str, List[int]] = {}
+        for i, p in enumerate(self.products):
+            category = p.get("category", "").lower()
+            color = p.get("attributes", {}).get("color", "").lower()
+            name = p.get("name", "").lower()
+            desc = p.get("description", "").lower()
+            self.categories.append(category)
+            self.colors.append(color)
+            self.names.append(name)
+            self.descriptions.append(desc)
+
+            self.by_color.setdefault(color, []).append(i)
+            for gram in _ngrams(name) | _ngrams(desc):
+                self.by_ngram.setdefault(gram, []).append(i)
+
+        self.price_order: List[int] = snapshot.price_order
+        self.prices = snapshot.prices
+
+    # -- per-filter access paths: (estimated size, candidate set, per-product check) --
+
+    def _category_path(self, category: str):
+        postings = self.by_category.get(category.lower(), [])
+        return len(postings), lambda: set(postings), lambda i: self.categories[i] == category.lower()
+
+    def _price_path(self, min_price: Optional[float], max_price: Optional[float]):
+        lo = 0 if min_price is None else bisect_left(self.prices, min_price)
+        hi = len(self.prices) if max_price is None else bisect_right(self.prices, max_price)
+        hi = max(lo, hi)
+
+        def check(i: int) -> bool:
+            price = self.products[i].get("price", 0)
+            return (min_price is None or price >= min_price) and (max_price is None or price <= max_price)
+
+        return hi - lo, lambda: set(self.price_order[lo:hi]), check
+
+    def _color_path(self, color: str):
+        color = color.lower()
+        # Substring semantics ("grey" matches "titanium grey") over the distinct colors.
+        postings = [self.by_color[c] for c in self.by_color if color in c]
+        size = sum(len(p) for p in postings)
+        return size, lambda: set().union(*postings), lambda i: color in self.colors[i]
+
+    def _search_path(self, query: str):
+        query = query.lower()
+
+        def check(i: int) -> bool:
+            return query in self.names[i] or query in self.descriptions[i]
+
+        grams = _ngrams(query)
+        if not grams:
+            # Too short for the trigram index: only usable as a per-product check.
+            return len(self.products), None, check
+        postings = sorted((self.by_ngram.get(g, []) for g in grams), key=len)
+
+        def candidates() -> Set[int]:
+            found = set(postings[0])
+            for p in postings[1:]:
+                if not found:
+                    break
+                found.intersection_update(p)
+            # Trigrams can match across word or field boundaries, so verify.
+            return {i for i in found if check(i)}
+
+        return len(postings[0]), candidates, check
+
+    def _access_paths(self, filters: Dict[str, Any]) -> List[Tuple[int, Optional[Callable], Callable]]:
+        paths = []
+        if filters.get("category"):
+            paths.append(self._category_path(filters["category"]))
+        if filters.get("min_price") is not None or filters.get("max_price") is not None:
+            paths.append(self._price_path(filters.get("min_price"), filters.get("max_price")))
+        if filters.get("color"):
+            paths.append(self._color_path(filters["color"]))
+        if filters.get("search"):
+            paths.append(self._search_path(filters["search"]))
+        return paths
+
+    def execute(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        count_only: bool = False,
+    ) -> Union[List[Dict[str, Any]], int]:
+        paths = self._access_paths(filters or {})
+        end = None if limit is None else offset + limit
+
+        if not paths:
+            if count_only:
+                return len(self.products)
+            return self.products[offset:end]
+
+        # Most selective first.
+        paths.sort(key=lambda path: path[0])
+        _, first_candidates, first_check = paths[0]
+        if first_candidates is not None:
+            candidates = first_candidates()
+        else:
+            candidates = {i for i in range(len(self.products)) if first_check(i)}
+
+        for size, get_candidates, check in paths[1:]:
+            if not candidates:
+                break
+            if get_candidates is None or len(candidates) <= VERIFY_THRESHOLD or len(candidates) * 4 < size:
+                candidates = {i for i in candidates if check(i)}
+            else:
+                candidates &= get_candidates()
+
+        if count_only:
+            return len(candidates)
+        # Catalog order; with a limit only the first offset + limit positions are sorted.
+        positions = sorted(candidates) if end is None else heapq.nsmallest(end, candidates)
+        return [self.products[i] for i in positions[offset:end]]
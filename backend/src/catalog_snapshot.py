@@ -0,0 +1,139 @@
+"""
+Compact, memory-mapped catalog snapshots.
+
+A snapshot is a single binary file compiled from the catalog:
+
+    header   magic, format version, product count, build id, string table location
+    prices   float64[count]
+    refs     uint32[count][4][2]   (offset, length) of id, name, category, record
+    strings  UTF-8 string table; `record` is the product's compact JSON
+
+The file is mapped read-only, so every worker process on the host shares the
+same page-cache pages instead of holding its own parsed copy. Ids, names,
+categories and prices are read straight from the columns; a full product
+dict is decoded only when it is accessed. Snapshots are written to a temp file
+and os.replace'd, so readers never observe a partial file, and the build id
+in the header lets workers detect a new version cheaply.
+
+Compile a snapshot:
+    python -m src.catalog_snapshot compile src/catalog.json src/catalog.snap
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from collections.abc import Sequence
+from typing import Any, Dict, List
+
+MAGIC = b"CATSNAP\x00"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sHHIQQQ")  # magic, format, reserved, count, build id, strings offset, strings length
+
+ID, NAME, CATEGORY, RECORD = range(4)
+FIELDS_PER_PRODUCT = 4
+
+
+def compile_snapshot(products: List[Dict[str, Any]], path: str) -> int:
+    """Write `products` as a snapshot at `path` atomically. Returns the build id."""
+    strings = bytearray()
+    refs: List[int] = []
+    prices: List[float] = []
+    for p in products:
+        fields = (
+            p["id"],
+            p.get("name", ""),
+            p.get("category", ""),
+            json.dumps(p, separators=(",", ":"), ensure_ascii=False),
+        )
+        for value in fields:
+            encoded = value.encode("utf-8")
+            refs.extend((len(strings), len(encoded)))
+            strings += encoded
+        prices.append(float(p.get("price", 0)))
+
+    count = len(products)
+    build_id = time.time_ns()
+    strings_offset = HEADER.size + 8 * count + 4 * len(refs)
+
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, count, build_id, strings_offset, len(strings)))
+        f.write(struct.pack(f"<{count}d", *prices))
+        f.write(struct.pack(f"<{len(refs)}I", *refs))
+        f.write(strings)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return build_id
+
+
+def read_build_id(path: str) -> int:
+    """Build id from the header only, without mapping the file."""
+    with open(path, "rb") as f:
+        magic, fmt, _, _, build_id, _, _ = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC or fmt != FORMAT_VERSION:
+        raise ValueError(f"{path} is not a catalog snapshot (format {FORMAT_VERSION})")
+    return build_id
+
+
+class MappedCatalog(Sequence):
+    """Read-only view of a snapshot file. Indexing returns decoded product dicts."""
+
+    def __init__(self, path: str):
+        if sys.byteorder != "little":
+            raise RuntimeError("Catalog snapshots are little-endian")
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, fmt, _, count, build_id, strings_offset, _ = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or fmt != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a catalog snapshot (format {FORMAT_VERSION})")
+
+        self.count = count
+        self.build_id = build_id
+        self._strings_offset = strings_offset
+        view = memoryview(self._mm)
+        prices_end = HEADER.size + 8 * count
+        self.prices = view[HEADER.size:prices_end].cast("d")
+        self._refs = view[prices_end:strings_offset].cast("I")
+
+    def _string(self, i: int, field: int) -> str:
+        slot = (i * FIELDS_PER_PRODUCT + field) * 2
+        start = self._strings_offset + self._refs[slot]
+        return self._mm[start:start + self._refs[slot + 1]].decode("utf-8")
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self.count))]
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError("catalog index out of range")
+        return json.loads(self._string(i, RECORD))
+
+    def column(self, field: int) -> List[str]:
+        return [self._string(i, field) for i in range(self.count)]
+
+    def ids(self) -> List[str]:
+        return self.column(ID)
+
+    def categories(self) -> List[str]:
+        return self.column(CATEGORY)
+
+    def names(self) -> List[str]:
+        return self.column(NAME)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4 or sys.argv[1] != "compile":
+        print("Usage: python -m src.catalog_snapshot compile <catalog.json> <catalog.snap>")
+        sys.exit(1)
+    with open(sys.argv[2], "r") as f:
+        catalog_products = json.load(f)
+    compiled_build = compile_snapshot(catalog_products, sys.argv[3])
+    print(f"Compiled {len(catalog_products)} products into {sys.argv[3]} (build {compiled_build})")
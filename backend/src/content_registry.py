@@ -0,0 +1,170 @@
+"""
+Per-process registry of the content packs in shared-data/.
+
+Content-driven agents used to re-read and parse their JSON pack and rebuild
+the full instruction string (company info, verticals, FAQs) for every job.
+The registry loads each pack once per worker process (in prewarm), validates
+it against a small schema, and caches rendered strings keyed by the pack's
+content hash, so starting a session is a dictionary lookup. Files are
+re-checked every few seconds; a changed pack is reloaded and re-rendered on
+next use, while a pack that no longer validates is rejected and the last good
+version keeps serving.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger("content-registry")
+
+SHARED_DATA = Path(__file__).resolve().parent.parent.parent / "shared-data"
+
+# Required fields per pack kind: {field: type}, or {field: (container, {item field: type})}
+COMPANY_SCHEMA = {
+    "company_info": (dict, {"name": str, "description": str}),
+    "verticals": (list, {"name": str, "description": str}),
+    "faqs": (list, {"question": str, "answer": str}),
+}
+MENU_ITEM_SCHEMA = {"id": str, "name": str, "price": (int, float), "category": str}
+
+
+class ContentValidationError(ValueError):
+    pass
+
+
+def _check_fields(obj: Any, fields: Dict[str, Any], where: str, errors: List[str]):
+    if not isinstance(obj, dict):
+        errors.append(f"{where}: expected an object")
+        return
+    for field, expected in fields.items():
+        if field not in obj:
+            errors.append(f"{where}.{field}: missing")
+        elif not isinstance(obj[field], expected):
+            errors.append(f"{where}.{field}: expected {expected}")
+
+
+def validate_pack(kind: str, data: Any) -> List[str]:
+    """Schema errors for a pack of the given kind ("company" or "menu"); empty if valid."""
+    errors: List[str] = []
+    if kind == "company":
+        if not isinstance(data, dict):
+            return ["pack: expected an object"]
+        for section, (container, fields) in COMPANY_SCHEMA.items():
+            value = data.get(section)
+            if not isinstance(value, container):
+                errors.append(f"{section}: expected {container.__name__}")
+            elif container is dict:
+                _check_fields(value, fields, section, errors)
+            else:
+                for i, item in enumerate(value):
+                    _check_fields(item, fields, f"{section}[{i}]", errors)
+    elif kind == "menu":
+        if not isinstance(data, list):
+            return ["pack: expected a list of menu items"]
+        for i, item in enumerate(data):
+            _check_fields(item, MENU_ITEM_SCHEMA, f"[{i}]", errors)
+    else:
+        errors.append(f"unknown pack kind {kind!r}")
+    return errors
+
+
+class ContentPack:
+    def __init__(self, name: str, kind: str, data: Any, content_hash: str, stat: Tuple[int, int]):
+        self.name = name
+        self.kind = kind
+        self.data = data
+        self.content_hash = content_hash
+        self.stat = stat
+
+
+class ContentRegistry:
+    def __init__(self, base_dir: Union[str, Path] = SHARED_DATA, check_interval: float = 5.0):
+        self.base_dir = Path(base_dir)
+        self.check_interval = check_interval
+        self._sources: Dict[str, Tuple[Path, str]] = {}
+        self._packs: Dict[str, ContentPack] = {}
+        self._next_check: Dict[str, float] = {}
+        self._rejected: Dict[str, Tuple[int, int]] = {}  # stat of a file version that failed validation
+        # (pack, render key) -> (content hash, rendered string or derived object)
+        self._rendered: Dict[Tuple[str, str], Tuple[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, filename: str, kind: str):
+        self._sources[name] = (self.base_dir / filename, kind)
+
+    def _read(self, name: str) -> ContentPack:
+        path, kind = self._sources[name]
+        st = os.stat(path)
+        with open(path, "rb") as f:
+            raw = f.read()
+        data = json.loads(raw)
+        errors = validate_pack(kind, data)
+        if errors:
+            raise ContentValidationError(f"{path.name}: " + "; ".join(errors[:5]))
+        return ContentPack(name, kind, data, hashlib.sha256(raw).hexdigest()[:16], (st.st_mtime_ns, st.st_size))
+
+    def load_all(self) -> Dict[str, ContentPack]:
+        """Load every registered pack (call from prewarm). Invalid or missing packs are logged and skipped."""
+        for name in self._sources:
+            try:
+                self.get(name)
+            except Exception as e:
+                logger.error(f"Failed to load content pack {name}: {e}")
+        return dict(self._packs)
+
+    def get(self, name: str) -> ContentPack:
+        """The current pack, reloaded if its file changed since the last check."""
+        now = time.monotonic()
+        pack = self._packs.get(name)
+        if pack is not None and now < self._next_check.get(name, 0.0):
+            return pack
+        with self._lock:
+            pack = self._packs.get(name)
+            self._next_check[name] = now + self.check_interval
+            path, _ = self._sources[name]
+            if pack is not None:
+                try:
+                    st = os.stat(path)
+                except OSError as e:
+                    logger.error(f"Content pack {name} unavailable, keeping loaded version: {e}")
+                    return pack
+                if (st.st_mtime_ns, st.st_size) in (pack.stat, self._rejected.get(name)):
+                    return pack
+            try:
+                fresh = self._read(name)
+            except Exception as e:
+                if pack is None:
+                    raise
+                logger.error(f"Rejected update to content pack {name}, keeping loaded version: {e}")
+                self._rejected[name] = (st.st_mtime_ns, st.st_size)
+                return pack
+            if pack is None or fresh.content_hash != pack.content_hash:
+                logger.info(f"Loaded content pack {name} ({fresh.content_hash})")
+            self._packs[name] = fresh
+            return fresh
+
+    def derive(self, name: str, builder: Callable[[Any], Any], key: Optional[str] = None) -> Any:
+        """`builder(pack.data)` (a rendered string, an index, ...), cached until the pack's content changes."""
+        pack = self.get(name)
+        cache_key = (name, key or f"{builder.__module__}.{builder.__qualname__}")
+        cached = self._rendered.get(cache_key)
+        if cached is not None and cached[0] == pack.content_hash:
+            return cached[1]
+        derived = builder(pack.data)
+        self._rendered[cache_key] = (pack.content_hash, derived)
+        return derived
+
+    def render(self, name: str, renderer: Callable[[Any], str], key: Optional[str] = None) -> str:
+        """`renderer(pack.data)`, cached until the pack's content changes."""
+        return self.derive(name, renderer, key)
+
+
+registry = ContentRegistry()
+registry.register("pw", "pw_content.json", "company")
+registry.register("tata", "day5_tata_content.json", "company")
+registry.register("kfc", "kfc_content.json", "menu")
+registry.register("mcdonalds", "mcdonalds_content.json", "menu")
@@ -1,42 +1,258 @@
+import argparse
+import asyncio
+import csv
+import json
+import os
+import queue
 import sqlite3
 import logging
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable, Iterator, List, Union
+
+from .db_pool import ConnectionManager
 
 logger = logging.getLogger("fraud-db")
 
-DB_PATH = Path(__file__).parent.parent / "fraud_cases.db"
+DB_PATH = Path(os.getenv("FRAUD_DB_PATH", str(Path(__file__).parent.parent / "fraud_cases.db")))
+
+# Long-lived per-thread connections (see db_pool.py)
+db = ConnectionManager(DB_PATH)
+
+# Amounts are stored as integer paise and times as Unix epoch seconds, so
+# review queues can filter and sort on indexes. Display strings ("₹1,20,000")
+# are produced only when a case is read out (see format_case_for_voice).
+CREATE_CASES_SQL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        username TEXT PRIMARY KEY,
+        security_identifier TEXT,
+        card_ending TEXT,
+        status TEXT NOT NULL DEFAULT 'pending_review',
+        transaction_name TEXT,
+        transaction_amount_paise INTEGER NOT NULL DEFAULT 0,
+        transaction_time INTEGER,
+        transaction_city TEXT,
+        transaction_merchant TEXT,
+        security_question TEXT,
+        security_answer TEXT,
+        outcome_note TEXT
+    )
+"""
+
+# Case times without an explicit offset are Indian Standard Time.
+IST = timezone(timedelta(hours=5, minutes=30), "IST")
 
 def init_db():
     """Initialize the database with the fraud_cases table."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS fraud_cases (
-            username TEXT PRIMARY KEY,
-            security_identifier TEXT,
-            card_ending TEXT,
-            status TEXT,
-            transaction_name TEXT,
-            transaction_amount TEXT,
-            transaction_time TEXT,
-            transaction_city TEXT,
-            transaction_merchant TEXT,
-            security_question TEXT,
-            security_answer TEXT,
-            outcome_note TEXT
-        )
+    conn = db.connection()
+    conn.execute(CREATE_CASES_SQL.format(table="fraud_cases"))
+    _migrate_typed_columns(conn)
+    conn.executescript("""
+        CREATE INDEX IF NOT EXISTS idx_fraud_cases_status_time ON fraud_cases (status, transaction_time);
+        CREATE INDEX IF NOT EXISTS idx_fraud_cases_amount ON fraud_cases (transaction_amount_paise);
     """)
+    _ensure_username_index(conn)
     
     conn.commit()
-    conn.close()
+
+def _migrate_typed_columns(conn: sqlite3.Connection):
+    """
+    Rebuild a legacy table (display-text amount and time) with typed columns.
+    The username_norm column and its triggers go with the old table and are
+    recreated by _ensure_username_index.
+    """
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(fraud_cases)")}
+    if "transaction_amount" not in columns:
+        return
+    rows = [dict(row) for row in conn.execute("SELECT * FROM fraud_cases")]
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute(CREATE_CASES_SQL.format(table="fraud_cases_typed"))
+        conn.executemany(
+            INSERT_CASE_SQL.replace("fraud_cases", "fraud_cases_typed", 1),
+            [_case_row(row) for row in rows],
+        )
+        conn.execute("DROP TABLE fraud_cases")
+        conn.execute("ALTER TABLE fraud_cases_typed RENAME TO fraud_cases")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    logger.info(f"Migrated {len(rows)} fraud cases to typed amount/time columns")
+
+def parse_amount_paise(value: Any) -> int:
+    """Paise from a rupee amount: a number (85000, 499.5) or text like "₹1,20,000" or "Rs. 499.50"."""
+    if value is None or value == "":
+        return 0
+    text = str(value).replace("₹", "").replace("Rs.", "").replace(",", "").strip()
+    try:
+        return int((Decimal(text) * 100).to_integral_value(ROUND_HALF_UP))
+    except InvalidOperation:
+        raise ValueError(f"Not a rupee amount: {value!r}") from None
+
+# Non-ISO layouts found in the legacy free-text transaction_time column,
+# including the display format of format_case_for_voice.
+LEGACY_TIME_FORMATS = (
+    "%d %B %Y, %I:%M %p",
+    "%d %b %Y, %I:%M %p",
+    "%d %B %Y %H:%M",
+    "%d %b %Y %H:%M",
+    "%d/%m/%Y %H:%M:%S",
+    "%d/%m/%Y %H:%M",
+    "%d-%m-%Y %H:%M:%S",
+    "%d-%m-%Y %H:%M",
+)
+
+def parse_timestamp(value: Any) -> Optional[int]:
+    """
+    Epoch seconds from an epoch number, an ISO-8601 string or one of
+    LEGACY_TIME_FORMATS (IST if no offset). Raises ValueError otherwise.
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    text = str(value).strip()
+    if text.isdigit():
+        return int(text)
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        for fmt in LEGACY_TIME_FORMATS:
+            try:
+                parsed = datetime.strptime(text, fmt)
+                break
+            except ValueError:
+                continue
+        else:
+            raise ValueError(f"Unrecognized transaction time: {value!r}") from None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=IST)
+    return int(parsed.timestamp())
+
+def format_inr(paise: int) -> str:
+    """Indian digit grouping: 12000000 -> "₹1,20,000"."""
+    rupees, rem = divmod(abs(paise), 100)
+    digits = str(rupees)
+    if len(digits) > 3:
+        head, tail = digits[:-3], digits[-3:]
+        groups = []
+        while len(head) > 2:
+            groups.insert(0, head[-2:])
+            head = head[:-2]
+        digits = ",".join([head] + groups + [tail])
+    sign = "-" if paise < 0 else ""
+    return f"{sign}₹{digits}" + (f".{rem:02d}" if rem else "")
+
+def format_case_for_voice(case: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of a case with display amount and time, for prompts and speech."""
+    shown = dict(case)
+    shown["transaction_amount"] = format_inr(case.get("transaction_amount_paise") or 0)
+    ts = case.get("transaction_time")
+    shown["transaction_time"] = (
+        datetime.fromtimestamp(ts, IST).strftime("%d %B %Y, %I:%M %p") if ts is not None else "unknown"
+    )
+    return shown
+
+# Same normalization as find_user_fuzzy: drop spaces and underscores, lowercase.
+NORMALIZE_SQL = "lower(replace(replace({}, ' ', ''), '_', ''))"
+# Fuzzy tier bounds: a query trigram carried by more usernames than this
+# (counting only lengths within the edit-distance bound) is too common to
+# discriminate and is skipped; the candidates sharing the most of the
+# remaining trigrams are ranked by edit distance.
+FUZZY_POSTINGS_PER_TRIGRAM = 200
+FUZZY_CANDIDATES = 20
+
+def normalize_username(name: str) -> str:
+    return name.replace(" ", "").replace("_", "").lower()
+
+def _username_trigrams(normalized: str) -> set:
+    padded = f"#{normalized}#"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def _ensure_username_index(conn: sqlite3.Connection):
+    """
+    Add the indexed username_norm column (kept current by triggers) and the
+    trigram table used for fuzzy matching, migrating existing databases.
+    """
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(fraud_cases)")}
+    migrating = "username_norm" not in columns
+    if migrating:
+        conn.execute("ALTER TABLE fraud_cases ADD COLUMN username_norm TEXT")
+        conn.execute(f"UPDATE fraud_cases SET username_norm = {NORMALIZE_SQL.format('username')}")
+    trigram_columns = {row[1] for row in conn.execute("PRAGMA table_info(fraud_username_trigrams)")}
+    if trigram_columns and "length" not in trigram_columns:
+        # Postings from before the length prefilter: rebuilt below
+        conn.execute("DROP TABLE fraud_username_trigrams")
+        migrating = True
+
+    conn.executescript(f"""
+        CREATE INDEX IF NOT EXISTS idx_fraud_cases_username_norm ON fraud_cases (username_norm);
+
+        CREATE TRIGGER IF NOT EXISTS fraud_cases_norm_insert AFTER INSERT ON fraud_cases
+        BEGIN
+            UPDATE fraud_cases SET username_norm = {NORMALIZE_SQL.format('NEW.username')}
+            WHERE rowid = NEW.rowid;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS fraud_cases_norm_update AFTER UPDATE OF username ON fraud_cases
+        BEGIN
+            UPDATE fraud_cases SET username_norm = {NORMALIZE_SQL.format('NEW.username')}
+            WHERE rowid = NEW.rowid;
+            DELETE FROM fraud_username_trigrams WHERE username = OLD.username;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS fraud_cases_trigrams_delete AFTER DELETE ON fraud_cases
+        BEGIN
+            DELETE FROM fraud_username_trigrams WHERE username = OLD.username;
+        END;
+
+        CREATE TABLE IF NOT EXISTS fraud_username_trigrams (
+            trigram TEXT NOT NULL,
+            length INTEGER NOT NULL,
+            username TEXT NOT NULL,
+            PRIMARY KEY (trigram, length, username)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_fraud_username_trigrams_username ON fraud_username_trigrams (username);
+    """)
+    if migrating:
+        rebuild_username_trigrams(conn)
+
+def index_usernames(conn: sqlite3.Connection, usernames):
+    """Add trigram postings for new or renamed usernames (call inside the writing transaction)."""
+    rows = []
+    for u in usernames:
+        normalized = normalize_username(u)
+        rows.extend((gram, len(normalized), u) for gram in _username_trigrams(normalized))
+    conn.executemany(
+        "INSERT OR IGNORE INTO fraud_username_trigrams (trigram, length, username) VALUES (?, ?, ?)", rows
+    )
+
+def rebuild_username_trigrams(conn: sqlite3.Connection):
+    conn.execute("DELETE FROM fraud_username_trigrams")
+    index_usernames(conn, (row[0] for row in conn.execute("SELECT username FROM fraud_cases")))
+
+def _edit_distance(a: str, b: str, max_distance: int) -> int:
+    """Levenshtein distance, giving up early once it must exceed max_distance."""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
 
 def seed_db():
     """Seed the database with sample data."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
     # Sample data
     cases = [
         (
@@ -45,7 +261,7 @@ def seed_db():
             "4242",
             "pending_review",
             "Electronics Purchase",
-            "₹85,000",
+            8500000,
             "2023-10-27 14:30:00",
             "New Delhi, India",
             "Croma Electronics",
@@ -59,7 +275,7 @@ def seed_db():
             "8888",
             "pending_review",
             "Luxury Hotel Stay",
-            "₹25,000",
+            2500000,
             "2023-10-26 09:15:00",
             "Mumbai, India",
             "Taj Mahal Palace",
@@ -73,7 +289,7 @@ def seed_db():
             "9090",
             "pending_review",
             "Crypto Exchange Transfer",
-            "₹50,000",
+            5000000,
             "2023-10-28 03:45:00",
             "Unknown Location",
             "WazirX",
@@ -87,7 +303,7 @@ def seed_db():
             "1212",
             "pending_review",
             "Construction Supplies",
-            "₹15,000",
+            1500000,
             "2023-10-25 11:20:00",
             "Bangalore, India",
             "Asian Paints Store",
@@ -101,7 +317,7 @@ def seed_db():
             "3434",
             "pending_review",
             "Gaming Console",
-            "₹49,990",
+            4999000,
             "2023-10-29 18:10:00",
             "Hyderabad, India",
             "Sony Center",
@@ -115,7 +331,7 @@ def seed_db():
             "1818",
             "pending_review",
             "VIP Match Tickets",
-            "₹12,500",
+            1250000,
             "2023-11-05 10:00:00",
             "Ahmedabad, India",
             "BookMyShow",
@@ -129,7 +345,7 @@ def seed_db():
             "7777",
             "pending_review",
             "International Flight Booking",
-            "₹1,20,000",
+            12000000,
             "2023-11-10 08:00:00",
             "Chandigarh, India",
             "MakeMyTrip",
@@ -139,76 +355,322 @@ def seed_db():
         )
     ]
     
-    for case in cases:
-        try:
-            cursor.execute("""
-                INSERT OR REPLACE INTO fraud_cases (
-                    username, security_identifier, card_ending, status,
-                    transaction_name, transaction_amount, transaction_time,
-                    transaction_city, transaction_merchant, security_question,
-                    security_answer, outcome_note
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, case)
-        except sqlite3.Error as e:
-            logger.error(f"Error seeding case {case[0]}: {e}")
-            
-    conn.commit()
-    conn.close()
+    ingest_cases(cases)
     logger.info("Database seeded successfully.")
 
+CASE_COLUMNS = (
+    "username", "security_identifier", "card_ending", "status",
+    "transaction_name", "transaction_amount_paise", "transaction_time",
+    "transaction_city", "transaction_merchant", "security_question",
+    "security_answer", "outcome_note",
+)
+SELECT_CASE_COLUMNS = ", ".join(CASE_COLUMNS)
+INSERT_CASE_SQL = f"""
+    INSERT OR REPLACE INTO fraud_cases ({", ".join(CASE_COLUMNS)})
+    VALUES ({", ".join("?" * len(CASE_COLUMNS))})
+"""
+
+def _case_row(case) -> tuple:
+    """
+    Normalize a case (dict, or tuple in CASE_COLUMNS order) to a typed row.
+    Dicts may carry a rupee `transaction_amount` (number or display text)
+    instead of `transaction_amount_paise`. An amount or time that cannot be
+    parsed is logged and stored as 0 / NULL rather than failing the batch.
+    """
+    if not isinstance(case, dict):
+        case = dict(zip(CASE_COLUMNS, case))
+    row = {col: case.get(col, "") for col in CASE_COLUMNS}
+    row["status"] = case.get("status") or "pending_review"
+    try:
+        amount = case.get("transaction_amount_paise")
+        if amount is None or amount == "":
+            row["transaction_amount_paise"] = parse_amount_paise(case.get("transaction_amount"))
+        else:
+            row["transaction_amount_paise"] = int(amount)
+    except ValueError as e:
+        logger.warning(f"Case {row['username']}: {e}; storing amount 0")
+        row["transaction_amount_paise"] = 0
+    try:
+        row["transaction_time"] = parse_timestamp(case.get("transaction_time"))
+    except ValueError as e:
+        logger.warning(f"Case {row['username']}: {e}; storing no time")
+        row["transaction_time"] = None
+    return tuple(row[col] for col in CASE_COLUMNS)
+
+def ingest_cases(cases: Iterable, chunk_size: int = 5000) -> int:
+    """
+    Bulk insert/replace cases (dicts keyed by column name, or tuples in
+    CASE_COLUMNS order) with executemany, one transaction per chunk.
+    """
+    conn = db.connection()
+    total = 0
+    chunk = []
+    for case in cases:
+        chunk.append(_case_row(case))
+        if len(chunk) >= chunk_size:
+            total += _ingest_chunk(conn, chunk)
+            chunk = []
+    if chunk:
+        total += _ingest_chunk(conn, chunk)
+    return total
+
+def _ingest_chunk(conn: sqlite3.Connection, rows: List[tuple]) -> int:
+    with conn:
+        conn.executemany(INSERT_CASE_SQL, rows)
+        index_usernames(conn, [row[0] for row in rows])
+    logger.debug(f"Ingested {len(rows)} cases")
+    return len(rows)
+
+def read_cases_file(path: str) -> Iterator[Dict[str, Any]]:
+    """Stream cases from a CSV (with a header row) or JSON-lines file."""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.endswith((".jsonl", ".ndjson")):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
 def get_case(username: str) -> Optional[Dict[str, Any]]:
     """Retrieve a fraud case by username."""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT * FROM fraud_cases WHERE username = ?", (username,))
-    row = cursor.fetchone()
-    
-    conn.close()
+    row = db.connection().execute(
+        f"SELECT {SELECT_CASE_COLUMNS} FROM fraud_cases WHERE username = ?", (username,)
+    ).fetchone()
     
     if row:
         return dict(row)
     return None
 
 def find_user_fuzzy(input_name: str) -> Optional[Dict[str, Any]]:
-    """Find a user by matching name ignoring underscores, spaces, and case."""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    
-    # Normalize input: remove spaces, underscores, lowercase
-    clean_input = input_name.replace(" ", "").replace("_", "").lower()
-    
-    cursor.execute("SELECT * FROM fraud_cases")
-    rows = cursor.fetchall()
-    conn.close()
-    
-    for row in rows:
-        db_user = row["username"]
-        # Normalize db user
-        clean_db = db_user.replace("_", "").lower()
-        if clean_db == clean_input:
-            return dict(row)
-            
-    return None
+    """
+    Find a user by matching name ignoring underscores, spaces, and case.
+    Exact normalized matches are one indexed lookup; otherwise a bounded set
+    of trigram candidates is ranked by edit distance to catch ASR mishearings
+    like "jon doe".
+    """
+    clean_input = normalize_username(input_name)
+    if not clean_input:
+        return None
+    conn = db.connection()
+
+    row = conn.execute(
+        f"SELECT {SELECT_CASE_COLUMNS} FROM fraud_cases WHERE username_norm = ? LIMIT 1", (clean_input,)
+    ).fetchone()
+    if row:
+        return dict(row)
+
+    # Each trigram reads at most FUZZY_POSTINGS_PER_TRIGRAM + 1 postings, and
+    # only of usernames that could be within max_distance edits. A trigram
+    # with more postings than that is skipped rather than truncated: any
+    # prefix of its list would be an arbitrary (index-ordered) subset that
+    # could miss the match, while the name's rarer trigrams still find it.
+    max_distance = max(1, len(clean_input) // 4)
+    lengths = (len(clean_input) - max_distance, len(clean_input) + max_distance)
+    shared: Counter = Counter()
+    for gram in _username_trigrams(clean_input):
+        postings = conn.execute(
+            "SELECT username FROM fraud_username_trigrams WHERE trigram = ? AND length BETWEEN ? AND ? LIMIT ?",
+            (gram, *lengths, FUZZY_POSTINGS_PER_TRIGRAM + 1),
+        ).fetchall()
+        if len(postings) <= FUZZY_POSTINGS_PER_TRIGRAM:
+            shared.update(row[0] for row in postings)
+
+    best, best_distance = None, max_distance + 1
+    for candidate, _ in shared.most_common(FUZZY_CANDIDATES):
+        distance = _edit_distance(clean_input, normalize_username(candidate), max_distance)
+        if distance < best_distance:
+            best, best_distance = candidate, distance
+    if best is None:
+        return None
+    logger.info(f"Fuzzy matched '{input_name}' to {best} (distance {best_distance})")
+    return get_case(best)
 
 def update_case_status(username: str, status: str, note: str):
     """Update the status and outcome note of a fraud case."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        UPDATE fraud_cases 
-        SET status = ?, outcome_note = ?
-        WHERE username = ?
-    """, (status, note, username))
-    
-    conn.commit()
-    conn.close()
+    with db.transaction() as conn:
+        conn.execute("""
+            UPDATE fraud_cases 
+            SET status = ?, outcome_note = ?
+            WHERE username = ?
+        """, (status, note, username))
     logger.info(f"Updated case for {username} to {status}")
 
+def query_cases(
+    status: Optional[str] = None,
+    min_amount_paise: Optional[int] = None,
+    max_amount_paise: Optional[int] = None,
+    since: Optional[int] = None,
+    until: Optional[int] = None,
+    limit: int = 50,
+    offset: int = 0,
+    count_only: bool = False,
+) -> Union[List[Dict[str, Any]], int]:
+    """
+    Filtered, paginated review queue, newest transactions first.
+
+    Args:
+        status: Only cases with this status (uses the (status, transaction_time) index).
+        min_amount_paise / max_amount_paise: Inclusive amount bounds in paise.
+        since / until: Inclusive epoch-second bounds on transaction_time.
+        limit: Maximum number of cases to return.
+        offset: Number of matching cases to skip (for pagination).
+        count_only: Return only the number of matching cases.
+
+    Returns:
+        List of case dictionaries, or the match count if count_only is set.
+    """
+    clauses, params = [], []
+    for clause, value in (
+        ("status = ?", status),
+        ("transaction_amount_paise >= ?", min_amount_paise),
+        ("transaction_amount_paise <= ?", max_amount_paise),
+        ("transaction_time >= ?", since),
+        ("transaction_time <= ?", until),
+    ):
+        if value is not None:
+            clauses.append(clause)
+            params.append(value)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    conn = db.connection()
+    if count_only:
+        return conn.execute(f"SELECT COUNT(*) FROM fraud_cases {where}", params).fetchone()[0]
+    rows = conn.execute(
+        f"SELECT {SELECT_CASE_COLUMNS} FROM fraud_cases {where} ORDER BY transaction_time DESC, username LIMIT ? OFFSET ?",
+        (*params, limit, offset),
+    ).fetchall()
+    return [dict(row) for row in rows]
+
+def _settle(future: Future, exception: Optional[BaseException] = None):
+    """Resolve one writer future; a failure here must not stop the writer thread."""
+    try:
+        if exception is None:
+            future.set_result(None)
+        else:
+            future.set_exception(exception)
+    except Exception as e:
+        logger.warning(f"Could not resolve a case outcome future: {e}")
+
+class OutcomeWriter:
+    """
+    Group-commits case status updates. Calls from many concurrent sessions
+    are queued and a background thread writes whatever has accumulated (up
+    to `max_batch`, waiting at most `max_delay` seconds) in one transaction.
+    """
+
+    def __init__(self, max_batch: int = 256, max_delay: float = 0.05):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, username: str, status: str, note: str) -> Future:
+        future: Future = Future()
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="outcome-writer", daemon=True)
+                    self._thread.start()
+        self._queue.put((status, note, username, future))
+        return future
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._write(batch)
+                    return
+                batch.append(item)
+            self._write(batch)
+
+    def _write(self, batch: List[tuple]):
+        # The writer owns the futures (callers wait on them through a shield),
+        # so every queued update is written even if its caller went away.
+        try:
+            with db.transaction() as conn:
+                conn.executemany(
+                    "UPDATE fraud_cases SET status = ?, outcome_note = ? WHERE username = ?",
+                    [item[:3] for item in batch],
+                )
+        except Exception as e:
+            logger.error(f"Failed to commit {len(batch)} case outcomes: {e}")
+            for *_, future in batch:
+                _settle(future, exception=e)
+            return
+        logger.info(f"Committed {len(batch)} case outcomes")
+        for *_, future in batch:
+            _settle(future)
+
+    def close(self):
+        """Flush queued updates and stop the writer thread."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+outcome_writer = OutcomeWriter()
+
+# Async wrappers for agent tool handlers: the blocking calls run on the
+# connection manager's bounded executor instead of the event loop.
+async def get_case_async(username: str) -> Optional[Dict[str, Any]]:
+    return await db.run(get_case, username)
+
+async def find_user_fuzzy_async(input_name: str) -> Optional[Dict[str, Any]]:
+    return await db.run(find_user_fuzzy, input_name)
+
+async def query_cases_async(**filters) -> Union[List[Dict[str, Any]], int]:
+    return await db.run(query_cases, **filters)
+
+async def update_case_status_async(username: str, status: str, note: str):
+    """Queue the update for the next group commit and wait until it is durable.
+
+    A decided outcome must not be lost to a barge-in: cancelling the caller
+    stops the wait, not the write.
+    """
+    await asyncio.shield(asyncio.wrap_future(outcome_writer.submit(username, status, note)))
+
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Fraud case database tools")
+    subcommands = parser.add_subparsers(dest="command")
+    ingest = subcommands.add_parser("ingest", help="Bulk load cases from CSV or JSONL")
+    ingest.add_argument("path")
+    ingest.add_argument("--chunk-size", type=int, default=5000)
+    review = subcommands.add_parser("queue", help="Show the review queue")
+    review.add_argument("--status", default="pending_review")
+    review.add_argument("--min-amount", type=float, help="Minimum amount in rupees")
+    review.add_argument("--since-hours", type=float, help="Only transactions in the last N hours")
+    review.add_argument("--limit", type=int, default=20)
+    review.add_argument("--offset", type=int, default=0)
+    args = parser.parse_args()
+
     init_db()
-    seed_db()
+    if args.command == "ingest":
+        started = time.perf_counter()
+        count = ingest_cases(read_cases_file(args.path), chunk_size=args.chunk_size)
+        logger.info(f"Ingested {count} cases in {time.perf_counter() - started:.2f}s")
+    elif args.command == "queue":
+        queue_filters = dict(
+            status=args.status or None,
+            min_amount_paise=None if args.min_amount is None else parse_amount_paise(str(args.min_amount)),
+            since=None if args.since_hours is None else int(time.time() - args.since_hours * 3600),
+        )
+        total = query_cases(**queue_filters, count_only=True)
+        for case in query_cases(**queue_filters, limit=args.limit, offset=args.offset):
+            shown = format_case_for_voice(case)
+            print(f"{shown['username']:<20} {shown['status']:<16} {shown['transaction_amount']:>14}  {shown['transaction_time']}")
+        print(f"{total} matching cases")
+    else:
+        seed_db()
@@ -0,0 +1,84 @@
+"""
+Long-lived, thread-local SQLite connections with async wrappers.
+
+Opening a connection per statement costs a file open, schema parse and pragma
+setup every time, and discards sqlite3's prepared-statement cache. A
+ConnectionManager keeps one WAL-mode connection per thread, with tuned pragmas
+and a larger statement cache. Its `run` method executes blocking database work
+on a small bounded thread pool, so async agent tool handlers never stall the
+event loop.
+"""
+import asyncio
+import logging
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Iterator, List, Optional, Union
+
+logger = logging.getLogger("db-pool")
+
+
+class ConnectionManager:
+    def __init__(
+        self,
+        db_path: Union[str, Path],
+        max_workers: int = 4,
+        cached_statements: int = 256,
+        mmap_size: int = 64 * 1024 * 1024,
+        cache_size_kib: int = 16 * 1024,
+    ):
+        self.db_path = db_path
+        self.max_workers = max_workers
+        self.cached_statements = cached_statements
+        self.mmap_size = mmap_size
+        self.cache_size_kib = cache_size_kib
+
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def connection(self) -> sqlite3.Connection:
+        """This thread's connection, opened and tuned on first use. Never shared across threads."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.db_path, timeout=10, cached_statements=self.cached_statements, check_same_thread=False
+            )
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+            conn.execute(f"PRAGMA cache_size=-{int(self.cache_size_kib)}")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Commit on success, roll back on error."""
+        conn = self.connection()
+        with conn:
+            yield conn
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run blocking database work on the bounded executor."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="sqlite")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(fn, *args, **kwargs))
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
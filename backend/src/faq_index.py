@@ -0,0 +1,78 @@
+"""
+BM25 retrieval over a content pack's FAQs and offerings.
+
+The SDR prompt used to embed every FAQ and vertical, so each LLM turn resent
+the whole knowledge base and prompt size grew with the content. Instead the
+passages are indexed once when the pack is loaded (an inverted index of term
+frequencies), and the `answer_faq` tool returns only the best few passages
+for the caller's question.
+"""
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Tuple
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it me my of on or the there this to "
+    "what when where which who why will with you your".split()
+)
+
+
+def _stem(token: str) -> str:
+    """Fold plurals so "fees" matches "fee" and "classes" matches "class"."""
+    if len(token) > 4 and token.endswith(("sses", "xes", "ches", "shes")):
+        return token[:-2]
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    return [_stem(t) for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+class FAQIndex:
+    def __init__(self, passages: List[Dict[str, str]], k1: float = 1.5, b: float = 0.75):
+        """`passages` are dicts with "title" and "text"; both are indexed, the title counted twice."""
+        self.passages = passages
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self._lengths: List[int] = []
+        for doc_id, passage in enumerate(passages):
+            tokens = tokenize(passage["title"]) * 2 + tokenize(passage["text"])
+            self._lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                self._postings[term].append((doc_id, tf))
+        self._avg_length = sum(self._lengths) / len(self._lengths) if self._lengths else 0.0
+        n = len(passages)
+        self._idf = {
+            term: math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self._postings.items()
+        }
+
+    @classmethod
+    def from_content(cls, content: Dict[str, Any]) -> "FAQIndex":
+        passages = [{"title": f["question"], "text": f["answer"]} for f in content.get("faqs", [])]
+        passages += [{"title": v["name"], "text": v["description"]} for v in content.get("verticals", [])]
+        return cls(passages)
+
+    def search(self, query: str, top_k: int = 3) -> List[Tuple[float, Dict[str, str]]]:
+        """Best `top_k` passages for `query` as (score, passage), highest first; no zero scores."""
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self._idf.get(term)
+            if idf is None:
+                continue
+            for doc_id, tf in self._postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / self._avg_length)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:top_k]
+        return [(score, self.passages[doc_id]) for doc_id, score in ranked]
+
+
+def format_faq_results(results: List[Tuple[float, Dict[str, str]]]) -> str:
+    if not results:
+        return "No matching information found. Offer to connect the caller with a counselor."
+    return "\n".join(f"Q: {p['title']}\nA: {p['text']}" for _, p in results)
@@ -0,0 +1,484 @@
+"""
+Latency percentiles for the voice loop.
+
+`metrics.log_metrics` prints one line per event and the usage summary only
+totals tokens and characters, so there was no way to see which stage of a
+turn (end-of-utterance detection, LLM first token, a tool call, TTS first
+byte) was eating the latency budget. `LatencyStats` keeps an HDR-style
+histogram per stage - log-spaced buckets with ~2% relative error, so p99 of
+a long session costs a few hundred counters instead of every sample - fed
+from the session's `metrics_collected` events and from the tool spans of
+`tool_tracing.traced_tool`.
+
+LiveKit runs each job in its own process, so per-worker numbers are built by
+merging: every session periodically writes its snapshot to `LATENCY_DIR`,
+and the worker's main process serves the merged view in Prometheus text
+format (summaries with p50/p95/p99) on 127.0.0.1:`NOVA_METRICS_PORT`.
+Each worker has its own subdirectory, named after its main process, so
+workers sharing a host never mix or delete each other's numbers. The main
+process folds closed sessions into one totals file and removes the
+directories of workers that have exited, so the directory stays small.
+At shutdown each job logs its own table next to the worker totals.
+"""
+import asyncio
+import contextvars
+import json
+import logging
+import math
+import os
+import shutil
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Optional, Set, Tuple, Union
+
+logger = logging.getLogger("latency-metrics")
+
+LATENCY_DIR = Path(os.getenv("NOVA_LATENCY_DIR", str(Path(__file__).resolve().parent.parent / ".latency")))
+METRICS_PORT = int(os.getenv("NOVA_METRICS_PORT", "9464"))
+QUANTILES = (0.5, 0.95, 0.99)
+TOTALS_FILE = "worker-totals.json"
+WORKER_DIR_PREFIX = "worker-"
+FINAL_SUFFIX = ".final.json"
+
+# Stage names; tool and merchant timings are labelled by function / operation name
+EOU_DELAY = "eou_delay"
+TRANSCRIPTION_DELAY = "transcription_delay"
+LLM_TTFT = "llm_ttft"
+TTS_TTFB = "tts_ttfb"
+TOOL = "tool"
+MERCHANT_QUEUE = "merchant_queue"
+MERCHANT_RUN = "merchant_run"
+
+
+class LatencyHistogram:
+    """Log-bucketed histogram of durations in seconds (values below `min_value` share the first bucket)."""
+
+    def __init__(self, min_value: float = 1e-4, precision: float = 0.02):
+        self.min_value = min_value
+        self.precision = precision
+        self._log_base = math.log1p(precision)
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def _index(self, value: float) -> int:
+        if value <= self.min_value:
+            return 0
+        return int(math.log(value / self.min_value) / self._log_base) + 1
+
+    def _upper_bound(self, index: int) -> float:
+        return self.min_value * math.exp(index * self._log_base)
+
+    def record(self, value: float):
+        if value < 0 or math.isnan(value):
+            return
+        index = self._index(value)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, q: float) -> float:
+        """Value at quantile `q` (0..1), accurate to `precision`; 0 when empty."""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(self._upper_bound(index), self.max)
+        return self.max
+
+    def merge(self, other: "LatencyHistogram"):
+        for index, n in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + n
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "min_value": self.min_value,
+            "precision": self.precision,
+            "buckets": {str(i): n for i, n in self.buckets.items()},
+            "count": self.count,
+            "total": self.total,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LatencyHistogram":
+        hist = cls(data["min_value"], data["precision"])
+        hist.buckets = {int(i): n for i, n in data["buckets"].items()}
+        hist.count = data["count"]
+        hist.total = data["total"]
+        hist.max = data["max"]
+        return hist
+
+
+StageKey = Tuple[str, str]  # (stage, label), label is "" except for tools
+
+
+class LatencyStats:
+    def __init__(self):
+        self.histograms: Dict[StageKey, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float, label: str = ""):
+        with self._lock:
+            hist = self.histograms.get((stage, label))
+            if hist is None:
+                hist = self.histograms[(stage, label)] = LatencyHistogram()
+            hist.record(seconds)
+
+    def observe(self, ev_metrics: Any):
+        """Record the latencies in one `MetricsCollectedEvent.metrics` (EOU, LLM, TTS; others are ignored)."""
+        kind = getattr(ev_metrics, "type", None)
+        if kind == "eou_metrics":
+            # 0.0 means the end of speech was not detected
+            if ev_metrics.end_of_utterance_delay > 0:
+                self.record(EOU_DELAY, ev_metrics.end_of_utterance_delay)
+            if ev_metrics.transcription_delay > 0:
+                self.record(TRANSCRIPTION_DELAY, ev_metrics.transcription_delay)
+        elif kind == "llm_metrics":
+            if not ev_metrics.cancelled and ev_metrics.ttft >= 0:
+                self.record(LLM_TTFT, ev_metrics.ttft)
+        elif kind == "tts_metrics":
+            if not ev_metrics.cancelled and ev_metrics.ttfb >= 0:
+                self.record(TTS_TTFB, ev_metrics.ttfb)
+
+    def merge(self, other: "LatencyStats"):
+        with self._lock:
+            for key, hist in other.histograms.items():
+                mine = self.histograms.get(key)
+                if mine is None:
+                    mine = self.histograms[key] = LatencyHistogram(hist.min_value, hist.precision)
+                mine.merge(hist)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {f"{stage}|{label}": hist.to_dict() for (stage, label), hist in self.histograms.items()}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LatencyStats":
+        stats = cls()
+        for key, hist in data.items():
+            stage, _, label = key.partition("|")
+            stats.histograms[(stage, label)] = LatencyHistogram.from_dict(hist)
+        return stats
+
+    def report(self) -> str:
+        """Plain-text table of count and p50/p95/p99/max (ms) per stage."""
+        if not self.histograms:
+            return "no latency samples"
+        lines = [f"{'stage':<32}{'count':>7}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}"]
+        for (stage, label), hist in sorted(self.histograms.items()):
+            name = f"{stage}:{label}" if label else stage
+            values = [hist.percentile(q) for q in QUANTILES] + [hist.max]
+            lines.append(f"{name:<32}{hist.count:>7}" + "".join(f"{v * 1000:>9.0f}" for v in values))
+        return "\n".join(lines)
+
+    def prometheus(self) -> str:
+        """Prometheus text exposition: one summary per stage, tools labelled by function."""
+        lines = [
+            "# HELP nova_voice_latency_seconds Voice loop stage latency.",
+            "# TYPE nova_voice_latency_seconds summary",
+        ]
+        with self._lock:
+            items = sorted(self.histograms.items())
+        for (stage, label), hist in items:
+            labels = f'stage="{stage}"' + (f',function="{label}"' if label else "")
+            for q in QUANTILES:
+                lines.append(f'nova_voice_latency_seconds{{{labels},quantile="{q}"}} {hist.percentile(q):.6f}')
+            lines.append(f"nova_voice_latency_seconds_sum{{{labels}}} {hist.total:.6f}")
+            lines.append(f"nova_voice_latency_seconds_count{{{labels}}} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+
+# Stats of the session running in this context (set by the entrypoint, read by `record_tool`)
+_current_stats: contextvars.ContextVar[Optional[LatencyStats]] = contextvars.ContextVar(
+    "current_latency_stats", default=None
+)
+
+
+def bind_session(stats: LatencyStats):
+    """Make `stats` the target of `record_stage` / `record_tool` for this job (tasks created afterwards inherit it)."""
+    _current_stats.set(stats)
+
+
+def record_stage(stage: str, seconds: float, label: str = ""):
+    """Add one sample to the bound session's stats (no-op outside a session)."""
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(stage, seconds, label=label)
+
+
+def record_tool(name: str, seconds: float):
+    """Record a tool call's execution time under ("tool", its name); called by `tool_tracing.traced_tool`."""
+    record_stage(TOOL, seconds, label=name)
+
+
+class LatencyStore:
+    """Directory of per-session snapshots, merged into per-worker totals.
+
+    Snapshots live under `<root>/worker-<pid>/`, where pid is the worker's main
+    process (`worker_pid`). A running session keeps `<session>.<pid>.json`
+    current; when it closes, the file becomes `<session>.<pid>.final.json`.
+    The main process folds final snapshots into `worker-totals.json` and
+    deletes them (`compact`), clears its own directory when it starts, and
+    removes the directories of exited workers (`prune`), so a worker's
+    directory holds one file per live session plus the totals.
+    """
+
+    def __init__(self, root: Union[str, Path] = LATENCY_DIR):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        self._finished: Set[str] = set()
+
+    @property
+    def directory(self) -> Path:
+        """This worker's snapshot directory."""
+        return self.root / f"{WORKER_DIR_PREFIX}{worker_pid()}"
+
+    def _path(self, session_id: str, suffix: str = ".json") -> Path:
+        safe_id = "".join(c if c.isalnum() or c in "-_." else "_" for c in session_id)
+        return self.directory / f"{safe_id}.{os.getpid()}{suffix}"
+
+    def _dump(self, path: Path, data: Dict[str, Any]):
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def write(self, session_id: str, stats: LatencyStats, final: bool = False):
+        """Replace this session's snapshot; `final` marks the session closed (later writes are ignored)."""
+        with self._lock:
+            if session_id in self._finished:
+                return
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self._path(session_id)
+            self._dump(path, stats.to_dict())
+            if final:
+                # A rename, so the session is never counted twice or missing
+                os.replace(path, self._path(session_id, FINAL_SUFFIX))
+                self._finished.add(session_id)
+
+    def _read(self, path: Path) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None  # compacted or pruned since the directory was listed
+        except (OSError, ValueError) as e:
+            logger.warning(f"Skipping latency snapshot {path.name}: {e}")
+            return None
+
+    def load(self, since: float = 0.0) -> LatencyStats:
+        """Merge the worker totals and every session snapshot written at or after `since` (a time.time() value)."""
+        merged = LatencyStats()
+        if not self.directory.exists():
+            return merged
+        # Read the totals before listing: a snapshot folded since is then either skipped
+        # (named in these totals) or already deleted, never counted twice
+        snapshots: Dict[Path, Dict[str, Any]] = {}
+        folded: Set[str] = set()
+        totals_path = self.directory / TOTALS_FILE
+        totals = self._read_since(totals_path, since)
+        if totals is not None:
+            folded.update(totals.get("sessions", []))
+            snapshots[totals_path] = totals.get("stats", {})
+        for path in self.directory.glob("*.json"):
+            if path.name == TOTALS_FILE or path.name in folded:
+                continue
+            data = self._read_since(path, since)
+            if data is not None:
+                snapshots[path] = data
+        for path, data in snapshots.items():
+            try:
+                merged.merge(LatencyStats.from_dict(data))
+            except (KeyError, ValueError, AttributeError) as e:
+                logger.warning(f"Skipping latency snapshot {path.name}: {e}")
+        return merged
+
+    def _read_since(self, path: Path, since: float) -> Optional[Dict[str, Any]]:
+        try:
+            if path.stat().st_mtime < since:
+                return None
+        except FileNotFoundError:
+            return None
+        return self._read(path)
+
+    def compact(self) -> int:
+        """Fold closed sessions' snapshots into the worker totals and delete them. Main process only.
+
+        Returns how many snapshots were folded.
+        """
+        with self._lock:
+            if not self.directory.exists():
+                return 0
+            totals_path = self.directory / TOTALS_FILE
+            totals_data = self._read(totals_path) or {}
+            already = set(totals_data.get("sessions", []))
+            finished = sorted(self.directory.glob(f"*{FINAL_SUFFIX}"))
+            if not finished:
+                return 0
+            totals = LatencyStats.from_dict(totals_data.get("stats", {}))
+            folded = []
+            for path in finished:
+                if path.name in already:
+                    continue  # folded by a compaction that stopped before deleting it
+                data = self._read(path)
+                if data is None:
+                    continue
+                try:
+                    totals.merge(LatencyStats.from_dict(data))
+                except (KeyError, ValueError, AttributeError) as e:
+                    logger.warning(f"Dropping latency snapshot {path.name}: {e}")
+                folded.append(path.name)
+            # The totals name the files they include, so readers skip them until they are gone
+            self._dump(totals_path, {"sessions": folded, "stats": totals.to_dict()})
+            for path in finished:
+                path.unlink(missing_ok=True)
+            return len(folded)
+
+    def prune(self, before: float) -> int:
+        """
+        Delete this worker's files last written before `before` (a time.time() value; left by
+        an earlier process with the same pid) and the directories of workers that have exited.
+        Returns how many files were removed.
+        """
+        removed = 0
+        with self._lock:
+            for path in [*self.directory.glob("*.json"), *self.directory.glob("*.tmp")]:
+                try:
+                    if path.stat().st_mtime < before:
+                        path.unlink()
+                        removed += 1
+                except FileNotFoundError:
+                    pass
+            for worker_dir in self.root.glob(f"{WORKER_DIR_PREFIX}*"):
+                pid = worker_dir.name[len(WORKER_DIR_PREFIX):]
+                if not pid.isdigit() or int(pid) == worker_pid() or _process_alive(int(pid)):
+                    continue
+                removed += sum(1 for path in worker_dir.iterdir() if path.is_file())
+                shutil.rmtree(worker_dir, ignore_errors=True)
+        return removed
+
+    async def flush_periodically(self, session_id: str, stats: LatencyStats, interval: float = 15.0):
+        """Keep this session's snapshot current for the worker endpoint (run as a task; cancel at shutdown)."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.write, session_id, stats)
+            except OSError as e:
+                logger.warning(f"Failed to write latency snapshot: {e}")
+
+
+latency_store = LatencyStore()
+
+
+def worker_pid() -> int:
+    """Pid of this worker's main process (set by `serve_metrics`, inherited by job processes)."""
+    return int(os.getenv("NOVA_WORKER_PID") or os.getpid())
+
+
+def _process_alive(pid: int) -> bool:
+    if os.name == "nt":
+        return True  # os.kill would terminate it; never prune there
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # exists, owned by another user
+    return True
+
+
+def worker_started_at() -> float:
+    """Start time of this worker (set by `serve_metrics` in the main process, inherited by job processes)."""
+    return float(os.getenv("NOVA_WORKER_STARTED_AT", "0"))
+
+
+class SessionLatency:
+    """Latency stats of one job's session: bound for the tool spans and flushed to the store for the worker view."""
+
+    def __init__(self, session_id: str, store: LatencyStore = latency_store, flush_interval: float = 15.0):
+        self.session_id = session_id
+        self.store = store
+        self.stats = LatencyStats()
+        bind_session(self.stats)
+        self._flusher = asyncio.get_running_loop().create_task(
+            store.flush_periodically(session_id, self.stats, flush_interval)
+        )
+
+    def observe(self, ev_metrics: Any):
+        self.stats.observe(ev_metrics)
+
+    async def aclose(self) -> str:
+        """Write the final snapshot and return the shutdown report (this session, then the worker so far)."""
+        self._flusher.cancel()
+        await asyncio.to_thread(self.store.write, self.session_id, self.stats, final=True)
+        worker = await asyncio.to_thread(self.store.load, worker_started_at())
+        return f"Session latency (ms):\n{self.stats.report()}\nWorker latency (ms):\n{worker.report()}"
+
+
+def serve_metrics(
+    port: int = METRICS_PORT,
+    store: LatencyStore = latency_store,
+    host: str = "127.0.0.1",
+    compact_interval: float = 60.0,
+):
+    """Serve the worker's merged latency summaries at http://host:port/metrics from a daemon thread.
+
+    Only this worker's snapshots are included: they are kept under its own pid, files and
+    directories left by exited workers are deleted, and closed sessions are compacted every
+    `compact_interval` seconds.
+    Returns the server, or None if `port` is 0 or cannot be bound.
+    """
+    if not port:
+        return None
+    started_at = time.time()
+    os.environ["NOVA_WORKER_STARTED_AT"] = str(started_at)
+    os.environ["NOVA_WORKER_PID"] = str(os.getpid())
+    pruned = store.prune(before=started_at)
+    if pruned:
+        logger.info(f"Removed {pruned} latency snapshots of exited workers")
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = store.load(since=started_at).prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    try:
+        server = ThreadingHTTPServer((host, port), Handler)
+    except OSError as e:
+        logger.warning(f"Latency metrics endpoint disabled, cannot bind {host}:{port}: {e}")
+        return None
+    threading.Thread(target=server.serve_forever, name="latency-metrics", daemon=True).start()
+
+    def compact_periodically():
+        # Runs until the server is closed
+        while server.socket.fileno() != -1:
+            try:
+                store.compact()
+            except OSError as e:
+                logger.warning(f"Failed to compact latency snapshots: {e}")
+            time.sleep(compact_interval)
+
+    threading.Thread(target=compact_periodically, name="latency-compact", daemon=True).start()
+    logger.info(f"Serving voice latency metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
@@ -0,0 +1,187 @@
+"""
+Lead capture store for the SDR agent.
+
+save_lead used to read all of shared-data/leads.json, append one lead and
+rewrite the file: O(n) per save, blocking file I/O on the event loop, and
+concurrent saves could overwrite each other's leads. Leads now go to a SQLite
+table with a unique index on the normalized email, so a repeat caller updates
+their lead instead of duplicating it. Saves are queued to a single writer
+task that commits whatever has accumulated in one transaction, off the event
+loop, so a save costs the same during a campaign spike as on a quiet day.
+Each job opens its own sink (`open_lead_sink`): the writer task lives on that
+job's event loop and is flushed and closed with the job, never by another.
+
+The sales team's JSON file is produced on demand:
+    python -m src.lead_sink export ../shared-data/leads.json
+"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger("lead-sink")
+
+SHARED_DATA = Path(__file__).resolve().parent.parent.parent / "shared-data"
+LEADS_DB_PATH = Path(os.getenv("LEADS_DB_PATH", str(SHARED_DATA / "leads.db")))
+LEADS_JSON_PATH = SHARED_DATA / "leads.json"
+
+
+def normalize_email(email: Optional[str]) -> Optional[str]:
+    email = (email or "").strip().lower()
+    return email or None
+
+
+class LeadSink:
+    def __init__(
+        self,
+        db_path: Union[str, Path],
+        legacy_json: Optional[Union[str, Path]] = None,
+        max_batch: int = 100,
+        max_delay: float = 0.05,
+    ):
+        self.db_path = str(db_path)
+        self.legacy_json = legacy_json
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        with self._db_lock:
+            if self._db is None:
+                conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.executescript("""
+                    CREATE TABLE IF NOT EXISTS leads (
+                        id INTEGER PRIMARY KEY,
+                        email_norm TEXT UNIQUE,
+                        data TEXT NOT NULL,
+                        created_at REAL NOT NULL,
+                        updated_at REAL NOT NULL
+                    );
+                """)
+                self._db = conn
+                self._import_legacy_locked()
+            return self._db
+
+    def _import_legacy_locked(self):
+        """One-time import of an existing leads.json into an empty table."""
+        if not self.legacy_json or not os.path.exists(self.legacy_json):
+            return
+        if self._db.execute("SELECT 1 FROM leads LIMIT 1").fetchone():
+            return
+        try:
+            with open(self.legacy_json, "r") as f:
+                legacy = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Skipping legacy lead import from {self.legacy_json}: {e}")
+            return
+        # created_at 0 keeps imported leads ahead of new ones, in file order
+        self._write_batch_locked([(lead, 0.0) for lead in legacy])
+        logger.info(f"Imported {len(legacy)} leads from {self.legacy_json}")
+
+    def _write_batch_locked(self, batch: List[Tuple[Dict[str, Any], float]]):
+        with self._db:
+            self._db.executemany(
+                """
+                INSERT INTO leads (email_norm, data, created_at, updated_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT (email_norm) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at
+                """,
+                [(normalize_email(lead.get("email")), json.dumps(lead), at, at) for lead, at in batch],
+            )
+
+    def write_batch(self, batch: List[Tuple[Dict[str, Any], float]]):
+        """Upsert (lead, received_at) pairs in one transaction. Blocking; called off-loop."""
+        self._connection()
+        with self._db_lock:
+            self._write_batch_locked(batch)
+
+    async def save(self, lead: Dict[str, Any]):
+        """Queue a lead for the next batched write and wait until it is committed."""
+        if self._writer is None or self._writer.done():
+            self._queue = asyncio.Queue()
+            self._writer = asyncio.get_running_loop().create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((lead, time.time(), future))
+        await future
+
+    async def _run(self):
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.max_delay
+            stopping = False
+            while len(batch) < self.max_batch:
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout=max(0.0, deadline - time.monotonic()))
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            try:
+                await asyncio.to_thread(self.write_batch, [(lead, at) for lead, at, _ in batch])
+            except Exception as e:
+                logger.error(f"Failed to write {len(batch)} leads: {e}")
+                for *_, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                for *_, future in batch:
+                    if not future.done():
+                        future.set_result(None)
+            if stopping:
+                return
+
+    async def aclose(self):
+        """Flush queued leads, stop the writer and close the database connection."""
+        if self._writer is not None and not self._writer.done():
+            self._queue.put_nowait(None)
+            await self._writer
+        self._writer = None
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def all_leads(self) -> List[Dict[str, Any]]:
+        conn = self._connection()
+        with self._db_lock:
+            rows = conn.execute("SELECT data FROM leads ORDER BY created_at, id").fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def export_json(self, path: Union[str, Path]) -> int:
+        """Write all leads as the JSON list the sales team uses (atomically). Returns the count."""
+        leads = self.all_leads()
+        tmp_path = f"{path}.tmp.{os.getpid()}"
+        with open(tmp_path, "w") as f:
+            json.dump(leads, f, indent=2)
+        os.replace(tmp_path, path)
+        return len(leads)
+
+
+def open_lead_sink() -> LeadSink:
+    """The SDR agent's lead store (seeded from the existing leads.json), for one job or command."""
+    return LeadSink(LEADS_DB_PATH, legacy_json=LEADS_JSON_PATH)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3) or sys.argv[1] != "export":
+        print("Usage: python -m src.lead_sink export [leads.json]")
+        sys.exit(1)
+    out_path = sys.argv[2] if len(sys.argv) == 3 else LEADS_JSON_PATH
+    exported = open_lead_sink().export_json(out_path)
+    print(f"Exported {exported} leads to {out_path}")
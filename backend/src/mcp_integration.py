@@ -1,40 +1,129 @@
 """
 MCP (Model Context Protocol) Integration for Wellness Agent
 Real Notion and Todoist API integration with auto-database creation
+
+All calls go through the async clients in wellness_api.py, so syncing a
+wellness log never blocks the agent's event loop. The resolved Notion
+database and Todoist project IDs are cached (see resource_cache.py), so a
+steady-state write is a single API call. Todoist tasks go through a durable
+outbox (task_outbox.py) that a background worker syncs in batches, so the
+agent can confirm goals without waiting on Todoist. Call `connect()` once the
+event loop is running so tasks left queued by an earlier run are synced.
 """
+import asyncio
 import os
-import json
 from typing import Optional, List, Dict
 from datetime import datetime
 from pathlib import Path
-import requests
-from notion_client import Client as NotionClient
-from todoist_api_python.api import TodoistAPI
+
+from .resource_cache import ResourceCache
+from .task_outbox import TaskOutbox
+from .wellness_api import (
+    APIError, AsyncNotionClient, AsyncTodoistClient, NOTION_API_URL, TODOIST_API_URL, TODOIST_SYNC_URL,
+)
+
+STATE_PATH = os.getenv("MCP_STATE_PATH", str(Path(__file__).parent.parent / ".mcp_state.json"))
+RESOURCE_TTL_SECONDS = float(os.getenv("MCP_RESOURCE_TTL", str(24 * 3600)))
+TODOIST_OUTBOX_PATH = os.getenv("TODOIST_OUTBOX_DB", str(Path(__file__).parent.parent / "todoist_outbox.db"))
+NOTION_DATABASE_KEY = "notion_database"
+
+def _todoist_project_key(project_name: str) -> str:
+    return f"todoist_project:{project_name}"
 
 class MCPIntegration:
     """Handles MCP connections to Notion and Todoist with real API calls"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        notion_api_url: str = NOTION_API_URL,
+        todoist_api_url: str = TODOIST_API_URL,
+        todoist_sync_url: str = TODOIST_SYNC_URL,
+        state_path: Optional[str] = STATE_PATH,
+        outbox_path: str = TODOIST_OUTBOX_PATH,
+    ):
         self.notion_token = os.getenv("NOTION_API_TOKEN")
         self.notion_database_id = os.getenv("NOTION_DATABASE_ID")
         self.todoist_token = os.getenv("TODOIST_API_TOKEN")
         
         # Initialize clients
-        self.notion = NotionClient(auth=self.notion_token) if self.notion_token else None
-        self.todoist = TodoistAPI(self.todoist_token) if self.todoist_token else None
+        self.notion = AsyncNotionClient(self.notion_token, base_url=notion_api_url) if self.notion_token else None
+        self.todoist = AsyncTodoistClient(
+            self.todoist_token, base_url=todoist_api_url, sync_url=todoist_sync_url
+        ) if self.todoist_token else None
+
+        # Resolved database/project IDs, persisted across restarts
+        self.resources = ResourceCache(state_path, ttl_seconds=RESOURCE_TTL_SECONDS)
+        self._resolve_lock: Optional[asyncio.Lock] = None
+
+        self.outbox = TaskOutbox(
+            outbox_path,
+            self.todoist,
+            resolve_project=self._ensure_todoist_project,
+            invalidate_project=lambda name: self.resources.invalidate(_todoist_project_key(name)),
+        ) if self.todoist else None
+
+    async def connect(self):
+        """Start the outbox worker, which first retries tasks still pending from an earlier run."""
+        if self.outbox is not None:
+            self.outbox.start()
+
+    async def aclose(self):
+        """Stop the outbox worker (queued tasks stay on disk) and close the pooled HTTP sessions."""
+        if self.outbox is not None:
+            await self.outbox.stop()
+        for client in (self.notion, self.todoist):
+            if client is not None:
+                await client.aclose()
         
-    def _ensure_notion_database(self) -> Optional[str]:
+    async def _cached(self, key: str, resolve) -> Optional[str]:
+        """Return the cached ID for `key`, resolving it (once, even under concurrency) on a miss."""
+        resource_id = self.resources.get(key)
+        if resource_id:
+            return resource_id
+        if self._resolve_lock is None:
+            self._resolve_lock = asyncio.Lock()
+        async with self._resolve_lock:
+            resource_id = self.resources.get(key)
+            if not resource_id:
+                resource_id = await resolve()
+                if resource_id:
+                    self.resources.set(key, resource_id)
+        return resource_id
+
+    async def _with_resource(self, key: str, ensure, call):
+        """
+        Run `call(resource_id)`. If the API reports the cached resource as
+        missing (404), drop it from the cache, resolve it again and retry once.
+        """
+        resource_id = await ensure()
+        if not resource_id:
+            raise LookupError(f"Could not resolve {key}")
+        try:
+            return await call(resource_id)
+        except APIError as e:
+            if e.status != 404:
+                raise
+            self.resources.invalidate(key)
+        resource_id = await ensure()
+        if not resource_id:
+            raise LookupError(f"Could not resolve {key}")
+        return await call(resource_id)
+
+    async def _ensure_notion_database(self) -> Optional[str]:
         """
         Ensure Notion database exists, create if not
         Returns database_id or None
         """
         if not self.notion:
             return None
-            
+        return await self._cached(NOTION_DATABASE_KEY, self._resolve_notion_database)
+
+    async def _resolve_notion_database(self) -> Optional[str]:
+        """Find the configured database or create one (cache miss path)."""
         # If database ID is provided, verify it exists
         if self.notion_database_id:
             try:
-                self.notion.databases.retrieve(self.notion_database_id)
+                await self.notion.retrieve_database(self.notion_database_id)
                 return self.notion_database_id
             except Exception:
                 print(f"Database {self.notion_database_id} not found, will create new one")
@@ -43,7 +132,7 @@ class MCPIntegration:
         try:
             # First, get the user's workspace to create database
             # We'll create it in a new page
-            parent_page = self.notion.search(filter={"property": "object", "value": "page"}).get("results", [])
+            parent_page = (await self.notion.search(filter={"property": "object", "value": "page"})).get("results", [])
             
             if not parent_page:
                 # Create in workspace root
@@ -51,7 +140,7 @@ class MCPIntegration:
             else:
                 parent = {"type": "page_id", "page_id": parent_page[0]["id"]}
             
-            database = self.notion.databases.create(
+            database = await self.notion.create_database(
                 parent=parent,
                 title=[{"type": "text", "text": {"content": "Daily Wellness Log"}}],
                 properties={
@@ -67,26 +156,6 @@ class MCPIntegration:
             new_db_id = database["id"]
             print(f"✅ Created Notion database: {new_db_id}")
             
-            # Save to env for future use
-            env_path = Path(__file__).parent.parent / ".env.local"
-            if env_path.exists():
-                with open(env_path, "r") as f:
-                    env_content = f.read()
-                
-                if "NOTION_DATABASE_ID" in env_content:
-                    # Update existing
-                    lines = env_content.split("\n")
-                    for i, line in enumerate(lines):
-                        if line.startswith("NOTION_DATABASE_ID"):
-                            lines[i] = f"NOTION_DATABASE_ID={new_db_id}"
-                    env_content = "\n".join(lines)
-                else:
-                    # Add new
-                    env_content += f"\nNOTION_DATABASE_ID={new_db_id}\n"
-                
-                with open(env_path, "w") as f:
-                    f.write(env_content)
-            
             self.notion_database_id = new_db_id
             return new_db_id
             
@@ -110,37 +179,39 @@ class MCPIntegration:
             }
         
         # Ensure database exists
-        db_id = self._ensure_notion_database()
-        if not db_id:
+        if not await self._ensure_notion_database():
             return {
                 "status": "error",
                 "message": "Could not create/find Notion database"
             }
         
+        properties = {
+            "Name": {
+                "title": [{"text": {"content": f"{user_name}'s Check-in - {date}"}}]
+            },
+            "Date": {
+                "date": {"start": datetime.now().isoformat()}
+            },
+            "User": {
+                "rich_text": [{"text": {"content": user_name}}]
+            },
+            "Mood": {
+                "rich_text": [{"text": {"content": mood}}]
+            },
+            "Goals": {
+                "multi_select": [{"name": goal[:100]} for goal in goals[:5]]  # Limit to 5 goals, 100 chars each
+            },
+            "Summary": {
+                "rich_text": [{"text": {"content": summary}}]
+            }
+        }
+        
         try:
             # Create page in database
-            page = self.notion.pages.create(
-                parent={"database_id": db_id},
-                properties={
-                    "Name": {
-                        "title": [{"text": {"content": f"{user_name}'s Check-in - {date}"}}]
-                    },
-                    "Date": {
-                        "date": {"start": datetime.now().isoformat()}
-                    },
-                    "User": {
-                        "rich_text": [{"text": {"content": user_name}}]
-                    },
-                    "Mood": {
-                        "rich_text": [{"text": {"content": mood}}]
-                    },
-                    "Goals": {
-                        "multi_select": [{"name": goal[:100]} for goal in goals[:5]]  # Limit to 5 goals, 100 chars each
-                    },
-                    "Summary": {
-                        "rich_text": [{"text": {"content": summary}}]
-                    }
-                }
+            page = await self._with_resource(
+                NOTION_DATABASE_KEY,
+                self._ensure_notion_database,
+                lambda database_id: self.notion.create_page(parent={"database_id": database_id}, properties=properties),
             )
             
             return {
@@ -156,6 +227,20 @@ class MCPIntegration:
                 "message": f"Failed to create Notion entry: {str(e)}"
             }
     
+    async def _ensure_todoist_project(self, project_name: str) -> Optional[str]:
+        return await self._cached(_todoist_project_key(project_name), lambda: self._resolve_todoist_project(project_name))
+
+    async def _resolve_todoist_project(self, project_name: str) -> str:
+        """Find the project by name or create it (cache miss path)."""
+        projects = await self.todoist.get_projects()
+        project = next((p for p in projects if p["name"] == project_name), None)
+        
+        if not project:
+            # Create project
+            project = await self.todoist.add_project(name=project_name)
+            print(f"✅ Created Todoist project: {project_name}")
+        return project["id"]
+
     async def create_todoist_tasks(
         self,
         goals: List[str],
@@ -170,40 +255,24 @@ class MCPIntegration:
             }
         
         try:
-            # Find or create project
-            projects = self.todoist.get_projects()
-            project = next((p for p in projects if p.name == project_name), None)
-            
-            if not project:
-                # Create project
-                project = self.todoist.add_project(name=project_name)
-                print(f"✅ Created Todoist project: {project_name}")
-            
-            # Create tasks
-            created_tasks = []
-            for goal in goals:
-                task = self.todoist.add_task(
-                    content=goal,
-                    project_id=project.id,
-                    labels=[user_name] if user_name != "Wellness" else []
-                )
-                created_tasks.append({
-                    "id": task.id,
-                    "content": task.content,
-                    "url": task.url
-                })
+            # Queue locally and confirm now; the outbox worker syncs in the background
+            labels = [user_name] if user_name != "Wellness" else []
+            task_ids = await self.outbox.aenqueue(goals, project_name, labels)
+            self.outbox.start()
             
             return {
                 "status": "success",
-                "message": f"Created {len(created_tasks)} tasks in '{project_name}'",
-                "tasks": created_tasks,
-                "project_url": f"https://todoist.com/app/project/{project.id}"
+                "message": f"Added {len(task_ids)} goals to '{project_name}'. They will sync to Todoist shortly.",
+                "tasks": [
+                    {"id": task_id, "content": goal, "status": "queued"}
+                    for task_id, goal in zip(task_ids, goals)
+                ],
             }
             
         except Exception as e:
             return {
                 "status": "error",
-                "message": f"Failed to create Todoist tasks: {str(e)}"
+                "message": f"Failed to queue Todoist tasks: {str(e)}"
             }
     
     async def mark_todoist_task_complete(
@@ -217,8 +286,18 @@ class MCPIntegration:
                 "message": "Todoist not configured"
             }
         
+        # Tasks created through the outbox are known by their command id until synced
+        queued = await asyncio.to_thread(self.outbox.get, task_id)
+        if queued is not None:
+            if queued["status"] != "sent":
+                return {
+                    "status": "error",
+                    "message": f"Task {task_id} has not synced to Todoist yet"
+                }
+            task_id = queued["task_id"]
+        
         try:
-            self.todoist.close_task(task_id=task_id)
+            await self.todoist.close_task(task_id=task_id)
             return {
                 "status": "success",
                 "message": f"Task {task_id} marked as complete"
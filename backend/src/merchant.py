@@ -1,24 +1,46 @@
-import json
 import logging
+import os
 from pathlib import Path
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Union
+from .catalog import Catalog
+from .catalog_query import QueryIndex
 from .order_manager import OrderManager
 from .cart import Cart
 
 logger = logging.getLogger("merchant")
 
-# Load catalog
+# Load catalog: catalog.json is compiled into a memory-mapped snapshot that is
+# shared by all worker processes and hot-reloaded when catalog.json changes.
 CATALOG_PATH = Path(__file__).parent / "catalog.json"
-try:
-    with open(CATALOG_PATH, "r") as f:
-        PRODUCTS = json.load(f)
-except Exception as e:
-    logger.error(f"Failed to load catalog: {e}")
-    PRODUCTS = []
+CATALOG_SNAPSHOT_PATH = Path(os.getenv("CATALOG_SNAPSHOT_PATH", str(CATALOG_PATH.with_suffix(".snap"))))
+catalog = Catalog.from_snapshot(CATALOG_SNAPSHOT_PATH, source_json=CATALOG_PATH)
+
+def reload_catalog() -> bool:
+    """Pick up a new catalog version now instead of at the next periodic check."""
+    return catalog.refresh()
 
 order_manager = OrderManager()
 
-def list_products(filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+_query_index: Optional[QueryIndex] = None
+
+def _get_query_index() -> QueryIndex:
+    """Query indexes for the current catalog snapshot, rebuilt when the catalog reloads."""
+    global _query_index
+    snapshot = catalog.snapshot
+    index = _query_index
+    if index is None or index.version != snapshot.version:
+        index = QueryIndex(snapshot)
+        _query_index = index
+    return index
+
+_get_query_index()
+
+def list_products(
+    filters: Optional[Dict[str, Any]] = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
+    count_only: bool = False,
+) -> Union[List[Dict[str, Any]], int]:
     """
     List products from the catalog, optionally filtered by category, price, etc.
     
@@ -29,57 +51,17 @@ def list_products(filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, An
             - min_price (float): Filter by minimum price.
             - color (str): Filter by color (in attributes).
             - search (str): Search in name or description.
+        limit: Maximum number of products to return.
+        offset: Number of matching products to skip (for pagination).
+        count_only: Return only the number of matching products.
             
     Returns:
-        List of product dictionaries.
+        List of product dictionaries, or the match count if count_only is set.
     """
-    results = PRODUCTS
-    
-    if not filters:
-        return results
-
-    filtered_results = []
-    for product in results:
-        match = True
-        
-        # Category filter
-        if "category" in filters and filters["category"]:
-            if product.get("category", "").lower() != filters["category"].lower():
-                match = False
-        
-        # Price filters
-        if match and "max_price" in filters:
-            if product.get("price", 0) > filters["max_price"]:
-                match = False
-        
-        if match and "min_price" in filters:
-            if product.get("price", 0) < filters["min_price"]:
-                match = False
-                
-        # Attribute filters (e.g., color)
-        if match and "color" in filters and filters["color"]:
-            prod_color = product.get("attributes", {}).get("color", "").lower()
-            if filters["color"].lower() not in prod_color:
-                match = False
-
-        # Search filter
-        if match and "search" in filters and filters["search"]:
-            query = filters["search"].lower()
-            name = product.get("name", "").lower()
-            desc = product.get("description", "").lower()
-            if query not in name and query not in desc:
-                match = False
-        
-        if match:
-            filtered_results.append(product)
-            
-    return filtered_results
+    return _get_query_index().execute(filters, limit=limit, offset=offset, count_only=count_only)
 
 def get_product_by_id(product_id: str) -> Optional[Dict[str, Any]]:
-    for p in PRODUCTS:
-        if p["id"] == product_id:
-            return p
-    return None
+    return catalog.get(product_id)
 
 def create_order(items: List[Dict[str, Any]]) -> Dict[str, Any]:
     """
@@ -130,20 +112,14 @@ def create_order(items: List[Dict[str, Any]]) -> Dict[str, Any]:
 
 def get_last_order() -> Optional[Dict[str, Any]]:
     """
-    Retrieves the most recently created order from the orders directory.
-    This is a simple implementation that looks at file timestamps.
+    Retrieves the most recently created order from the order store.
     """
     try:
-        files = list(Path(order_manager.orders_dir).glob("*.json"))
-        if not files:
-            return None
-        
-        # Sort by modification time, newest first
-        files.sort(key=lambda x: x.stat().st_mtime, reverse=True)
-        
-        last_order_file = files[0]
-        with open(last_order_file, "r") as f:
-            return json.load(f)
+        return order_manager.get_last_order()
     except Exception as e:
         logger.error(f"Error getting last order: {e}")
         return None
+
+def get_customer_orders(customer_id: str, limit: int = 10) -> List[Dict[str, Any]]:
+    """Order history for a customer, newest first."""
+    return order_manager.get_customer_orders(customer_id, limit)
@@ -0,0 +1,128 @@
+"""
+Collision-free, time-sortable order IDs (ULID/snowflake style).
+
+An ID packs 80 bits into 16 Crockford base32 characters:
+
+    48 bits  milliseconds since the Unix epoch
+    10 bits  worker id (one per agent process)
+    22 bits  per-process sequence
+
+Fixed width and an ASCII-ordered alphabet mean IDs sort lexicographically by
+creation time, so "latest order" becomes a max/range scan over IDs. Within a
+millisecond the sequence starts at a random value in its lower half and
+counts up, so it cannot wrap; should a process ever issue the remaining 2M+
+IDs in one millisecond, it moves on to the next millisecond instead.
+
+Set ORDER_WORKER_ID (0-1023) per agent process to guarantee uniqueness across
+processes. Otherwise it is derived from a hash of the hostname and pid, which
+can collide: with 10 processes the chance that two share a worker id is about
+4%. Two such processes only produce the same ID if both create one in the
+same millisecond from the same random sequence start (about 1 in 2 million).
+"""
+import os
+import random
+import socket
+import threading
+import time
+import zlib
+from datetime import datetime
+from typing import Optional, Tuple
+
+CROCKFORD_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+ID_LENGTH = 16
+
+WORKER_BITS = 10
+SEQUENCE_BITS = 22
+WORKER_MASK = (1 << WORKER_BITS) - 1
+SEQUENCE_MASK = (1 << SEQUENCE_BITS) - 1
+TIMESTAMP_SHIFT = WORKER_BITS + SEQUENCE_BITS
+
+
+def default_worker_id() -> int:
+    env_id = os.getenv("ORDER_WORKER_ID")
+    if env_id is not None:
+        return int(env_id) & WORKER_MASK
+    return zlib.crc32(f"{socket.gethostname()}:{os.getpid()}".encode()) & WORKER_MASK
+
+
+def _encode(value: int) -> str:
+    chars = []
+    for _ in range(ID_LENGTH):
+        chars.append(CROCKFORD_ALPHABET[value & 31])
+        value >>= 5
+    return "".join(reversed(chars))
+
+
+def _decode(encoded: str) -> int:
+    value = 0
+    for char in encoded.upper():
+        value = (value << 5) | CROCKFORD_ALPHABET.index(char)
+    return value
+
+
+class OrderIdGenerator:
+    def __init__(self, worker_id: Optional[int] = None):
+        self._fixed_worker_id = worker_id
+        self._reset()
+        if hasattr(os, "register_at_fork"):
+            # Forked agent processes must not reuse the parent's worker id / sequence.
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        if self._fixed_worker_id is not None:
+            self.worker_id = self._fixed_worker_id & WORKER_MASK
+        else:
+            self.worker_id = default_worker_id()
+        self._lock = threading.Lock()
+        self._sequence = 0
+        self._last_ms = 0
+
+    def new_id(self, prefix: str = "") -> str:
+        with self._lock:
+            # Never step backwards if the wall clock is adjusted.
+            now_ms = max(int(time.time() * 1000), self._last_ms)
+            if now_ms == self._last_ms:
+                self._sequence += 1
+                if self._sequence > SEQUENCE_MASK:
+                    now_ms += 1
+                    self._sequence = random.getrandbits(SEQUENCE_BITS - 1)
+            else:
+                # Random start so two processes that share a worker id rarely share a sequence.
+                self._sequence = random.getrandbits(SEQUENCE_BITS - 1)
+            self._last_ms = now_ms
+            value = (now_ms << TIMESTAMP_SHIFT) | (self.worker_id << SEQUENCE_BITS) | self._sequence
+        return prefix + _encode(value)
+
+
+def is_sortable_id(order_id: str, prefix: str = "") -> bool:
+    body = order_id[len(prefix):] if order_id.startswith(prefix) else None
+    return (
+        body is not None
+        and len(body) == ID_LENGTH
+        and all(c in CROCKFORD_ALPHABET for c in body.upper())
+    )
+
+
+def parse_id(order_id: str, prefix: str = "") -> Tuple[int, int, int]:
+    """(milliseconds since the epoch, worker id, sequence) packed into an ID."""
+    if not is_sortable_id(order_id, prefix):
+        raise ValueError(f"Not a time-sortable order id: {order_id!r}")
+    value = _decode(order_id[len(prefix):])
+    return value >> TIMESTAMP_SHIFT, (value >> SEQUENCE_BITS) & WORKER_MASK, value & SEQUENCE_MASK
+
+
+def id_timestamp(order_id: str, prefix: str = "") -> datetime:
+    """Creation time encoded in an ID."""
+    return datetime.fromtimestamp(parse_id(order_id, prefix)[0] / 1000)
+
+
+def id_lower_bound(since: datetime, prefix: str = "") -> str:
+    """Smallest possible ID created at or after `since`, for range scans."""
+    return prefix + _encode(int(since.timestamp() * 1000) << TIMESTAMP_SHIFT)
+
+
+# Shared per-process generator
+generator = OrderIdGenerator()
+
+def new_order_id(prefix: str = "") -> str:
+    return generator.new_id(prefix)
@@ -0,0 +1,309 @@
+"""
+Append-only JSON-lines order store.
+
+Each checkout appends one line with a single O_APPEND write, so the cost of
+placing an order does not grow with the order history and concurrent
+sessions never overwrite each other. fsync is batched, the newest order is
+served from an in-memory tail index, and the log is compacted periodically
+(later records for the same order id supersede earlier ones, torn lines from
+crashes are dropped).
+
+One-shot migration from the old pretty-printed orders.json:
+    python -m src.order_log migrate orders.json orders.jsonl
+"""
+import json
+import logging
+import os
+import shutil
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: rely on O_APPEND atomicity only
+    fcntl = None
+
+logger = logging.getLogger("order-log")
+
+TAIL_BLOCK_SIZE = 4096
+
+
+class OrderLog:
+    """Append-only order log with batched fsync, tail index and compaction."""
+
+    def __init__(
+        self,
+        path: str,
+        fsync_every: int = 32,
+        fsync_interval: float = 1.0,
+        compact_every: int = 10_000,
+    ):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.compact_every = compact_every
+
+        self._lock = threading.Lock()
+        self._fd: Optional[int] = None
+        self._inode: Optional[int] = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._appends_since_compaction = 0
+        self._compacting = False
+        # (file size at which `record` was the last line, record)
+        self._tail: Optional[tuple] = None
+
+    # -- file handling -----------------------------------------------------
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool = False):
+        """Cross-process lock: appends share it, compaction takes it exclusively."""
+        if fcntl is None:
+            yield
+            return
+        with open(self.path + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _ensure_fd(self) -> int:
+        """Open (or reopen after another process compacted) the log for appending."""
+        try:
+            current_inode = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            current_inode = None
+        if self._fd is None or current_inode != self._inode:
+            self._close_fd()
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            self._inode = os.fstat(self._fd).st_ino
+        return self._fd
+
+    def _close_fd(self):
+        if self._fd is not None:
+            try:
+                os.fsync(self._fd)
+            except OSError:
+                pass
+            os.close(self._fd)
+            self._fd = None
+
+    # -- writes --------------------------------------------------------------
+
+    def append(self, record: Dict) -> None:
+        """Append one record. Only this line is written, whatever the log size."""
+        line = (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+        with self._lock:
+            with self._file_lock():
+                fd = self._ensure_fd()
+                os.write(fd, line)
+                # With O_APPEND the offset now sits right after our line.
+                self._tail = (os.lseek(fd, 0, os.SEEK_CUR), record)
+            self._unsynced += 1
+            self._appends_since_compaction += 1
+            if (
+                self._unsynced >= self.fsync_every
+                or time.monotonic() - self._last_sync >= self.fsync_interval
+            ):
+                self._sync()
+            should_compact = (
+                self.compact_every
+                and self._appends_since_compaction >= self.compact_every
+                and not self._compacting
+            )
+            if should_compact:
+                self._compacting = True
+        if should_compact:
+            threading.Thread(target=self._background_compact, daemon=True).start()
+
+    def _sync(self):
+        if self._fd is not None and self._unsynced:
+            os.fsync(self._fd)
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def flush(self):
+        """Force pending appends to disk."""
+        with self._lock:
+            self._sync()
+
+    def close(self):
+        with self._lock:
+            self._close_fd()
+            self._unsynced = 0
+
+    # -- reads -------------------------------------------------------------
+
+    def last(self) -> Optional[Dict]:
+        """Most recent record, from the tail index when the file has not grown since."""
+        try:
+            size = os.stat(self.path).st_size
+        except FileNotFoundError:
+            return None
+        tail = self._tail
+        if tail is not None and tail[0] == size:
+            return tail[1]
+        size, record = self._read_tail()
+        self._tail = (size, record) if record is not None else None
+        return record
+
+    def _read_tail(self):
+        """Scan backwards from the end for the last complete, parseable line."""
+        with open(self.path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            end = f.tell()
+            pos = end
+            partial = b""
+            while pos > 0:
+                read = min(TAIL_BLOCK_SIZE, pos)
+                pos -= read
+                f.seek(pos)
+                lines = (f.read(read) + partial).split(b"\n")
+                # The first piece may be cut mid-line unless we reached the start.
+                partial = lines.pop(0) if pos > 0 else b""
+                for line in reversed(lines):
+                    if not line.strip():
+                        continue
+                    try:
+                        return end, json.loads(line)
+                    except ValueError:
+                        continue  # torn write
+        return end, None
+
+    def __iter__(self) -> Iterator[Dict]:
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    logger.warning("Skipping corrupt line in order log")
+
+    def read_all(self) -> List[Dict]:
+        return list(self)
+
+    # -- maintenance -------------------------------------------------------
+
+    def _background_compact(self):
+        try:
+            self.compact()
+        except Exception as e:
+            logger.error(f"Order log compaction failed: {e}")
+        finally:
+            self._compacting = False
+
+    def compact(self) -> int:
+        """
+        Rewrite the log keeping only the latest record per order id, in the
+        order those records were written. The bulk of the rewrite runs without
+        blocking appenders; only the final swap holds the locks. Returns the
+        number of records written.
+        """
+        with self._lock, self._file_lock(exclusive=True):
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                return 0
+            size, inode = stat.st_size, stat.st_ino
+
+        # Pass 1 remembers only where each order id was last written, so
+        # memory grows with the number of orders, not the size of the log.
+        last_offset: Dict[str, int] = {}
+        for offset, line in self._lines(size):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # torn write from a crash
+            last_offset[record.get("id")] = offset
+        keep = set(last_offset.values())
+
+        tmp_path = f"{self.path}.compact.{os.getpid()}"
+        with open(tmp_path, "wb") as out:
+            # Pass 2 copies those lines through unchanged, in log order.
+            for offset, line in self._lines(size):
+                if offset in keep:
+                    out.write(line.rstrip(b"\n") + b"\n")
+
+            with self._lock, self._file_lock(exclusive=True):
+                if os.stat(self.path).st_ino != inode:
+                    # Another process compacted first; keep its result.
+                    out.close()
+                    os.remove(tmp_path)
+                    return len(keep)
+                # Carry over whatever was appended while we were rewriting.
+                with open(self.path, "rb") as f:
+                    f.seek(size)
+                    shutil.copyfileobj(f, out)
+                out.flush()
+                os.fsync(out.fileno())
+                os.replace(tmp_path, self.path)
+                self._close_fd()
+                self._tail = None
+                self._appends_since_compaction = 0
+
+        logger.info(f"Compacted order log to {len(keep)} records")
+        return len(keep)
+
+    def _lines(self, size: int) -> Iterator[tuple]:
+        """(offset, line) for the non-blank lines in the first `size` bytes, streamed."""
+        with open(self.path, "rb") as f:
+            offset = 0
+            while offset < size:
+                line = f.readline(size - offset)
+                if not line:
+                    break
+                if line.strip():
+                    yield offset, line
+                offset += len(line)
+
+    def seed(self, records: List[Dict]) -> int:
+        """
+        Write `records` into a log that does not exist yet (legacy migration).
+        Holds the cross-process lock exclusively, so when several processes
+        start at once only the first imports; the others write nothing and
+        get 0.
+        """
+        data = b"".join((json.dumps(r, separators=(",", ":")) + "\n").encode("utf-8") for r in records)
+        with self._lock, self._file_lock(exclusive=True):
+            if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+                return 0
+            fd = self._ensure_fd()
+            os.write(fd, data)
+            os.fsync(fd)
+            self._tail = None
+        return len(records)
+
+
+def migrate_json_orders(json_path: str, log: OrderLog) -> int:
+    """One-shot import of a legacy orders.json list into a new log. Returns the count (0 if the log already existed)."""
+    try:
+        with open(json_path, "r") as f:
+            orders = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return 0
+    migrated = log.seed(orders)
+    if migrated:
+        logger.info(f"Migrated {migrated} orders from {json_path} to {log.path}")
+    return migrated
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) == 4 and sys.argv[1] == "migrate":
+        migrated = migrate_json_orders(sys.argv[2], OrderLog(sys.argv[3]))
+        print(f"Migrated {migrated} orders")
+    elif len(sys.argv) == 3 and sys.argv[1] == "compact":
+        print(f"Kept {OrderLog(sys.argv[2]).compact()} orders")
+    else:
+        print("Usage: python -m src.order_log migrate <orders.json> <orders.jsonl>")
+        print("       python -m src.order_log compact <orders.jsonl>")
+        sys.exit(1)
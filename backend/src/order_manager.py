@@ -1,20 +1,40 @@
-import json
 import os
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from .cart import Cart
+from .order_ids import new_order_id
+from .order_store import FileOrderStore, SQLiteOrderStore, import_orders_dir
+
+# "sqlite" (default) or "file" for the legacy one-JSON-file-per-order layout
+ORDER_STORE_BACKEND = os.getenv("ORDER_STORE_BACKEND", "sqlite")
+ORDER_ID_PREFIX = "ORD-"
 
 class OrderManager:
-    def __init__(self, orders_dir: str = "orders"):
+    def __init__(self, orders_dir: str = "orders", backend: Optional[str] = None, store=None):
         self.orders_dir = orders_dir
         os.makedirs(self.orders_dir, exist_ok=True)
+        self.store = store or self._open_store(backend or ORDER_STORE_BACKEND)
+
+    def _open_store(self, backend: str):
+        if backend == "file":
+            return FileOrderStore(self.orders_dir)
+        if backend != "sqlite":
+            raise ValueError(f"Unknown order store backend: {backend}")
+
+        db_path = os.path.join(self.orders_dir, "orders.db")
+        is_new = not os.path.exists(db_path)
+        store = SQLiteOrderStore(db_path)
+        if is_new:
+            # Pick up orders written by the file backend before the switch.
+            import_orders_dir(self.orders_dir, store)
+        return store
 
     def place_order(self, cart: Cart, customer_info: Dict[str, Any] = None) -> str:
         if not cart.items:
             raise ValueError("Cart is empty")
 
         order_data = {
-            "order_id": f"ORD-{int(datetime.now().timestamp())}",
+            "order_id": new_order_id(ORDER_ID_PREFIX),
             "timestamp": datetime.now().isoformat(),
             "customer_info": customer_info or {},
             "items": cart.to_dict()["items"],
@@ -22,15 +42,16 @@ class OrderManager:
             "status": "placed"
         }
 
-        filename = f"{self.orders_dir}/{order_data['order_id']}.json"
-        with open(filename, "w") as f:
-            json.dump(order_data, f, indent=2)
-        
+        self.store.save(order_data)
+
         return order_data["order_id"]
 
     def get_order(self, order_id: str) -> Dict[str, Any]:
-        filename = f"{self.orders_dir}/{order_id}.json"
-        if os.path.exists(filename):
-            with open(filename, "r") as f:
-                return json.load(f)
-        return None
+        return self.store.get(order_id)
+
+    def get_last_order(self) -> Optional[Dict[str, Any]]:
+        return self.store.get_last()
+
+    def get_customer_orders(self, customer_id: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Most recent orders for a customer (matched on id, email, phone or name)."""
+        return self.store.get_customer_orders(customer_id, limit)
@@ -0,0 +1,257 @@
+"""
+Storage backends for OrderManager.
+
+- FileOrderStore: the original one-JSON-file-per-order layout in `orders/`.
+- SQLiteOrderStore: a single WAL-mode database with indexes on timestamp and
+  customer, so latest-order, by-id and per-customer lookups are index seeks
+  rather than directory scans.
+
+Bulk import of an existing orders directory:
+    python -m src.order_store import orders/ orders/orders.db
+"""
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .order_ids import is_sortable_id
+
+try:
+    import fcntl
+except ImportError:  # Windows: the pointer is only serialized within the process
+    fcntl = None
+
+logger = logging.getLogger("order-store")
+
+
+def customer_key(customer_info: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Stable customer identifier taken from an order's customer_info."""
+    if not customer_info:
+        return None
+    for field in ("customer_id", "email", "phone", "name"):
+        value = customer_info.get(field)
+        if value:
+            return str(value).strip().lower()
+    return None
+
+
+class FileOrderStore:
+    """One JSON file per order. Kept for compatibility with existing `orders/` dirs.
+
+    The id of the newest order is kept in a small pointer file, so `get_last`
+    reads two files instead of listing the directory. Workers update it under
+    an flock (as order_log does), comparing before they replace it.
+    """
+
+    LATEST_POINTER = ".latest"
+
+    def __init__(self, orders_dir: str = "orders"):
+        self.orders_dir = orders_dir
+        os.makedirs(self.orders_dir, exist_ok=True)
+        self._pointer_path = os.path.join(self.orders_dir, self.LATEST_POINTER)
+        self._pointer_lock = threading.Lock()
+
+    def save(self, order: Dict[str, Any]) -> None:
+        filename = f"{self.orders_dir}/{order['order_id']}.json"
+        with open(filename, "w") as f:
+            json.dump(order, f, indent=2)
+        self._advance_latest(order["order_id"], order.get("timestamp"))
+
+    def get(self, order_id: str) -> Optional[Dict[str, Any]]:
+        filename = f"{self.orders_dir}/{order_id}.json"
+        if os.path.exists(filename):
+            with open(filename, "r") as f:
+                return json.load(f)
+        return None
+
+    def get_last(self) -> Optional[Dict[str, Any]]:
+        order_id = self._read_latest()
+        if order_id:
+            order = self.get(order_id)
+            if order is not None:
+                return order
+        # No pointer yet (a directory written before it existed): scan once and record it
+        newest = self._scan_newest()
+        if newest is None:
+            return None
+        with open(newest, "r") as f:
+            order = json.load(f)
+        self._advance_latest(newest.stem, order.get("timestamp"))
+        return order
+
+    def _read_latest(self) -> Optional[str]:
+        try:
+            with open(self._pointer_path, "r") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    @contextmanager
+    def _pointer_file_lock(self):
+        """Cross-process lock around reading and replacing the pointer."""
+        if fcntl is None:
+            yield
+            return
+        with open(self._pointer_path + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _is_newer(self, current: str, order_id: str, timestamp: Optional[str]) -> bool:
+        """Whether the pointer's `current` order is newer than `order_id`."""
+        if is_sortable_id(current, "ORD-") and is_sortable_id(order_id, "ORD-"):
+            return current > order_id
+        # Legacy IDs: compare the orders' ISO timestamps when both have one
+        current_order = self.get(current)
+        current_timestamp = current_order.get("timestamp") if current_order else None
+        return bool(current_timestamp and timestamp and current_timestamp > timestamp)
+
+    def _advance_latest(self, order_id: str, timestamp: Optional[str] = None) -> None:
+        with self._pointer_lock, self._pointer_file_lock():
+            current = self._read_latest()
+            # Never let a slower writer (thread or worker process) move the pointer backwards
+            if current and current != order_id and self._is_newer(current, order_id, timestamp):
+                return
+            tmp_path = f"{self._pointer_path}.{os.getpid()}.{threading.get_ident()}"
+            with open(tmp_path, "w") as f:
+                f.write(order_id)
+            os.replace(tmp_path, self._pointer_path)
+
+    def _scan_newest(self) -> Optional[Path]:
+        files = list(Path(self.orders_dir).glob("*.json"))
+        if not files:
+            return None
+        # Time-sortable IDs: the newest order is simply the largest filename.
+        sortable = [f for f in files if is_sortable_id(f.stem, "ORD-")]
+        if sortable:
+            return max(sortable, key=lambda x: x.stem)
+        # Legacy timestamp IDs: fall back to modification time
+        return max(files, key=lambda x: x.stat().st_mtime)
+
+    def get_customer_orders(self, customer_id: str, limit: int = 10) -> List[Dict[str, Any]]:
+        key = customer_id.strip().lower()
+        orders = []
+        for path in Path(self.orders_dir).glob("*.json"):
+            with open(path, "r") as f:
+                order = json.load(f)
+            if customer_key(order.get("customer_info")) == key:
+                orders.append(order)
+        orders.sort(key=lambda o: o.get("timestamp", ""), reverse=True)
+        return orders[:limit]
+
+
+class SQLiteOrderStore:
+    """Orders in one SQLite database (WAL mode), indexed by timestamp and customer."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS orders (
+                order_id TEXT PRIMARY KEY,
+                timestamp TEXT NOT NULL,
+                customer_id TEXT,
+                total REAL,
+                status TEXT,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_orders_timestamp ON orders (timestamp);
+            CREATE INDEX IF NOT EXISTS idx_orders_customer ON orders (customer_id, timestamp);
+        """)
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread; WAL lets readers run alongside the writer.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _row(order: Dict[str, Any]) -> tuple:
+        return (
+            order["order_id"],
+            order.get("timestamp", ""),
+            customer_key(order.get("customer_info")),
+            order.get("total"),
+            order.get("status"),
+            json.dumps(order),
+        )
+
+    def save(self, order: Dict[str, Any]) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO orders VALUES (?, ?, ?, ?, ?, ?)", self._row(order))
+
+    def save_many(self, orders: List[Dict[str, Any]]) -> int:
+        conn = self._conn()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO orders VALUES (?, ?, ?, ?, ?, ?)",
+                [self._row(o) for o in orders],
+            )
+        return len(orders)
+
+    def get(self, order_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute(
+            "SELECT data FROM orders WHERE order_id = ?", (order_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_last(self) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute(
+            "SELECT data FROM orders ORDER BY timestamp DESC, rowid DESC LIMIT 1"
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_customer_orders(self, customer_id: str, limit: int = 10) -> List[Dict[str, Any]]:
+        rows = self._conn().execute(
+            "SELECT data FROM orders WHERE customer_id = ? ORDER BY timestamp DESC LIMIT ?",
+            (customer_id.strip().lower(), limit),
+        ).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM orders").fetchone()[0]
+
+
+def import_orders_dir(orders_dir: str, store: SQLiteOrderStore, batch_size: int = 1000) -> int:
+    """Bulk-load every `*.json` order file from `orders_dir` into `store`."""
+    imported = 0
+    batch = []
+    for path in sorted(Path(orders_dir).glob("*.json")):
+        try:
+            with open(path, "r") as f:
+                order = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Skipping {path}: {e}")
+            continue
+        if "order_id" not in order:
+            order["order_id"] = path.stem
+        batch.append(order)
+        if len(batch) >= batch_size:
+            imported += store.save_many(batch)
+            batch = []
+    if batch:
+        imported += store.save_many(batch)
+    logger.info(f"Imported {imported} orders from {orders_dir}")
+    return imported
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) != 4 or sys.argv[1] != "import":
+        print("Usage: python -m src.order_store import <orders_dir> <orders.db>")
+        sys.exit(1)
+    count = import_orders_dir(sys.argv[2], SQLiteOrderStore(sys.argv[3]))
+    print(f"Imported {count} orders")
@@ -0,0 +1,135 @@
+"""
+Session-scoped user preferences for NOVA.
+
+Each caller gets their own preference set, keyed by the room, so one caller
+saying "I'm vegan" no longer filters dairy for everyone else on the worker.
+Sessions live in an LRU with a sliding TTL. Only keys built by `customer_key`
+from a stable customer id are persisted: if a SQLite path is given, those are
+written through on update and read back only on a cache miss, so returning
+customers warm-start with their diet and likes without a lookup per turn.
+Room keys stay in memory; participant identities are random per connection,
+so persisting under them would never warm-start anyone and would hand one
+caller's diet to whoever draws the same identity next.
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger("preferences")
+
+PREFERENCE_KEYS = ("diet", "likes")
+CUSTOMER_PREFIX = "customer:"
+
+
+def customer_key(customer_id: str) -> str:
+    """Preference key for a stable customer id; the only keys written to SQLite."""
+    return f"{CUSTOMER_PREFIX}{customer_id}"
+
+
+def _persistent(session_id: str) -> bool:
+    return session_id.startswith(CUSTOMER_PREFIX)
+
+
+def _empty_preferences() -> Dict[str, List[str]]:
+    return {key: [] for key in PREFERENCE_KEYS}
+
+
+class SessionPreferenceStore:
+    def __init__(self, max_sessions: int = 1000, ttl_seconds: float = 3600.0, db_path: Optional[str] = None):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._sessions: "OrderedDict[str, Tuple[float, Dict[str, List[str]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS preferences (
+                    session_id TEXT PRIMARY KEY,
+                    data TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            self._db.commit()
+
+    def _load(self, session_id: str) -> Dict[str, List[str]]:
+        prefs = _empty_preferences()
+        if self._db is None or not _persistent(session_id):
+            return prefs
+        row = self._db.execute("SELECT data FROM preferences WHERE session_id = ?", (session_id,)).fetchone()
+        if row:
+            for key, values in json.loads(row[0]).items():
+                if key in prefs:
+                    prefs[key] = list(values)
+        return prefs
+
+    def _persist(self, session_id: str, prefs: Dict[str, List[str]]):
+        if self._db is None or not _persistent(session_id):
+            return
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO preferences (session_id, data, updated_at) VALUES (?, ?, ?)",
+                (session_id, json.dumps(prefs), time.time()),
+            )
+
+    def _get_locked(self, session_id: str) -> Dict[str, List[str]]:
+        now = time.monotonic()
+        entry = self._sessions.get(session_id)
+        if entry is not None and now - entry[0] < self.ttl_seconds:
+            prefs = entry[1]
+        else:
+            prefs = self._load(session_id)
+        self._sessions[session_id] = (now, prefs)
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        return prefs
+
+    def get(self, session_id: str) -> Dict[str, List[str]]:
+        """A copy of a session's preferences (loaded from SQLite on a cache miss); change them with `update`."""
+        with self._lock:
+            return {key: list(values) for key, values in self._get_locked(session_id).items()}
+
+    def update(self, session_id: str, key: str, value: str) -> bool:
+        """Add `value` under `key`. Returns False for unknown preference keys."""
+        if key not in PREFERENCE_KEYS:
+            return False
+        with self._lock:
+            prefs = self._get_locked(session_id)
+            if value not in prefs[key]:
+                prefs[key].append(value)
+                self._persist(session_id, prefs)
+        return True
+
+    def rekey(self, old_session_id: str, new_session_id: str):
+        """Move preferences gathered under a provisional key (e.g. the room) to the caller's `customer_key`."""
+        if old_session_id == new_session_id:
+            return
+        with self._lock:
+            entry = self._sessions.pop(old_session_id, None)
+            # An entry that already left the cache is still in SQLite
+            old_prefs = entry[1] if entry is not None else self._load(old_session_id)
+            prefs = self._get_locked(new_session_id)
+            moved = False
+            for key, values in old_prefs.items():
+                for value in values:
+                    if value not in prefs[key]:
+                        prefs[key].append(value)
+                        moved = True
+            if moved:
+                self._persist(new_session_id, prefs)
+            if self._db is not None and _persistent(old_session_id):
+                with self._db:
+                    self._db.execute("DELETE FROM preferences WHERE session_id = ?", (old_session_id,))
+
+    def clear(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            if self._db is not None and _persistent(session_id):
+                with self._db:
+                    self._db.execute("DELETE FROM preferences WHERE session_id = ?", (session_id,))
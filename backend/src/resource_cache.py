@@ -0,0 +1,67 @@
+"""
+Small persistent cache for resolved remote resource IDs.
+
+MCPIntegration used to look up its Notion database and Todoist project on
+every write (retrieve/search/list all projects) and rewrote .env.local when it
+created one. Resolved IDs now live here with a TTL: within the TTL they are
+trusted without a round trip, and callers invalidate an entry when the API
+answers 404. Entries are kept in a small JSON state file, written atomically,
+so a restarted worker starts warm.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+logger = logging.getLogger("resource-cache")
+
+
+class ResourceCache:
+    def __init__(self, state_path: Optional[Union[str, Path]] = None, ttl_seconds: float = 24 * 3600):
+        self.state_path = Path(state_path) if state_path else None
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # key -> (resource id, epoch seconds when it was resolved)
+        self._entries: Dict[str, Tuple[str, float]] = self._load()
+
+    def _load(self) -> Dict[str, Tuple[str, float]]:
+        if self.state_path is None or not self.state_path.exists():
+            return {}
+        try:
+            with open(self.state_path, "r") as f:
+                data = json.load(f)
+            return {key: (entry["id"], entry["resolved_at"]) for key, entry in data.items()}
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable state file {self.state_path}: {e}")
+            return {}
+
+    def _save_locked(self):
+        if self.state_path is None:
+            return
+        data = {key: {"id": rid, "resolved_at": at} for key, (rid, at) in self._entries.items()}
+        tmp_path = self.state_path.with_name(f"{self.state_path.name}.tmp.{os.getpid()}")
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def get(self, key: str) -> Optional[str]:
+        """The cached ID, or None if missing or older than the TTL."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or time.time() - entry[1] >= self.ttl_seconds:
+            return None
+        return entry[0]
+
+    def set(self, key: str, resource_id: str):
+        with self._lock:
+            self._entries[key] = (resource_id, time.time())
+            self._save_locked()
+
+    def invalidate(self, key: str):
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._save_locked()
+                logger.info(f"Invalidated cached {key}")
@@ -0,0 +1,109 @@
+"""
+Batched Jaccard scoring over a sparse product x tag matrix.
+
+The catalog's tag sets are encoded once as a CSR matrix (indptr/indices over a
+tag vocabulary) with precomputed row sizes, plus the transposed CSC layout as
+inverted postings (tag -> rows carrying it). A query gathers its candidate rows
+from the postings and scores only those in one NumPy pass, so search cost grows
+with the number of matches rather than the catalog size.
+"""
+from typing import Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+
+class TagMatrix:
+    """CSR-encoded product x tag incidence matrix."""
+
+    def __init__(self, tag_sets: Iterable[Iterable[str]]):
+        self.vocabulary = {}
+        indptr = [0]
+        indices: List[int] = []
+        for tags in tag_sets:
+            for tag in tags:
+                indices.append(self.vocabulary.setdefault(tag, len(self.vocabulary)))
+            indptr.append(len(indices))
+
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.row_sizes = np.diff(self.indptr)
+        self.n_rows = len(self.row_sizes)
+
+        # Inverted postings: rows of column c are posting_rows[posting_ptr[c]:posting_ptr[c + 1]],
+        # ascending (stable sort of the row-major entries by column)
+        order = np.argsort(self.indices, kind="stable")
+        self.posting_rows = np.repeat(np.arange(self.n_rows, dtype=np.int64), self.row_sizes)[order]
+        self.posting_ptr = np.zeros(len(self.vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.indices, minlength=len(self.vocabulary)), out=self.posting_ptr[1:])
+
+    def postings(self, tag: str) -> np.ndarray:
+        """Rows carrying `tag`, ascending."""
+        col = self.vocabulary.get(tag)
+        if col is None:
+            return self.posting_rows[:0]
+        return self.posting_rows[self.posting_ptr[col]:self.posting_ptr[col + 1]]
+
+    def score_candidates(
+        self, query_tokens: Set[str], extra_rows: Iterable[int] = ()
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Rows sharing a tag with the query, plus `extra_rows`, in ascending order,
+        with their Jaccard index (0 for extra rows without overlap). Only the
+        postings of the query's tags are read.
+        """
+        lists = [self.postings(t) for t in query_tokens]
+        hits = np.concatenate(lists) if lists else self.posting_rows[:0]
+        # A row appears once per query tag it carries, so its count is |query & tags|
+        rows, inter = np.unique(hits, return_counts=True)
+        extra = np.fromiter(extra_rows, dtype=np.int64)
+        if len(extra):
+            all_rows = np.union1d(rows, extra)
+            counts = np.zeros(len(all_rows), dtype=np.int64)
+            counts[np.searchsorted(all_rows, rows)] = inter
+            rows, inter = all_rows, counts
+        scores = np.zeros(len(rows), dtype=np.float64)
+        overlap = inter > 0
+        union = len(query_tokens) + self.row_sizes[rows[overlap]] - inter[overlap]
+        scores[overlap] = inter[overlap] / union
+        return rows, scores
+
+    def intersections(self, query_tokens: Set[str]) -> np.ndarray:
+        """|query & tags| for every row, as the sparse dot product M @ q."""
+        counts = np.zeros(self.n_rows, dtype=np.int64)
+        q = np.zeros(len(self.vocabulary), dtype=np.int64)
+        hits = [self.vocabulary[t] for t in query_tokens if t in self.vocabulary]
+        if not hits or not len(self.indices):
+            return counts
+        q[hits] = 1
+        non_empty = self.row_sizes > 0
+        # reduceat sums q over each row's slice of `indices`; empty rows are masked out.
+        sums = np.add.reduceat(q[self.indices], self.indptr[:-1][non_empty])
+        counts[non_empty] = sums
+        return counts
+
+    def jaccard(self, query_tokens: Set[str]) -> np.ndarray:
+        """Jaccard index of the query against every row (0 where there is no overlap)."""
+        inter = self.intersections(query_tokens)
+        union = len(query_tokens) + self.row_sizes - inter
+        scores = np.zeros(self.n_rows, dtype=np.float64)
+        overlap = inter > 0
+        scores[overlap] = inter[overlap] / union[overlap]
+        return scores
+
+
+def rank(scores: np.ndarray, threshold: float = 0.1, top_k: Optional[int] = None) -> np.ndarray:
+    """
+    Row indices with score > threshold, best first. Ties keep catalog order,
+    matching a stable descending sort. With `top_k`, argpartition selects the
+    best rows without sorting the whole catalog.
+    """
+    passing = np.flatnonzero(scores > threshold)
+    if top_k is not None and top_k < len(passing):
+        if top_k <= 0:
+            return passing[:0]
+        passing_scores = scores[passing]
+        kth = passing_scores[np.argpartition(-passing_scores, top_k - 1)[top_k - 1]]
+        above = passing[passing_scores > kth]
+        ties = passing[passing_scores == kth][: top_k - len(above)]
+        passing = np.sort(np.concatenate([above, ties]))
+    return passing[np.argsort(-scores[passing], kind="stable")]
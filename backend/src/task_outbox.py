@@ -0,0 +1,273 @@
+"""
+Durable outbox for Todoist task creation.
+
+Creating one task per goal over REST put several upstream round trips, and
+any Todoist slowness, inside the user's turn. Goals are now written to a local
+SQLite outbox (a millisecond insert), the agent confirms straight away, and a
+background worker drains the outbox through Todoist's sync endpoint, many
+`item_add` commands per request.
+
+SQLite work runs on worker threads (`asyncio.to_thread`), so neither
+enqueueing nor the drain's bookkeeping commits block the event loop. The
+owner starts the worker when it connects, so rows left pending by a crash or
+restart are retried without waiting for the next enqueue.
+
+Each row gets its command uuid and temp_id when it is enqueued, and retries
+resend the same ones, so Todoist applies a command at most once even if a
+response is lost. Failed sends back off exponentially with jitter; rows that
+keep failing are parked as 'failed' after `max_attempts`.
+"""
+import asyncio
+import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger("task-outbox")
+
+
+class TaskOutbox:
+    def __init__(
+        self,
+        db_path: str,
+        client,
+        resolve_project: Callable[[str], Awaitable[Optional[str]]],
+        invalidate_project: Optional[Callable[[str], None]] = None,
+        batch_size: int = 50,
+        max_attempts: int = 8,
+        base_backoff: float = 1.0,
+        max_backoff: float = 300.0,
+        poll_interval: float = 30.0,
+    ):
+        self.client = client
+        self.resolve_project = resolve_project
+        self.invalidate_project = invalidate_project
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.poll_interval = poll_interval
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS todoist_outbox (
+                uuid TEXT PRIMARY KEY,
+                temp_id TEXT NOT NULL,
+                content TEXT NOT NULL,
+                project_name TEXT NOT NULL,
+                labels TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL,
+                created_at REAL NOT NULL,
+                task_id TEXT,
+                last_error TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_todoist_outbox_due ON todoist_outbox (status, next_attempt_at);
+        """)
+        self._db.commit()
+
+        self._wakeup: Optional[asyncio.Event] = None
+        self._drain_lock: Optional[asyncio.Lock] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def enqueue(self, goals: List[str], project_name: str, labels: Optional[List[str]] = None) -> List[str]:
+        """Queue one task per goal. Returns the command uuids (usable as provisional task ids)."""
+        command_uuids = self._insert(goals, project_name, labels)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return command_uuids
+
+    async def aenqueue(self, goals: List[str], project_name: str, labels: Optional[List[str]] = None) -> List[str]:
+        """`enqueue` with the insert and commit on a worker thread."""
+        command_uuids = await asyncio.to_thread(self._insert, goals, project_name, labels)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return command_uuids
+
+    def _insert(self, goals: List[str], project_name: str, labels: Optional[List[str]]) -> List[str]:
+        now = time.time()
+        rows = [
+            (str(uuid.uuid4()), str(uuid.uuid4()), goal, project_name, json.dumps(labels or []), now, now)
+            for goal in goals
+        ]
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT INTO todoist_outbox (uuid, temp_id, content, project_name, labels, next_attempt_at, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        return [row[0] for row in rows]
+
+    def get(self, command_uuid: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute("SELECT * FROM todoist_outbox WHERE uuid = ?", (command_uuid,)).fetchone()
+        return dict(row) if row else None
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM todoist_outbox WHERE status = 'pending'").fetchone()[0]
+
+    def _due(self) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._db.execute(
+                "SELECT * FROM todoist_outbox WHERE status = 'pending' AND next_attempt_at <= ?"
+                " ORDER BY created_at LIMIT ?",
+                (time.time(), self.batch_size),
+            ).fetchall()
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.max_backoff, self.base_backoff * (2 ** (attempts - 1)))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _mark_sent(self, sent: Dict[str, str]):
+        with self._lock, self._db:
+            self._db.executemany(
+                "UPDATE todoist_outbox SET status = 'sent', task_id = ?, last_error = NULL WHERE uuid = ?",
+                [(task_id, command_uuid) for command_uuid, task_id in sent.items()],
+            )
+
+    def _mark_failed(self, rows: List[sqlite3.Row], error: str, retry_now: bool = False):
+        now = time.time()
+        updates = []
+        for row in rows:
+            attempts = row["attempts"] + 1
+            status = "failed" if attempts >= self.max_attempts else "pending"
+            next_attempt_at = now if retry_now else now + self._backoff(attempts)
+            updates.append((status, attempts, next_attempt_at, error[:500], row["uuid"]))
+        with self._lock, self._db:
+            self._db.executemany(
+                "UPDATE todoist_outbox SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ? WHERE uuid = ?",
+                updates,
+            )
+        logger.warning(f"Todoist sync failed for {len(rows)} tasks: {error}")
+
+    async def drain_once(self) -> int:
+        """Send one batch of due tasks. Returns how many were sent successfully."""
+        if self._drain_lock is None:
+            self._drain_lock = asyncio.Lock()
+        async with self._drain_lock:
+            return await self._drain_locked()
+
+    async def _drain_locked(self) -> int:
+        rows = await asyncio.to_thread(self._due)
+        if not rows:
+            return 0
+        by_project: Dict[str, List[sqlite3.Row]] = defaultdict(list)
+        for row in rows:
+            by_project[row["project_name"]].append(row)
+
+        commands, command_rows = [], {}
+        for project_name, project_rows in by_project.items():
+            try:
+                project_id = await self.resolve_project(project_name)
+                error = "project could not be resolved"
+            except Exception as e:
+                project_id, error = None, f"{type(e).__name__}: {e}"
+            if not project_id:
+                await asyncio.to_thread(self._mark_failed, project_rows, error)
+                continue
+            for row in project_rows:
+                commands.append({
+                    "type": "item_add",
+                    "uuid": row["uuid"],
+                    "temp_id": row["temp_id"],
+                    "args": {"content": row["content"], "project_id": project_id, "labels": json.loads(row["labels"])},
+                })
+                command_rows[row["uuid"]] = row
+        if not commands:
+            return 0
+
+        try:
+            response = await self.client.sync(commands)
+        except Exception as e:
+            await asyncio.to_thread(self._mark_failed, list(command_rows.values()), f"{type(e).__name__}: {e}")
+            return 0
+
+        statuses = response.get("sync_status", {})
+        mapping = response.get("temp_id_mapping", {})
+        sent, missing_projects = {}, set()
+        failed: Dict[tuple, List[sqlite3.Row]] = defaultdict(list)
+        for command_uuid, row in command_rows.items():
+            status = statuses.get(command_uuid)
+            if status == "ok":
+                sent[command_uuid] = mapping.get(row["temp_id"], row["temp_id"])
+                continue
+            error = status.get("error", "unknown error") if isinstance(status, dict) else "no status returned"
+            # A 404 means the cached project is gone: re-resolve it and retry right away
+            project_missing = isinstance(status, dict) and status.get("http_code") == 404
+            if project_missing:
+                missing_projects.add(row["project_name"])
+            failed[(error, project_missing)].append(row)
+
+        if sent:
+            await asyncio.to_thread(self._mark_sent, sent)
+        for (error, project_missing), failed_rows in failed.items():
+            await asyncio.to_thread(self._mark_failed, failed_rows, error, project_missing)
+        if self.invalidate_project is not None:
+            for project_name in missing_projects:
+                self.invalidate_project(project_name)
+        logger.info(f"Synced {len(sent)}/{len(commands)} Todoist tasks")
+        return len(sent)
+
+    def _next_due_in(self) -> float:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT MIN(next_attempt_at) FROM todoist_outbox WHERE status = 'pending'"
+            ).fetchone()
+        if row[0] is None:
+            return self.poll_interval
+        return max(0.0, min(self.poll_interval, row[0] - time.time()))
+
+    async def _run(self):
+        while True:
+            try:
+                while await self.drain_once():
+                    pass
+            except Exception as e:
+                logger.error(f"Todoist outbox worker error: {e}")
+            self._wakeup.clear()
+            try:
+                next_due_in = await asyncio.to_thread(self._next_due_in)
+            except Exception as e:
+                logger.error(f"Todoist outbox worker error: {e}")
+                next_due_in = self.poll_interval
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=next_due_in)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        """Start the background worker on the running loop (idempotent); it first drains anything already due."""
+        if self._worker is None or self._worker.done():
+            self._wakeup = asyncio.Event()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def flush(self, timeout: float = 30.0):
+        """Send everything pending, waiting out backoff, for up to `timeout` seconds (shutdown, tests)."""
+        deadline = time.monotonic() + timeout
+        while await asyncio.to_thread(self.pending_count) and time.monotonic() < deadline:
+            if not await self.drain_once():
+                next_due_in = await asyncio.to_thread(self._next_due_in)
+                await asyncio.sleep(min(next_due_in, 0.05, max(0.0, deadline - time.monotonic())))
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    def close(self):
+        with self._lock:
+            self._db.close()
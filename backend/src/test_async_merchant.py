@@ -0,0 +1,103 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+from src.async_merchant import (
+    AsyncMerchant,
+    BoundedExecutor,
+    MerchantBusyError,
+    MerchantTimeoutError,
+)
+from src.latency_metrics import MERCHANT_QUEUE, MERCHANT_RUN, LatencyStats, bind_session
+
+
+async def _heartbeat(gaps, stop):
+    # Stands in for the audio streaming sharing the agent's event loop.
+    last = time.monotonic()
+    while not stop.is_set():
+        await asyncio.sleep(0.01)
+        now = time.monotonic()
+        gaps.append(now - last)
+        last = now
+
+
+async def test_async_merchant():
+    print("Testing async merchant facade...")
+    stats = LatencyStats()
+    bind_session(stats)
+
+    # Real catalog search, off the loop
+    real = AsyncMerchant(executor=BoundedExecutor(max_workers=2, max_queue=8))
+    fizzy = await real.list_products("fizzy")
+    assert any("Coca-Cola" in p["name"] for p in fizzy)
+    assert stats.histograms[(MERCHANT_RUN, "list_products")].count == 1
+
+    # A slow order-history rewrite no longer stalls the loop
+    release = threading.Event()
+    placed = []
+
+    def create_order(items):
+        release.wait(2)
+        placed.append(items)
+        return {"id": "BLK-1", "items": items, "total_amount": 99}
+
+    fake = SimpleNamespace(
+        create_order=create_order,
+        get_last_order=lambda: time.sleep(0.3) or {"id": "BLK-0"},
+        list_products=lambda query, limit=None, session_id=None: [],
+        update_user_context=lambda key, value, session_id=None: None,
+    )
+    merchant = AsyncMerchant(fake, BoundedExecutor(max_workers=1, max_queue=2), deadlines={"create_order": 0.2})
+
+    gaps, stop = [], asyncio.Event()
+    heartbeat = asyncio.create_task(_heartbeat(gaps, stop))
+    assert (await merchant.get_last_order())["id"] == "BLK-0"
+
+    # Deadline on a running call: reported as started, and it still completes
+    try:
+        await merchant.create_order([{"product_id": "dairy-001"}])
+    except MerchantTimeoutError as e:
+        print(f"Deadline: {e} (started={e.started})")
+        assert e.started
+    else:
+        raise AssertionError("expected a deadline")
+
+    # The pool is busy: a queued call that misses its deadline is dropped, never run
+    try:
+        await merchant.create_order([{"product_id": "bakery-001"}])
+    except MerchantTimeoutError as e:
+        assert not e.started
+    else:
+        raise AssertionError("expected a deadline")
+
+    # Bounded queue: beyond max_queue, calls fail fast
+    waiting = [asyncio.create_task(merchant.list_products("milk")) for _ in range(2)]
+    await asyncio.sleep(0)
+    try:
+        await merchant.list_products("bread")
+    except MerchantBusyError as e:
+        print(f"Busy: {e}")
+    else:
+        raise AssertionError("expected the queue to be full")
+    print(f"Pool stats while busy: {merchant.stats()}")
+    assert merchant.stats()["queued"] == 2 and merchant.stats()["running"] == 1
+
+    release.set()
+    await asyncio.gather(*waiting)
+    stop.set()
+    await heartbeat
+    print(f"Longest event loop stall: {max(gaps) * 1000:.0f}ms")
+    assert max(gaps) < 0.1
+
+    final = merchant.stats()
+    print(f"Pool stats: {final}")
+    assert placed == [[{"product_id": "dairy-001"}]]
+    assert final["queued"] == 0 and final["running"] == 0
+    assert final["timeouts"] == 2 and final["rejected"] == 1 and final["peak_queued"] == 2
+    assert stats.histograms[(MERCHANT_QUEUE, "list_products")].count >= 3
+    print("\nALL TESTS PASSED")
+
+
+if __name__ == "__main__":
+    asyncio.run(test_async_merchant())
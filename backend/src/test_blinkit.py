@@ -26,8 +26,24 @@ def test_blinkit_merchant():
     # Ensure no dairy products are returned
     assert not any(p["category"] == "Dairy" for p in calcium)
     
+    # Preferences are per session: another caller still sees dairy
+    other = blinkit_merchant.list_products("calcium", session_id="other-room")
+    assert any(p["category"] == "dairy" for p in other)
+    
     # Reset context for other tests
-    blinkit_merchant.user_context["diet"] = []
+    blinkit_merchant.preferences.clear(blinkit_merchant.DEFAULT_SESSION)
+
+    # Candidate scoring from the tag postings ranks exactly like scoring the whole catalog
+    for query in ["milk", "fizzy drink", "amul", "bread toast", "chips", "fresh green", "xyz"]:
+        reference = []
+        for p in blinkit_merchant.catalog.products:
+            score = blinkit_merchant.calculate_score(set(query.split()), blinkit_merchant.get_product_tags(p))
+            if query in p["name"].lower():
+                score += 1.0
+            if score > 0.1:
+                reference.append((score, p))
+        reference.sort(key=lambda x: x[0], reverse=True)
+        assert [p["id"] for p in blinkit_merchant.list_products(query)] == [p["id"] for _, p in reference], query
     
     # 2. Test Create Order
     print("\n2. Testing create_order...")
@@ -41,10 +57,9 @@ def test_blinkit_merchant():
     
     # 3. Test Persistence
     print("\n3. Testing Persistence...")
-    with open("orders.json", "r") as f:
-        orders = json.load(f)
-        last_order = orders[-1]
-        print(f"Last Order from JSON: {last_order['id']}")
+    with open("orders.jsonl", "r") as f:
+        last_order = json.loads(f.read().splitlines()[-1])
+        print(f"Last Order from log: {last_order['id']}")
         assert last_order["id"] == order["id"]
         
     # 4. Test Get Last Order
@@ -57,6 +72,6 @@ def test_blinkit_merchant():
 
 if __name__ == "__main__":
     # Clean up previous test
-    if os.path.exists("orders.json"):
-        os.remove("orders.json")
+    if os.path.exists("orders.jsonl"):
+        os.remove("orders.jsonl")
     test_blinkit_merchant()
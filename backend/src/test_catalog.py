@@ -0,0 +1,139 @@
+import json
+import os
+import tempfile
+import time
+
+from src.catalog import Catalog, CatalogSnapshot
+from src.catalog_query import QueryIndex
+from src.catalog_snapshot import MappedCatalog, compile_snapshot, read_build_id
+
+PRODUCTS = [
+    {"id": "mob-001", "name": "Phone One", "price": 79900, "category": "Mobiles", "attributes": {"color": "Black"}},
+    {"id": "hp-001", "name": "Headphones", "price": 2999, "category": "audio", "attributes": {"color": "White"}},
+    {"id": "mob-002", "name": "Phone Two", "price": 15999, "category": "mobiles", "attributes": {"color": "Blue"}},
+    {"id": "cab-001", "name": "Cable", "price": 499, "category": "accessories"},
+]
+
+
+def check_snapshot(snapshot):
+    assert snapshot.get("mob-002")["name"] == "Phone Two"
+    assert snapshot.get("missing") is None
+    # Categories are matched case-insensitively
+    assert [p["id"] for p in snapshot.in_category("MOBILES")] == ["mob-001", "mob-002"]
+    assert snapshot.in_category("toys") == []
+    assert [p["id"] for p in snapshot.price_range(1000, 20000)] == ["hp-001", "mob-002"]
+    assert [p["id"] for p in snapshot.price_range(max_price=499)] == ["cab-001"]
+    assert snapshot.price_range(min_price=100000) == []
+
+
+def test_catalog():
+    print("Testing catalog indexes...")
+    catalog = Catalog(PRODUCTS)
+    check_snapshot(catalog.snapshot)
+
+    # Reload swaps in a whole new snapshot; holders of the old one are unaffected
+    old = catalog.snapshot
+    catalog.reload(PRODUCTS[:2])
+    assert catalog.version == old.version + 1
+    assert catalog.get("mob-002") is None
+    assert old.get("mob-002") is not None
+
+    # QueryIndex plans on the snapshot's own category and price indexes
+    snapshot = CatalogSnapshot(PRODUCTS, version=1)
+    index = QueryIndex(snapshot)
+    assert index.by_category is snapshot.by_category
+    assert index.price_order is snapshot.price_order
+    assert [p["id"] for p in index.execute({"category": "mobiles", "max_price": 20000})] == ["mob-002"]
+    assert index.execute({"min_price": 1000}, count_only=True) == 3
+
+    print("Testing memory-mapped snapshots...")
+    with tempfile.TemporaryDirectory() as tmp:
+        snap_path = os.path.join(tmp, "catalog.snap")
+        build_id = compile_snapshot(PRODUCTS, snap_path)
+        assert read_build_id(snap_path) == build_id
+
+        mapped = MappedCatalog(snap_path)
+        assert len(mapped) == 4
+        assert mapped[0] == PRODUCTS[0]
+        assert mapped[-1] == PRODUCTS[-1]
+        assert mapped[1:3] == PRODUCTS[1:3]
+        assert mapped.ids() == [p["id"] for p in PRODUCTS]
+        assert mapped.categories() == [p["category"] for p in PRODUCTS]
+        assert list(mapped.prices) == [float(p["price"]) for p in PRODUCTS]
+        try:
+            mapped[4]
+        except IndexError:
+            pass
+        else:
+            raise AssertionError("MappedCatalog read past its end")
+        check_snapshot(CatalogSnapshot.from_mapped(mapped, version=1))
+
+        not_a_snapshot = os.path.join(tmp, "catalog.json")
+        with open(not_a_snapshot, "w") as f:
+            f.write(" " * 64)
+        try:
+            read_build_id(not_a_snapshot)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("read_build_id accepted a non-snapshot file")
+
+        print("Testing hot reload from catalog.json...")
+        source = os.path.join(tmp, "source.json")
+        served = os.path.join(tmp, "served.snap")
+        with open(source, "w") as f:
+            json.dump(PRODUCTS, f)
+        catalog = Catalog.from_snapshot(served, source_json=source, check_interval=0.0)
+        check_snapshot(catalog.snapshot)
+        version = catalog.version
+
+        # Age the compiled snapshot so the rewritten JSON is newer even on coarse mtimes
+        os.utime(served, (time.time() - 10, time.time() - 10))
+        with open(source, "w") as f:
+            json.dump([*PRODUCTS, {"id": "new-001", "name": "New", "price": 1, "category": "toys"}], f)
+        assert catalog.get("new-001")["name"] == "New"
+        assert catalog.version == version + 1
+        # Nothing changed since: the next check keeps the current snapshot
+        assert not catalog.refresh()
+        assert catalog.version == version + 1
+
+        print("Testing a broken catalog.json...")
+        os.utime(served, (time.time() - 10, time.time() - 10))
+        with open(source, "w") as f:
+            f.write("[{not json")
+        # The last good snapshot stays in service
+        assert catalog.get("new-001")["name"] == "New"
+        assert not catalog.refresh()
+
+        # Nothing compiled yet: an empty catalog instead of an import-time error
+        broken = Catalog.from_snapshot(os.path.join(tmp, "never.snap"), source_json=source)
+        assert len(broken.products) == 0
+        assert broken.get("mob-001") is None
+
+        print("Testing an unwritable snapshot path...")
+        with open(source, "w") as f:
+            json.dump(PRODUCTS, f)
+        unwritable = os.path.join(tmp, "no-such-dir", "catalog.snap")
+        fallback = Catalog.from_snapshot(unwritable, source_json=source, check_interval=0.0)
+        # Served from the JSON in memory, as before snapshots existed
+        check_snapshot(fallback.snapshot)
+        assert not fallback.refresh()
+        with open(source, "w") as f:
+            json.dump([*PRODUCTS, {"id": "new-002", "name": "Newer", "price": 2, "category": "toys"}], f)
+        os.utime(source, (time.time() + 1, time.time() + 1))
+        assert fallback.get("new-002")["name"] == "Newer"
+
+        # A corrupt snapshot next to a valid JSON: the JSON is served
+        corrupt = os.path.join(tmp, "corrupt.snap")
+        with open(corrupt, "w") as f:
+            f.write(" " * 64)
+        with open(source, "w") as f:
+            json.dump(PRODUCTS, f)
+        os.utime(source, (time.time() - 10, time.time() - 10))
+        check_snapshot(Catalog.from_snapshot(corrupt, source_json=source).snapshot)
+
+    print("\n✅ All Catalog Tests Passed!")
+
+
+if __name__ == "__main__":
+    test_catalog()
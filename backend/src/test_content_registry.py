@@ -0,0 +1,59 @@
+import json
+import os
+import tempfile
+import time
+
+from src.content_registry import ContentRegistry, registry
+
+
+def _render_names(content):
+    _render_names.calls += 1
+    return ", ".join(v["name"] for v in content["verticals"])
+
+
+_render_names.calls = 0
+
+
+def test_content_registry():
+    print("Testing content registry...")
+
+    # The shipped packs all validate
+    packs = registry.load_all()
+    print(f"Loaded packs: {sorted(packs)}")
+    assert set(packs) == {"pw", "tata", "kfc", "mcdonalds"}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "pack.json")
+        pack = {
+            "company_info": {"name": "Acme", "description": "Tests"},
+            "verticals": [{"name": "A", "description": "first"}],
+            "faqs": [],
+        }
+        with open(path, "w") as f:
+            json.dump(pack, f)
+        reg = ContentRegistry(tmp, check_interval=0)
+        reg.register("acme", "pack.json", "company")
+
+        # Rendered once, then served from the cache
+        assert reg.render("acme", _render_names) == "A"
+        assert reg.render("acme", _render_names) == "A"
+        assert _render_names.calls == 1
+
+        # A changed file is reloaded and re-rendered
+        time.sleep(0.01)
+        pack["verticals"].append({"name": "B", "description": "second"})
+        with open(path, "w") as f:
+            json.dump(pack, f)
+        assert reg.render("acme", _render_names) == "A, B"
+        assert _render_names.calls == 2
+
+        # An invalid update is rejected; the last good version keeps serving
+        with open(path, "w") as f:
+            json.dump({"company_info": {"name": "Acme"}, "verticals": "oops"}, f)
+        assert reg.render("acme", _render_names) == "A, B"
+        assert _render_names.calls == 2
+    print("\nALL TESTS PASSED")
+
+
+if __name__ == "__main__":
+    test_content_registry()
@@ -0,0 +1,320 @@
+import asyncio
+import contextlib
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from src import database
+from src.db_pool import ConnectionManager
+
+
+def _use_temp_db(tmp):
+    """Point the module at a fresh database file in `tmp`."""
+    database.db.close()
+    database.db = ConnectionManager(os.path.join(tmp, "fraud_cases.db"))
+    database.init_db()
+
+
+def test_username_lookup():
+    print("Testing username lookup...")
+    original = database.db
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            _use_temp_db(tmp)
+            database.seed_db()
+            database.ingest_cases(
+                {"username": f"user_{i:04d}", "transaction_amount_paise": 100} for i in range(2000)
+            )
+
+            # Internal columns stay internal
+            case = database.get_case("john_doe")
+            assert tuple(case) == database.CASE_COLUMNS
+
+            # Exact match after normalization
+            assert database.find_user_fuzzy("John Doe")["username"] == "john_doe"
+            assert tuple(database.find_user_fuzzy("JOHNDOE")) == database.CASE_COLUMNS
+
+            # ASR mishearings go through the trigram tier
+            assert database.find_user_fuzzy("jon doe")["username"] == "john_doe"
+            assert database.find_user_fuzzy("reet sing")["username"] == "reet_singh"
+            assert database.find_user_fuzzy("usr 0420")["username"] == "user_0420"
+            assert tuple(database.find_user_fuzzy("jon doe")) == database.CASE_COLUMNS
+            assert database.find_user_fuzzy("completely different") is None
+            assert database.find_user_fuzzy("  ") is None
+
+            # "#us" has 2000 postings: too common to read, the rarer trigrams find the match
+            assert database.find_user_fuzzy("usr 1999")["username"] == "user_1999"
+            conn = database.db.connection()
+            assert conn.execute(
+                "SELECT COUNT(*) FROM fraud_username_trigrams WHERE trigram = '#us'"
+            ).fetchone()[0] == 2000
+
+            # More usernames share the common trigrams ("cus", "tom", ...) than a lookup reads,
+            # and the match sorts late in the index; it is still resolved from the rare ones
+            database.ingest_cases(
+                {"username": f"customer_{i:04d}", "transaction_amount_paise": 100}
+                for i in range(3 * database.FUZZY_POSTINGS_PER_TRIGRAM)
+            )
+            assert database.find_user_fuzzy("customr 0420")["username"] == "customer_0420"
+            assert database.find_user_fuzzy("custmer 0599")["username"] == "customer_0599"
+
+            # Renames and deletes keep the trigram index current
+            with database.db.transaction() as tx:
+                tx.execute("UPDATE fraud_cases SET username = 'jonathan_doe' WHERE username = 'john_doe'")
+                database.index_usernames(tx, ["jonathan_doe"])
+                tx.execute("DELETE FROM fraud_cases WHERE username = 'jane_smith'")
+            assert database.find_user_fuzzy("jonathan doe")["username"] == "jonathan_doe"
+            assert database.find_user_fuzzy("jane smyth") is None
+            assert conn.execute(
+                "SELECT COUNT(*) FROM fraud_username_trigrams WHERE username IN ('john_doe', 'jane_smith')"
+            ).fetchone()[0] == 0
+
+            # A trigram table from before the length prefilter is rebuilt by init_db
+            conn.executescript("""
+                DROP TABLE fraud_username_trigrams;
+                CREATE TABLE fraud_username_trigrams (
+                    trigram TEXT NOT NULL, username TEXT NOT NULL, PRIMARY KEY (trigram, username)
+                ) WITHOUT ROWID;
+            """)
+            database.init_db()
+            assert database.find_user_fuzzy("jonathon doe")["username"] == "jonathan_doe"
+        finally:
+            database.db.close()
+            database.db = original
+
+    print("\n✅ All Username Lookup Tests Passed!")
+
+
+async def test_outcome_writer():
+    print("Testing group-committed outcome updates...")
+    original = database.db
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            _use_temp_db(tmp)
+            database.seed_db()
+
+            # Concurrent sessions share commits
+            await asyncio.gather(*(
+                database.update_case_status_async(name, "confirmed_safe", f"note {i}")
+                for i, name in enumerate(["john_doe", "jane_smith", "alice_wonder", "bob_builder"])
+            ))
+            assert database.get_case("bob_builder")["outcome_note"] == "note 3"
+
+            # A caller cancelled while its update is queued (barge-in): the update is still written
+            cancelled = asyncio.ensure_future(
+                database.update_case_status_async("charlie_brown", "confirmed_fraud", "cancelled")
+            )
+            await asyncio.sleep(0)
+            cancelled.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await cancelled
+            await asyncio.wait_for(
+                database.update_case_status_async("reet_singh", "confirmed_fraud", "after cancel"), timeout=5
+            )
+            assert database.get_case("reet_singh")["outcome_note"] == "after cancel"
+            charlie = database.get_case("charlie_brown")
+            assert charlie["status"] == "confirmed_fraud" and charlie["outcome_note"] == "cancelled"
+            assert database.outcome_writer._thread.is_alive()
+        finally:
+            database.outcome_writer.close()
+            database.db.close()
+            database.db = original
+
+    print("\n✅ All Outcome Writer Tests Passed!")
+
+
+def test_money_and_time():
+    print("Testing amount and time parsing...")
+    # transaction_amount is always rupees, whatever its type
+    assert database.parse_amount_paise(85000) == 8500000
+    assert database.parse_amount_paise(499.5) == 49950
+    assert database.parse_amount_paise("₹1,20,000") == 12000000
+    assert database.parse_amount_paise("Rs. 499.50") == 49950
+    assert database.parse_amount_paise("0.005") == 1  # half-up to the paisa
+    assert database.parse_amount_paise(None) == 0
+    assert database.parse_amount_paise("") == 0
+    try:
+        database.parse_amount_paise("about fifty")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("parse_amount_paise accepted text")
+
+    assert database.format_inr(12000000) == "₹1,20,000"
+    assert database.format_inr(123456789) == "₹12,34,567.89"
+    assert database.format_inr(49999) == "₹499.99"
+    assert database.format_inr(-150) == "-₹1.50"
+    assert database.format_inr(0) == "₹0"
+
+    # Times without an offset are IST; several legacy layouts are understood
+    ist_1430 = 1698397200  # 2023-10-27 14:30 IST
+    for text in (
+        "2023-10-27 14:30:00",
+        "2023-10-27T09:00:00+00:00",
+        "27 October 2023, 02:30 PM",
+        "27 Oct 2023, 02:30 PM",
+        "27/10/2023 14:30",
+        "27-10-2023 14:30:00",
+    ):
+        assert database.parse_timestamp(text) == ist_1430, text
+    assert database.parse_timestamp(ist_1430) == ist_1430
+    assert database.parse_timestamp(str(ist_1430)) == ist_1430
+    assert database.parse_timestamp(None) is None
+    try:
+        database.parse_timestamp("last Tuesday")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("parse_timestamp accepted free text")
+
+    shown = database.format_case_for_voice({"transaction_amount_paise": 8500000, "transaction_time": ist_1430})
+    assert shown["transaction_amount"] == "₹85,000"
+    assert shown["transaction_time"] == "27 October 2023, 02:30 PM"
+
+    # Rows: rupees from transaction_amount, paise only from transaction_amount_paise,
+    # unparsable values stored as 0 / NULL
+    row = dict(zip(database.CASE_COLUMNS, database._case_row({"username": "x", "transaction_amount": 85000})))
+    assert row["transaction_amount_paise"] == 8500000
+    row = dict(zip(database.CASE_COLUMNS, database._case_row({"username": "x", "transaction_amount_paise": 85000})))
+    assert row["transaction_amount_paise"] == 85000
+    row = dict(zip(database.CASE_COLUMNS, database._case_row(
+        {"username": "x", "transaction_amount": "n/a", "transaction_time": "yesterday"}
+    )))
+    assert row["transaction_amount_paise"] == 0 and row["transaction_time"] is None
+    assert row["status"] == "pending_review"
+
+    print("\n✅ All Parsing Tests Passed!")
+
+
+def test_legacy_migration():
+    print("Testing migration of a legacy database...")
+    original = database.db
+    with tempfile.TemporaryDirectory() as tmp:
+        # The baseline schema: display-text amounts and free-text times
+        legacy = sqlite3.connect(os.path.join(tmp, "fraud_cases.db"))
+        legacy.executescript("""
+            CREATE TABLE fraud_cases (
+                username TEXT PRIMARY KEY, security_identifier TEXT, card_ending TEXT, status TEXT,
+                transaction_name TEXT, transaction_amount TEXT, transaction_time TEXT,
+                transaction_city TEXT, transaction_merchant TEXT, security_question TEXT,
+                security_answer TEXT, outcome_note TEXT
+            );
+            INSERT INTO fraud_cases VALUES ('john_doe', '12345', '4242', 'pending_review', 'Electronics',
+                '₹85,000', '2023-10-27 14:30:00', 'New Delhi', 'Croma', 'Q', 'A', '');
+            INSERT INTO fraud_cases VALUES ('jane_smith', '67890', '8888', 'confirmed_safe', 'Hotel',
+                '₹1,20,000.50', '27 October 2023, 02:30 PM', 'Mumbai', 'Taj', 'Q', 'A', 'ok');
+            INSERT INTO fraud_cases VALUES ('odd_row', '1', '1', 'pending_review', 'Unknown',
+                'unknown', 'sometime last week', '', '', 'Q', 'A', '');
+        """)
+        legacy.commit()
+        legacy.close()
+        try:
+            _use_temp_db(tmp)
+            columns = {row[1] for row in database.db.connection().execute("PRAGMA table_info(fraud_cases)")}
+            assert "transaction_amount" not in columns and "transaction_amount_paise" in columns
+
+            john = database.get_case("john_doe")
+            assert john["transaction_amount_paise"] == 8500000
+            assert john["transaction_time"] == 1698397200
+            jane = database.get_case("jane_smith")
+            assert jane["transaction_amount_paise"] == 12000050
+            assert (jane["status"], jane["outcome_note"]) == ("confirmed_safe", "ok")
+            # A value that cannot be parsed does not stop the migration
+            odd = database.get_case("odd_row")
+            assert odd["transaction_amount_paise"] == 0 and odd["transaction_time"] is None
+            # Username index and trigrams are rebuilt for the new table
+            assert database.find_user_fuzzy("jon doe")["username"] == "john_doe"
+
+            # Running init_db again is a no-op
+            database.init_db()
+            assert database.query_cases(count_only=True) == 3
+        finally:
+            database.db.close()
+            database.db = original
+
+    print("\n✅ All Migration Tests Passed!")
+
+
+def test_query_cases():
+    print("Testing the review queue...")
+    original = database.db
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            _use_temp_db(tmp)
+            database.ingest_cases(
+                {
+                    "username": f"case_{i:02d}",
+                    "status": "pending_review" if i % 2 else "confirmed_safe",
+                    "transaction_amount": 1000 * i,
+                    "transaction_time": 1_700_000_000 + 60 * i,
+                }
+                for i in range(20)
+            )
+            pending = database.query_cases(status="pending_review")
+            # Newest first
+            assert [c["username"] for c in pending[:3]] == ["case_19", "case_17", "case_15"]
+            assert database.query_cases(status="pending_review", count_only=True) == 10
+
+            big = database.query_cases(min_amount_paise=1000_00 * 15, max_amount_paise=1000_00 * 17)
+            assert [c["username"] for c in big] == ["case_17", "case_16", "case_15"]
+            window = database.query_cases(since=1_700_000_000 + 60 * 5, until=1_700_000_000 + 60 * 7)
+            assert [c["username"] for c in window] == ["case_07", "case_06", "case_05"]
+            assert database.query_cases(status="confirmed_fraud") == []
+
+            # Paging walks the whole queue without gaps or repeats
+            pages = [database.query_cases(status="pending_review", limit=4, offset=offset) for offset in (0, 4, 8)]
+            assert [len(p) for p in pages] == [4, 4, 2]
+            assert [c["username"] for p in pages for c in p] == [c["username"] for c in pending]
+            assert tuple(pending[0]) == database.CASE_COLUMNS
+        finally:
+            database.db.close()
+            database.db = original
+
+    print("\n✅ All Query Tests Passed!")
+
+
+def test_database_cli():
+    print("Testing the ingest and queue commands...")
+    backend = Path(database.__file__).resolve().parent.parent
+    with tempfile.TemporaryDirectory() as tmp:
+        cases_path = os.path.join(tmp, "cases.jsonl")
+        with open(cases_path, "w") as f:
+            for i, amount in enumerate([85000, 1200, 250000]):
+                f.write(json.dumps({
+                    "username": f"cli_{i}",
+                    "transaction_amount": amount,
+                    "transaction_time": "2023-10-27 14:30:00",
+                }) + "\n")
+        env = {**os.environ, "FRAUD_DB_PATH": os.path.join(tmp, "cli.db")}
+
+        def run(*args):
+            result = subprocess.run(
+                [sys.executable, "-m", "src.database", *args],
+                cwd=backend, env=env, capture_output=True, text=True, timeout=60,
+            )
+            assert result.returncode == 0, result.stderr
+            return result.stdout
+
+        run("ingest", cases_path)
+        output = run("queue", "--min-amount", "50000", "--limit", "1")
+        print(output)
+        lines = output.strip().splitlines()
+        assert lines[-1] == "2 matching cases"
+        assert len(lines) == 2
+        assert lines[0].split()[0] in ("cli_0", "cli_2")
+        assert "₹" in lines[0] and "27 October 2023, 02:30 PM" in lines[0]
+
+    print("\n✅ All CLI Tests Passed!")
+
+
+if __name__ == "__main__":
+    test_money_and_time()
+    test_legacy_migration()
+    test_query_cases()
+    test_database_cli()
+    test_username_lookup()
+    asyncio.run(test_outcome_writer())
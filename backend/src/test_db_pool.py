@@ -0,0 +1,67 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+import threading
+
+from src.db_pool import ConnectionManager
+
+
+async def test_db_pool():
+    print("Testing pooled SQLite connections...")
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = ConnectionManager(os.path.join(tmp, "pool.db"), max_workers=2)
+
+        # 1. One connection per thread, reused across calls
+        conn = manager.connection()
+        assert manager.connection() is conn
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+        other = []
+        thread = threading.Thread(target=lambda: other.append(manager.connection()))
+        thread.start()
+        thread.join()
+        assert other[0] is not conn
+
+        # 2. Transactions commit on success and roll back on error
+        with manager.transaction() as tx:
+            tx.execute("CREATE TABLE items (name TEXT)")
+            tx.execute("INSERT INTO items VALUES ('kept')")
+        try:
+            with manager.transaction() as tx:
+                tx.execute("INSERT INTO items VALUES ('dropped')")
+                raise RuntimeError("boom")
+        except RuntimeError:
+            pass
+        assert [row["name"] for row in conn.execute("SELECT name FROM items")] == ["kept"]
+
+        # 3. `run` executes on the bounded pool, whose threads keep their connections
+        def pool_connection():
+            return id(manager.connection()), threading.current_thread().name
+
+        seen = await asyncio.gather(*(manager.run(pool_connection) for _ in range(20)))
+        threads = {name for _, name in seen}
+        assert all(name.startswith("sqlite") for name in threads)
+        assert len(threads) <= 2
+        assert len({conn_id for conn_id, _ in seen}) == len(threads)
+        assert await manager.run(lambda: manager.connection().execute("SELECT COUNT(*) FROM items").fetchone()[0]) == 1
+
+        # 4. close() closes every connection; the manager reopens on next use
+        manager.close()
+        try:
+            conn.execute("SELECT 1")
+        except sqlite3.ProgrammingError:
+            pass
+        else:
+            raise AssertionError("connection still open after close()")
+        reopened = manager.connection()
+        assert reopened is not conn
+        assert reopened.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 1
+        assert await manager.run(lambda: manager.connection().execute("SELECT COUNT(*) FROM items").fetchone()[0]) == 1
+        manager.close()
+
+    print("\n✅ All DB Pool Tests Passed!")
+
+
+if __name__ == "__main__":
+    asyncio.run(test_db_pool())
@@ -0,0 +1,28 @@
+from src.content_registry import registry
+from src.faq_index import FAQIndex, format_faq_results
+
+
+def test_faq_index():
+    print("Testing FAQ index...")
+    index = registry.derive("pw", FAQIndex.from_content)
+    # Built once per content version
+    assert registry.derive("pw", FAQIndex.from_content) is index
+
+    cases = {
+        "how much are the fees": "What is the fee structure?",
+        "do you give pdf notes": "Do you provide study material?",
+        "can I rewatch a class I missed, recorded": "Can I watch recorded lectures?",
+        "medical entrance preparation neet": "NEET (National Eligibility cum Entrance Test)",
+    }
+    for query, expected in cases.items():
+        results = index.search(query, top_k=3)
+        print(f"Query '{query}' -> {[p['title'] for _, p in results]}")
+        assert results and results[0][1]["title"] == expected
+
+    assert index.search("zzzz qqqq") == []
+    assert "No matching information" in format_faq_results([])
+    print("\nALL TESTS PASSED")
+
+
+if __name__ == "__main__":
+    test_faq_index()
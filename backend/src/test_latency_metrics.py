@@ -0,0 +1,152 @@
+import asyncio
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from types import SimpleNamespace
+
+from src.latency_metrics import (
+    LLM_TTFT,
+    TOOL,
+    LatencyHistogram,
+    LatencyStats,
+    LatencyStore,
+    SessionLatency,
+    serve_metrics,
+)
+from src.tool_tracing import JsonlSpanExporter, ToolTracer
+
+
+async def test_latency_metrics():
+    print("Testing latency histograms...")
+    rng = random.Random(7)
+    samples = [rng.lognormvariate(-1.5, 0.6) for _ in range(20000)]
+    hist = LatencyHistogram()
+    for value in samples:
+        hist.record(value)
+    ordered = sorted(samples)
+    for q in (0.5, 0.95, 0.99):
+        exact = ordered[int(q * len(ordered)) - 1]
+        approx = hist.percentile(q)
+        print(f"p{int(q * 100)}: exact {exact * 1000:.1f}ms, histogram {approx * 1000:.1f}ms")
+        assert abs(approx - exact) / exact < 0.03
+    assert len(hist.buckets) < 400
+    assert LatencyHistogram.from_dict(hist.to_dict()).percentile(0.99) == hist.percentile(0.99)
+
+    # Metrics events: EOU / LLM / TTS latencies are recorded, cancelled and undetected ones are not
+    stats = LatencyStats()
+    stats.observe(SimpleNamespace(type="eou_metrics", end_of_utterance_delay=0.4, transcription_delay=0.1))
+    stats.observe(SimpleNamespace(type="eou_metrics", end_of_utterance_delay=0.0, transcription_delay=0.0))
+    stats.observe(SimpleNamespace(type="llm_metrics", ttft=0.6, cancelled=False))
+    stats.observe(SimpleNamespace(type="llm_metrics", ttft=-1.0, cancelled=True))
+    stats.observe(SimpleNamespace(type="tts_metrics", ttfb=0.25, cancelled=False))
+    stats.observe(SimpleNamespace(type="vad_metrics"))
+    assert {k: h.count for k, h in stats.histograms.items()} == {
+        ("eou_delay", ""): 1, ("transcription_delay", ""): 1, ("llm_ttft", ""): 1, ("tts_ttfb", ""): 1,
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = LatencyStore(tmp)
+        tracer = ToolTracer(JsonlSpanExporter(os.path.join(tmp, "traces", "spans.jsonl")), sample_rate=0.0, slow_ms=1e9)
+
+        class Agent:
+            @tracer.traced
+            async def list_products(self, query=""):
+                await asyncio.sleep(0.02)
+                return query
+
+        # Tool time (from the tool spans) is attributed by function name to the session bound in this context
+        session = SessionLatency("room-1", store=store)
+        session.observe(SimpleNamespace(type="llm_metrics", ttft=0.5, cancelled=False))
+        await Agent().list_products("milk")
+        await Agent().list_products("eggs")
+        tool = session.stats.histograms[(TOOL, "list_products")]
+        assert tool.count == 2 and 0.015 < tool.percentile(0.5) < 0.2
+        report = await session.aclose()
+        print(report)
+        assert "tool:list_products" in report and "Worker latency" in report
+
+        # A closed session leaves only its final snapshot; late periodic writes are ignored
+        pid = os.getpid()
+        assert sorted(os.listdir(store.directory)) == [f"room-1.{pid}.final.json"]
+        store.write("room-1", LatencyStats())
+        assert sorted(os.listdir(store.directory)) == [f"room-1.{pid}.final.json"]
+
+        # Per-worker view merges every session's snapshot
+        other = LatencyStats()
+        other.record(LLM_TTFT, 0.7)
+        store.write("room-2", other)
+        worker = store.load()
+        assert worker.histograms[(LLM_TTFT, "")].count == 2
+
+        print("Testing snapshot compaction...")
+        final_copy = os.path.join(store.directory, "room-1.copy")
+        shutil.copy(os.path.join(store.directory, f"room-1.{pid}.final.json"), final_copy)
+        assert store.compact() == 1
+        assert sorted(os.listdir(store.directory)) == ["room-1.copy", f"room-2.{pid}.json", "worker-totals.json"]
+        assert store.load().histograms[(LLM_TTFT, "")].count == 2
+        assert store.load().histograms[(TOOL, "list_products")].count == 2
+        # A compaction that stopped before deleting: the folded snapshot is not counted twice
+        os.replace(final_copy, os.path.join(store.directory, f"room-1.{pid}.final.json"))
+        assert store.load().histograms[(LLM_TTFT, "")].count == 2
+        assert store.compact() == 0
+        assert sorted(os.listdir(store.directory)) == [f"room-2.{pid}.json", "worker-totals.json"]
+        assert store.load().histograms[(LLM_TTFT, "")].count == 2
+
+        # Snapshots left under this pid by an earlier worker are deleted
+        stale = time.time() - 60
+        os.utime(os.path.join(store.directory, f"room-2.{pid}.json"), (stale, stale))
+        assert store.prune(before=time.time() - 30) == 1
+        assert os.listdir(store.directory) == ["worker-totals.json"]
+
+        # Other workers on the host keep their own directories while they run
+        exited = subprocess.Popen([sys.executable, "-c", "pass"])
+        exited.wait()
+        for other_pid in (os.getppid(), exited.pid):
+            other_dir = os.path.join(tmp, f"worker-{other_pid}")
+            os.makedirs(other_dir)
+            with open(os.path.join(other_dir, "room-9.1.final.json"), "w") as f:
+                json.dump(other.to_dict(), f)
+        assert store.prune(before=time.time() - 30) == 1
+        assert sorted(os.listdir(tmp)) == sorted([f"worker-{os.getppid()}", f"worker-{pid}"])
+        # ... and compaction never folds their sessions into this worker's totals
+        assert store.compact() == 0
+        assert store.load().histograms[(LLM_TTFT, "")].count == 1  # room-1, from the totals
+
+        server = serve_metrics(port=0, store=store)
+        assert server is None
+        server = serve_metrics(port=_free_port(), store=store)
+        try:
+            await asyncio.sleep(0.05)  # file mtimes come from the coarser kernel clock
+            store.write("room-2", other)
+            # Everything written before the server started was removed
+            assert os.listdir(store.directory) == [f"room-2.{pid}.json"]
+            url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+            body = await asyncio.to_thread(lambda: urllib.request.urlopen(url).read().decode())
+        finally:
+            server.shutdown()
+            server.server_close()
+            os.environ.pop("NOVA_WORKER_STARTED_AT", None)
+            os.environ.pop("NOVA_WORKER_PID", None)
+        print(body)
+        assert "# TYPE nova_voice_latency_seconds summary" in body
+        assert 'nova_voice_latency_seconds{stage="llm_ttft",quantile="0.95"}' in body
+        assert 'nova_voice_latency_seconds_count{stage="tool",function="list_products"}' not in body  # room-1 predates the server
+    print("\nALL TESTS PASSED")
+
+
+def _free_port():
+    import socket
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+if __name__ == "__main__":
+    asyncio.run(test_latency_metrics())
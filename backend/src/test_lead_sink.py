@@ -0,0 +1,55 @@
+import asyncio
+import json
+import os
+import tempfile
+
+from src.lead_sink import LeadSink
+
+
+async def test_lead_sink():
+    print("Testing lead sink...")
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, "leads.json")
+        with open(legacy_path, "w") as f:
+            json.dump([{"name": "Existing Lead", "email": "old@example.com"}], f)
+
+        sink = LeadSink(os.path.join(tmp, "leads.db"), legacy_json=legacy_path)
+
+        # A campaign spike: 300 concurrent saves from 100 distinct callers
+        saves = [
+            sink.save({"name": f"Student {i % 100}", "email": f" Student{i % 100}@Example.com ", "attempt": i})
+            for i in range(300)
+        ]
+        await asyncio.gather(*saves)
+        await sink.save({"name": "No Email"})
+        await sink.save({"name": "No Email Either", "email": ""})
+        await sink.aclose()
+
+        leads = sink.all_leads()
+        print(f"Stored {len(leads)} leads")
+        # legacy lead + one per email (latest save wins) + both email-less leads
+        assert len(leads) == 1 + 100 + 2
+        assert leads[0]["email"] == "old@example.com"
+        latest = {lead["name"]: lead.get("attempt") for lead in leads}
+        assert latest["Student 7"] == 207
+
+        out_path = os.path.join(tmp, "export.json")
+        assert sink.export_json(out_path) == len(leads)
+        with open(out_path) as f:
+            assert json.load(f) == leads
+
+        # Each job has its own sink on the shared database: closing one job's
+        # sink leaves another job's writer running
+        job_a = LeadSink(os.path.join(tmp, "leads.db"))
+        job_b = LeadSink(os.path.join(tmp, "leads.db"))
+        await job_a.save({"name": "Job A", "email": "a@example.com"})
+        await job_b.save({"name": "Job B", "email": "b@example.com"})
+        await job_a.aclose()
+        await job_b.save({"name": "Job B again", "email": "b2@example.com"})
+        await job_b.aclose()
+        assert len(sink.all_leads()) == len(leads) + 3
+    print("\nALL TESTS PASSED")
+
+
+if __name__ == "__main__":
+    asyncio.run(test_lead_sink())
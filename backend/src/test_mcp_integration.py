@@ -0,0 +1,130 @@
+import asyncio
+import os
+import tempfile
+import time
+from unittest import mock
+
+from src.mcp_integration import MCPIntegration
+from src.wellness_api_stub import STATE_KEY, start_stub
+
+
+async def _heartbeat(gaps, stop):
+    # Stands in for the audio/VAD work sharing the agent's event loop.
+    last = time.monotonic()
+    while not stop.is_set():
+        await asyncio.sleep(0.01)
+        now = time.monotonic()
+        gaps.append(now - last)
+        last = now
+
+
+def _make_client(base_url, state_dir):
+    return MCPIntegration(
+        notion_api_url=f"{base_url}/notion",
+        todoist_api_url=f"{base_url}/todoist",
+        todoist_sync_url=f"{base_url}/todoist/sync",
+        state_path=os.path.join(state_dir, "mcp_state.json"),
+        outbox_path=os.path.join(state_dir, "outbox.db"),
+    )
+
+
+async def test_mcp_integration():
+    print("Testing MCP integration against the local stub...")
+    runner, base_url = await start_stub(delay=0.1)
+    stub = runner.app[STATE_KEY]
+    # Restored afterwards so the stub credentials do not leak into other tests
+    with mock.patch.dict(os.environ, {"NOTION_API_TOKEN": "stub-notion", "TODOIST_API_TOKEN": "stub-todoist"}):
+        os.environ.pop("NOTION_DATABASE_ID", None)
+        state_dir = tempfile.TemporaryDirectory()
+        mcp = _make_client(base_url, state_dir.name)
+        try:
+            gaps, stop = [], asyncio.Event()
+            heartbeat = asyncio.create_task(_heartbeat(gaps, stop))
+
+            entry = await mcp.create_notion_wellness_entry("2025-11-20", "Asha", "calm", ["walk", "read"], "Good day")
+            print(f"Notion entry: {entry}")
+            assert entry["status"] == "success"
+
+            # Goals are confirmed without waiting on Todoist...
+            goals = [f"goal {i}" for i in range(8)]
+            started = time.monotonic()
+            result = await mcp.create_todoist_tasks(goals, user_name="Asha")
+            elapsed = time.monotonic() - started
+            print(f"Todoist: {result['message']} in {elapsed * 1000:.0f}ms")
+            assert result["status"] == "success"
+            assert [t["content"] for t in result["tasks"]] == goals
+            assert elapsed < 0.05
+
+            # ...and synced in one batch by the background worker
+            await mcp.outbox.flush()
+            assert sorted(t["content"] for t in stub.tasks.values()) == goals
+            assert mcp.outbox.pending_count() == 0
+
+            done = await mcp.mark_todoist_task_complete(result["tasks"][0]["id"])
+            assert done["status"] == "success", done
+            missing = await mcp.mark_todoist_task_complete("does-not-exist")
+            assert missing["status"] == "error"
+
+            stop.set()
+            await heartbeat
+            print(f"Longest event loop stall: {max(gaps) * 1000:.0f}ms")
+            assert max(gaps) < 0.1
+
+            # Resolved IDs are cached: steady-state writes are one request each
+            stub.delay = 0
+            before = stub.requests
+            await mcp.create_notion_wellness_entry("2025-11-21", "Asha", "ok", [], "")
+            await mcp.create_todoist_tasks(["stretch"], user_name="Asha")
+            await mcp.outbox.flush()
+            assert stub.requests - before == 2, stub.requests - before
+
+            # ...and survive a restart through the state file, not .env.local
+            restarted = _make_client(base_url, state_dir.name)
+            before = stub.requests
+            assert (await restarted.create_notion_wellness_entry("2025-11-22", "Asha", "ok", [], ""))["status"] == "success"
+            assert stub.requests - before == 1
+            await restarted.aclose()
+
+            # A deleted database or project (404) is re-resolved
+            stub.databases.clear()
+            stub.projects.clear()
+            assert (await mcp.create_notion_wellness_entry("2025-11-23", "Asha", "ok", [], ""))["status"] == "success"
+            await mcp.create_todoist_tasks(["walk"], user_name="Asha")
+            await mcp.outbox.flush()
+            assert len(stub.databases) == 1 and len(stub.projects) == 1
+            assert any(t["content"] == "walk" for t in stub.tasks.values())
+
+            # Tasks left queued by a crashed process are synced once a new one connects,
+            # without waiting for another goal to be enqueued
+            await mcp.outbox.stop()
+            crashed = _make_client(base_url, state_dir.name)
+            crashed.outbox.enqueue(["left behind"], "Wellness Goals")
+            crashed.outbox.close()
+            await crashed.aclose()
+            recovered = _make_client(base_url, state_dir.name)
+            await recovered.connect()
+            for _ in range(100):
+                if any(t["content"] == "left behind" for t in stub.tasks.values()):
+                    break
+                await asyncio.sleep(0.02)
+            assert any(t["content"] == "left behind" for t in stub.tasks.values())
+            await recovered.aclose()
+            recovered.outbox.close()
+
+            # Upstream outages are retried with the same command ids: nothing is duplicated
+            mcp.outbox.base_backoff = 0.01
+            stub.fail_next_syncs = 2
+            await mcp.create_todoist_tasks(["hydrate"], user_name="Asha")
+            await mcp.outbox.flush()
+            assert [t["content"] for t in stub.tasks.values()].count("hydrate") == 1
+            assert mcp.outbox.pending_count() == 0
+        finally:
+            await mcp.aclose()
+            mcp.outbox.close()
+            await runner.cleanup()
+            state_dir.cleanup()
+    print("\nALL TESTS PASSED")
+
+
+if __name__ == "__main__":
+    asyncio.run(test_mcp_integration())
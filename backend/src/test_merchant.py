@@ -19,6 +19,13 @@ if __name__ == "__main__":
         print("TEST FAILED: No mobiles found.")
         sys.exit(1)
 
+    # Test count_only and pagination
+    mobile_count = list_products({"category": "mobiles"}, count_only=True)
+    print(f"Counted {mobile_count} mobiles.")
+    if mobile_count != len(mobiles) or list_products({"category": "mobiles"}, limit=1, offset=1) != mobiles[1:2]:
+        print("TEST FAILED: count_only/pagination mismatch.")
+        sys.exit(1)
+
     print("\nTesting Order Creation (Normal)...")
     # Test creating an order
     item_to_order = mobiles[0]
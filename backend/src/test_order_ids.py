@@ -0,0 +1,62 @@
+from datetime import datetime
+from unittest import mock
+
+from src.order_ids import (
+    SEQUENCE_MASK,
+    OrderIdGenerator,
+    id_lower_bound,
+    id_timestamp,
+    is_sortable_id,
+    parse_id,
+)
+
+
+def test_order_ids():
+    print("Testing order ids...")
+    frozen_ms = 1_735_725_600_123  # 2025-01-01 10:00:00.123 UTC
+    generator = OrderIdGenerator(worker_id=7)
+
+    print("   Ordering within one millisecond...")
+    with mock.patch("src.order_ids.time.time", return_value=frozen_ms / 1000):
+        ids = [generator.new_id("ORD-") for _ in range(10_000)]
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+    assert {parse_id(i, "ORD-")[0] for i in ids} == {frozen_ms}
+
+    print("   Sequence overflow moves on to the next millisecond...")
+    with mock.patch("src.order_ids.time.time", return_value=frozen_ms / 1000):
+        generator._sequence = SEQUENCE_MASK - 1
+        near_end = generator.new_id("ORD-")
+        overflowed = generator.new_id("ORD-")
+        after = generator.new_id("ORD-")
+    assert ids[-1] < near_end < overflowed < after
+    assert parse_id(near_end, "ORD-") == (frozen_ms, 7, SEQUENCE_MASK)
+    assert parse_id(overflowed, "ORD-")[0] == frozen_ms + 1
+    assert parse_id(after, "ORD-")[0] == frozen_ms + 1
+
+    print("   A clock stepping backwards does not reorder ids...")
+    with mock.patch("src.order_ids.time.time", return_value=(frozen_ms - 5000) / 1000):
+        assert generator.new_id("ORD-") > after
+
+    print("   Parsing...")
+    order_id = ids[0]
+    assert is_sortable_id(order_id, "ORD-")
+    assert not is_sortable_id(order_id, "BLK-")
+    assert not is_sortable_id("ORD-20240101120000")
+    ms, worker, sequence = parse_id(order_id, "ORD-")
+    assert (ms, worker) == (frozen_ms, 7)
+    assert 0 <= sequence <= SEQUENCE_MASK
+    assert id_timestamp(order_id, "ORD-") == datetime.fromtimestamp(frozen_ms / 1000)
+    assert id_lower_bound(id_timestamp(order_id, "ORD-"), "ORD-") <= order_id
+    try:
+        parse_id("ORD-legacy", "ORD-")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("parse_id accepted a legacy id")
+
+    print("\n✅ All Order ID Tests Passed!")
+
+
+if __name__ == "__main__":
+    test_order_ids()
@@ -0,0 +1,49 @@
+import json
+import os
+import tempfile
+
+from src.order_log import OrderLog, migrate_json_orders
+
+
+def test_order_log():
+    print("Testing order log...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "orders.jsonl")
+        log = OrderLog(path, compact_every=0)
+
+        # Status updates append a newer record for the same order id
+        for i in range(5):
+            log.append({"id": f"order-{i}", "status": "placed"})
+        log.append({"id": "order-1", "status": "delivered"})
+        with open(path, "ab") as f:
+            f.write(b'{"id": "torn"\n')  # a crash mid-write
+        log.append({"id": "order-5", "status": "placed"})
+        assert log.last()["id"] == "order-5"
+
+        print("   Compacting...")
+        assert log.compact() == 6
+        records = log.read_all()
+        assert [r["id"] for r in records] == ["order-0", "order-2", "order-3", "order-4", "order-1", "order-5"]
+        assert records[4]["status"] == "delivered"
+        log.append({"id": "order-6", "status": "placed"})
+        assert log.last()["id"] == "order-6"
+        assert len(log.read_all()) == 7
+        log.close()
+
+        print("   Migrating legacy orders.json from two processes...")
+        legacy = os.path.join(tmp, "orders.json")
+        with open(legacy, "w") as f:
+            json.dump([{"id": "legacy-1"}, {"id": "legacy-2"}], f)
+        migrated_path = os.path.join(tmp, "migrated.jsonl")
+        first, second = OrderLog(migrated_path), OrderLog(migrated_path)
+        assert migrate_json_orders(legacy, first) == 2
+        assert migrate_json_orders(legacy, second) == 0
+        assert [r["id"] for r in second.read_all()] == ["legacy-1", "legacy-2"]
+        first.close()
+        second.close()
+
+    print("\n✅ All Order Log Tests Passed!")
+
+
+if __name__ == "__main__":
+    test_order_log()
@@ -0,0 +1,109 @@
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from src.order_ids import new_order_id
+from src.order_store import FileOrderStore, SQLiteOrderStore, import_orders_dir
+
+
+def _order(customer, total, second, status="placed"):
+    return {
+        "order_id": new_order_id("ORD-"),
+        "timestamp": f"2025-01-01T10:00:{second:02d}",
+        "customer_info": {"email": customer},
+        "items": [],
+        "total": total,
+        "status": status,
+    }
+
+
+def check_store(store):
+    assert store.get_last() is None
+    orders = [_order("Alice@Example.com", 10.0, 1), _order("bob@example.com", 20.0, 2), _order("alice@example.com", 30.0, 3)]
+    for order in orders:
+        store.save(order)
+
+    # Round trip
+    assert store.get(orders[1]["order_id"]) == orders[1]
+    assert store.get("ORD-MISSING") is None
+    assert store.get_last()["order_id"] == orders[2]["order_id"]
+
+    # Customer lookups match the normalized key, newest first
+    alice = store.get_customer_orders(" ALICE@example.com")
+    assert [o["total"] for o in alice] == [30.0, 10.0]
+    assert len(store.get_customer_orders("alice@example.com", limit=1)) == 1
+
+    # Saving an order again replaces it
+    orders[2]["status"] = "delivered"
+    store.save(orders[2])
+    assert store.get_last()["status"] == "delivered"
+
+
+def _save_orders(orders_dir, count):
+    store = FileOrderStore(orders_dir)
+    ids = []
+    for i in range(count):
+        order = _order("carol@example.com", float(i), i % 60)
+        store.save(order)
+        ids.append(order["order_id"])
+    return ids
+
+
+def test_order_store():
+    print("Testing order stores...")
+    with tempfile.TemporaryDirectory() as tmp:
+        print("   File store...")
+        file_store = FileOrderStore(os.path.join(tmp, "files"))
+        check_store(file_store)
+
+        # get_last follows the pointer file rather than listing the directory
+        newest = file_store.get_last()
+        with open(os.path.join(tmp, "files", f"{newest['order_id']}.json")) as f:
+            assert json.load(f) == newest
+        with open(os.path.join(tmp, "files", FileOrderStore.LATEST_POINTER)) as f:
+            assert f.read() == newest["order_id"]
+
+        # A directory written before the pointer existed is scanned once
+        os.remove(os.path.join(tmp, "files", FileOrderStore.LATEST_POINTER))
+        assert FileOrderStore(os.path.join(tmp, "files")).get_last()["order_id"] == newest["order_id"]
+        assert os.path.exists(os.path.join(tmp, "files", FileOrderStore.LATEST_POINTER))
+
+        # Worker processes saving at once leave the pointer on the newest order
+        shared_dir = os.path.join(tmp, "shared")
+        with ProcessPoolExecutor(max_workers=4) as pool:
+            saved = [i for ids in pool.map(_save_orders, [shared_dir] * 4, [50] * 4) for i in ids]
+        assert FileOrderStore(shared_dir).get_last()["order_id"] == max(saved)
+
+        # Legacy ids are compared by timestamp: an older order saved late does not win
+        legacy_store = FileOrderStore(os.path.join(tmp, "legacy-ids"))
+        legacy_store.save({"order_id": "ORD-20250101100005", "timestamp": "2025-01-01T10:00:05"})
+        legacy_store.save({"order_id": "ORD-20250101100001", "timestamp": "2025-01-01T10:00:01"})
+        assert legacy_store.get_last()["order_id"] == "ORD-20250101100005"
+
+        print("   SQLite store...")
+        sqlite_store = SQLiteOrderStore(os.path.join(tmp, "orders.db"))
+        check_store(sqlite_store)
+
+        print("   Importing an orders directory...")
+        legacy_dir = os.path.join(tmp, "legacy")
+        os.makedirs(legacy_dir)
+        for i in range(5):
+            with open(os.path.join(legacy_dir, f"ORD-2024010112000{i}.json"), "w") as f:
+                json.dump({"timestamp": f"2024-01-01T12:00:0{i}", "customer_info": {"phone": "99"}, "total": i}, f)
+        with open(os.path.join(legacy_dir, "broken.json"), "w") as f:
+            f.write("{not json")
+
+        imported = SQLiteOrderStore(os.path.join(tmp, "imported.db"))
+        assert import_orders_dir(legacy_dir, imported, batch_size=2) == 5
+        assert imported.count() == 5
+        # Files without an order_id are keyed by their filename
+        assert imported.get("ORD-20240101120003")["total"] == 3
+        assert imported.get_last()["total"] == 4
+        assert len(imported.get_customer_orders("99")) == 5
+
+    print("\n✅ All Order Store Tests Passed!")
+
+
+if __name__ == "__main__":
+    test_order_store()
@@ -0,0 +1,48 @@
+import os
+import tempfile
+
+from src.preferences import SessionPreferenceStore, customer_key
+
+
+def test_preferences():
+    print("Testing session preferences...")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "preferences.db")
+        store = SessionPreferenceStore(db_path=db_path)
+
+        # 1. Callers get a copy: changing it does not touch the stored preferences
+        store.update("room-1", "diet", "vegan")
+        prefs = store.get("room-1")
+        prefs["diet"].append("keto")
+        prefs["likes"].append("spicy")
+        assert store.get("room-1") == {"diet": ["vegan"], "likes": []}
+        assert store.update("room-1", "unknown", "x") is False
+
+        # 2. Rekey to the customer's key once their stable id is known
+        store.update("room-1", "likes", "sweet")
+        store.rekey("room-1", customer_key("cust-a"))
+        assert store.get(customer_key("cust-a")) == {"diet": ["vegan"], "likes": ["sweet"]}
+        assert store.get("room-1") == {"diet": [], "likes": []}
+
+        # 3. Room keys are never written to SQLite: another caller reusing the room
+        #    name starts empty, even after a restart
+        store.update("room-2", "diet", "gluten-free")
+        assert SessionPreferenceStore(db_path=db_path).get("room-2") == {"diet": [], "likes": []}
+        store.clear("room-2")
+        assert store.get("room-2") == {"diet": [], "likes": []}
+
+        # 4. Customer preferences survive a restart
+        restarted = SessionPreferenceStore(db_path=db_path)
+        assert restarted.get(customer_key("cust-a")) == {"diet": ["vegan"], "likes": ["sweet"]}
+        restarted.update(customer_key("cust-a"), "likes", "spicy")
+        restarted.rekey("room-3", customer_key("cust-a"))  # nothing gathered yet: no-op
+        assert SessionPreferenceStore(db_path=db_path).get(customer_key("cust-a"))["likes"] == ["sweet", "spicy"]
+
+        restarted.clear(customer_key("cust-a"))
+        assert SessionPreferenceStore(db_path=db_path).get(customer_key("cust-a")) == {"diet": [], "likes": []}
+
+    print("\n✅ All Preference Tests Passed!")
+
+
+if __name__ == "__main__":
+    test_preferences()
@@ -0,0 +1,58 @@
+from src.tool_output import estimate_tokens, format_product_results
+
+
+def _products(n, category="snacks"):
+    return [
+        {"id": f"{category}-{i:03d}", "name": f"{category.title()} Item {i}", "price": 10 + i, "category": category}
+        for i in range(n)
+    ]
+
+
+def test_tool_output():
+    print("Testing tool output shaping...")
+
+    # 1. Empty results: just the header, no "more results" line
+    empty = format_product_results([])
+    print(f"Empty: {empty!r}")
+    assert empty == "Found the following items:\n"
+
+    # 2. Normal results, grouped by category in rank order
+    products = [*_products(2, "dairy"), *_products(1, "bakery")]
+    products.append({"id": "dairy-009", "name": "Paneer", "price": 90, "category": "dairy"})
+    normal = format_product_results(products)
+    print(normal)
+    assert normal.splitlines() == [
+        "Found the following items:",
+        "Dairy:",
+        "- Dairy Item 0 (ID: dairy-000): ₹10",
+        "- Dairy Item 1 (ID: dairy-001): ₹11",
+        "- Paneer (ID: dairy-009): ₹90",
+        "Bakery:",
+        "- Bakery Item 0 (ID: bakery-000): ₹10",
+    ]
+    flat = format_product_results(products, group_by_category=False)
+    assert "Dairy:" not in flat and flat.count("\n- ") == 4
+
+    # 3. Truncated by top_k
+    many = _products(40)
+    top = format_product_results(many, top_k=5, token_budget=10_000)
+    assert top.count("\n- ") == 5
+    assert top.rstrip().endswith("...and 35 more results. Ask the user to narrow the search.")
+
+    # 4. Truncated by the token budget, keeping the best matches
+    budgeted = format_product_results(many, top_k=40, token_budget=60)
+    shown = budgeted.count("\n- ")
+    print(f"Budget of 60 tokens fits {shown} of {len(many)} items")
+    assert 0 < shown < 40
+    assert "Snacks Item 0 " in budgeted
+    assert f"...and {40 - shown} more results." in budgeted
+    assert estimate_tokens(budgeted.split("...and")[0]) <= 60
+
+    # The best match is always shown, even if it alone exceeds the budget
+    assert format_product_results(many, token_budget=1).count("\n- ") == 1
+
+    print("\n✅ All Tool Output Tests Passed!")
+
+
+if __name__ == "__main__":
+    test_tool_output()
@@ -0,0 +1,85 @@
+import asyncio
+import os
+import tempfile
+import time
+
+from src.latency_metrics import TOOL, LatencyStats, bind_session
+from src.tool_tracing import JsonlSpanExporter, ToolTracer, read_spans
+
+
+async def test_tool_tracing():
+    print("Testing tool tracing...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "spans.jsonl")
+        tracer = ToolTracer(JsonlSpanExporter(path), sample_rate=0.0, slow_ms=50)
+
+        class Agent:
+            @tracer.traced
+            async def list_products(self, query: str = ""):
+                deadline = time.thread_time() + 0.01  # CPU-bound catalog scan on the loop
+                while time.thread_time() < deadline:
+                    pass
+                return ["milk"] * 10
+
+            @tracer.traced
+            async def save_lead(self, lead: dict):
+                await asyncio.sleep(0.06)  # waiting on storage
+                return "saved"
+
+            @tracer.traced
+            async def create_order(self, items: list):
+                raise ValueError("out of stock")
+
+        agent = Agent()
+        stats = LatencyStats()
+        bind_session(stats)
+
+        # Unsampled conversation: only slow or failing calls are exported
+        tracer.bind("room-quiet")
+        assert await agent.list_products(query="milk") == ["milk"] * 10
+        await agent.save_lead({"email": "a@b.c"})
+        try:
+            await agent.create_order(items=[{"product_id": "p1"}])
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("tool error should propagate")
+        tracer.exporter.flush()
+        spans = read_spans(path)
+        print(f"Unsampled conversation exported {[s['name'] for s in spans]}")
+        assert sorted(s["name"] for s in spans) == ["tool create_order", "tool save_lead"]
+        slow = next(s for s in spans if s["name"] == "tool save_lead")
+        assert slow["attributes"]["session.id"] == "room-quiet"
+        assert slow["attributes"]["service.name"] == "nova-agent"
+        assert slow["attributes"]["tool.blocked_ms"] > 40 and slow["attributes"]["tool.cpu_ms"] < 20
+        failed = next(s for s in spans if s["name"] == "tool create_order")
+        assert failed["status"]["code"] == 2 and "out of stock" in failed["status"]["message"]
+
+        # Sampled conversation: every call, in one trace, with sizes
+        trace = tracer.bind("room-sampled", sampled=True)
+        await agent.list_products(query="milk")
+        await agent.list_products(query="bread")
+        tracer.exporter.flush()
+        sampled = [s for s in read_spans(path) if s["attributes"]["session.id"] == "room-sampled"]
+        assert len(sampled) == 2 and {s["traceId"] for s in sampled} == {trace.trace_id}
+        span = sampled[0]
+        print(f"Sampled span attributes: {span['attributes']}")
+        assert span["attributes"]["tool.cpu_ms"] >= 5
+        assert span["attributes"]["tool.result_bytes"] == len('["milk", "milk", "milk", "milk", "milk", "milk", "milk", "milk", "milk", "milk"]')
+        assert span["attributes"]["tool.args_bytes"] > 0
+        assert int(span["endTimeUnixNano"]) > int(span["startTimeUnixNano"])
+
+        # Each agent binds its own service name
+        tracer.bind("room-sdr", sampled=True, service_name="pw-sdr-agent")
+        await agent.list_products(query="jee")
+        tracer.exporter.flush()
+        sdr = [s for s in read_spans(path) if s["attributes"]["session.id"] == "room-sdr"]
+        assert [s["attributes"]["service.name"] for s in sdr] == ["pw-sdr-agent"]
+
+        # Tool time also lands in the session's latency histograms
+        assert stats.histograms[(TOOL, "list_products")].count == 4
+    print("\nALL TESTS PASSED")
+
+
+if __name__ == "__main__":
+    asyncio.run(test_tool_tracing())
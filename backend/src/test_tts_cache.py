@@ -0,0 +1,69 @@
+import os
+import tempfile
+import time
+from unittest import mock
+
+from src.tts_cache import PCMCache, cache_key
+
+
+def test_tts_cache():
+    print("Testing TTS PCM cache...")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = PCMCache(cache_dir, max_bytes=3000)
+
+        greeting = cache_key("Hi! I'm NOVA.", "Matthew", "Promo", "FALCON", 24000)
+        # Whitespace differences are the same utterance; voice or style changes are not
+        assert cache_key("Hi!  I'm NOVA. ", "Matthew", "Promo", "FALCON", 24000) == greeting
+        assert cache_key("Hi! I'm NOVA.", "Matthew", "Conversation", "FALCON", 24000) != greeting
+        assert cache_key("Hi! I'm NOVA.", "Natalie", "Promo", "FALCON", 24000) != greeting
+
+        assert cache.get(greeting) is None
+        cache.put(greeting, b"\x01" * 1000)
+        assert cache.get(greeting) == b"\x01" * 1000
+        assert greeting in cache
+
+        # Survives a restart (another worker process sees the same files)
+        assert PCMCache(cache_dir, max_bytes=3000).get(greeting) == b"\x01" * 1000
+
+        # Least recently used entries are evicted past max_bytes; pinned ones stay
+        assert cache.pin(greeting)
+        keys = [cache_key(f"phrase {i}", "Matthew", "Promo", "FALCON", 24000) for i in range(4)]
+        for i, key in enumerate(keys):
+            cache.put(key, bytes([i]) * 1000)
+            if i == 1:
+                cache.get(keys[0])  # recently used: outlives keys[1]
+        print(f"Cached {len(os.listdir(cache_dir))} files, {cache.total_bytes()} bytes")
+        assert cache.total_bytes() <= 3000
+        assert cache.get(greeting) == b"\x01" * 1000
+        assert cache.get(keys[3]) == bytes([3]) * 1000
+        assert cache.get(keys[1]) is None
+
+        # A file removed by another worker is just a miss
+        os.remove(os.path.join(cache_dir, f"{keys[3]}.pcm"))
+        assert cache.get(keys[3]) is None
+        # Pinned hits are served from memory but still mark the file recently used,
+        # so another worker's eviction keeps it on disk
+        greeting_path = os.path.join(cache_dir, f"{greeting}.pcm")
+        old = time.time() - 3600
+        for name in os.listdir(cache_dir):
+            os.utime(os.path.join(cache_dir, name), (old + 60, old + 60))
+        os.utime(greeting_path, (old, old))  # the oldest file on disk
+        with mock.patch("src.tts_cache.PIN_TOUCH_INTERVAL", 0.0):
+            assert cache.get(greeting) == b"\x01" * 1000
+            assert os.path.getmtime(greeting_path) > old + 60
+            other_worker = PCMCache(cache_dir, max_bytes=3000)
+            other_worker.put(cache_key("other", "Matthew", "Promo", "FALCON", 24000), b"\x02" * 1000)
+            assert os.path.exists(greeting_path)
+            assert len(os.listdir(cache_dir)) == 3
+
+            # Evicted anyway (e.g. by an older worker): the next pinned hit writes it back
+            os.remove(greeting_path)
+            assert cache.get(greeting) == b"\x01" * 1000
+            assert os.path.exists(greeting_path)
+
+        assert not any(name.endswith(".tmp") or ".tmp." in name for name in os.listdir(cache_dir))
+    print("\nALL TESTS PASSED")
+
+
+if __name__ == "__main__":
+    test_tts_cache()
@@ -0,0 +1,35 @@
+from src.warmup import PrewarmTimer, shared
+
+
+def test_warmup():
+    print("Testing prewarm timer and shared components...")
+    timer = PrewarmTimer()
+    with timer.step("vad"):
+        pass
+    # An optional component that fails is skipped, not fatal
+    with timer.step("tts", required=False):
+        raise ValueError("MURF_API_KEY must be set")
+    try:
+        with timer.step("stt"):
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("required step should raise")
+    summary = timer.summary()
+    print(f"Summary: {summary}")
+    assert summary.startswith("vad=") and "tts=" in summary and "(failed)" in summary and "total" in summary
+    assert set(timer.failed) == {"tts", "stt"}
+
+    # Components built in prewarm are reused; missing ones are created once on the job path
+    userdata = {"llm": "prewarmed-llm"}
+    calls = []
+    assert shared(userdata, "llm", lambda: calls.append("llm")) == "prewarmed-llm"
+    detector = shared(userdata, "turn_detection", lambda: calls.append("eou") or object())
+    assert shared(userdata, "turn_detection", lambda: calls.append("eou") or object()) is detector
+    assert calls == ["eou"]
+    print("\nALL TESTS PASSED")
+
+
+if __name__ == "__main__":
+    test_warmup()
@@ -0,0 +1,68 @@
+"""
+Shapes tool results before they are handed back to the LLM.
+
+Broad searches can match thousands of products; sending them all inflates the
+prompt, time-to-first-token and cost. Results are cut to the top-k, grouped by
+category and kept under a token budget, with a "N more results" summary so
+the agent knows to ask the user to narrow things down.
+"""
+import os
+from typing import Any, Dict, List, Optional
+
+# Rough estimate for English text with the Gemini tokenizer.
+CHARS_PER_TOKEN = 4
+
+TOOL_TOKEN_BUDGET = int(os.getenv("NOVA_TOOL_TOKEN_BUDGET", "300"))
+TOOL_TOP_K = int(os.getenv("NOVA_TOOL_TOP_K", "15"))
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def format_product_results(
+    products: List[Dict[str, Any]],
+    token_budget: Optional[int] = None,
+    top_k: Optional[int] = None,
+    group_by_category: bool = True,
+    header: str = "Found the following items:",
+) -> str:
+    """
+    Render ranked products as a compact list, best matches first, within
+    `token_budget` tokens and at most `top_k` items.
+    """
+    token_budget = TOOL_TOKEN_BUDGET if token_budget is None else token_budget
+    top_k = TOOL_TOP_K if top_k is None else top_k
+
+    # Pick the best-ranked products that fit the budget first, then group them,
+    # so grouping never pushes a better match out of the response.
+    used = estimate_tokens(header)
+    seen_categories = set()
+    selected = []
+    for p in products[:top_k]:
+        line = f"- {p['name']} (ID: {p['id']}): ₹{p['price']}"
+        category = p.get("category", "other") if group_by_category else None
+        cost = estimate_tokens(line)
+        if category is not None and category not in seen_categories:
+            cost += estimate_tokens(f"{category.title()}:")
+        if selected and used + cost > token_budget:
+            break
+        used += cost
+        seen_categories.add(category)
+        selected.append((category, line))
+
+    lines = [header]
+    if group_by_category:
+        groups: Dict[str, List[str]] = {}
+        for category, line in selected:
+            groups.setdefault(category, []).append(line)
+        for category, group_lines in groups.items():
+            lines.append(f"{category.title()}:")
+            lines.extend(group_lines)
+    else:
+        lines.extend(line for _, line in selected)
+
+    remaining = len(products) - len(selected)
+    if remaining > 0:
+        lines.append(f"...and {remaining} more results. Ask the user to narrow the search.")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,247 @@
+"""
+Tracing for the agents' function tools.
+
+Tools used to log one ad-hoc line each, so finding the slow catalog search or
+lead write in a given conversation meant grepping agent_final.log. Wrapping a
+tool in `@traced_tool` (under `@function_tool`) records, per call:
+
+  - wall time, and CPU time of the event-loop thread during the call; the
+    difference is time spent waiting (I/O, locks, the thread pool). CPU is
+    exact for tools that do not yield and an upper bound for those that do,
+    since coroutines that run meanwhile are counted too.
+  - the size of the arguments and of the result (JSON / str length)
+  - the error, if the tool raised
+
+Spans are written as OTLP/JSON-shaped objects, one per line, to a local
+JSONL file by a background thread, keyed by a trace per conversation
+(`bind_trace` in the entrypoint, which also names the agent's service). A conversation is sampled as a whole at
+`NOVA_TRACE_SAMPLE_RATE`; calls slower than `NOVA_TRACE_SLOW_MS` or that
+fail are always exported. When opentelemetry is installed the same span is
+also reported to the active tracer provider (LiveKit's, if configured).
+
+Tool time also feeds the per-session latency histograms (`latency_metrics`).
+"""
+import asyncio
+import contextvars
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from .latency_metrics import record_tool
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:  # tracing still goes to the local exporter
+    otel_trace = None
+
+logger = logging.getLogger("tool-tracing")
+
+TRACE_PATH = Path(os.getenv("NOVA_TRACE_PATH", str(Path(__file__).resolve().parent.parent / ".traces" / "tool_spans.jsonl")))
+TRACE_SAMPLE_RATE = float(os.getenv("NOVA_TRACE_SAMPLE_RATE", "0.1"))
+TRACE_SLOW_MS = float(os.getenv("NOVA_TRACE_SLOW_MS", "500"))
+
+# OTLP status codes
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _from_otlp_value(value: Dict[str, Any]) -> Any:
+    kind, raw = next(iter(value.items()))
+    return int(raw) if kind == "intValue" else raw
+
+
+def _payload_size(value: Any) -> int:
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    try:
+        return len(json.dumps(value, default=str).encode("utf-8"))
+    except (TypeError, ValueError):
+        return len(str(value).encode("utf-8"))
+
+
+class JsonlSpanExporter:
+    """Appends spans to a JSONL file from a daemon thread, so exporting never blocks the event loop."""
+
+    def __init__(self, path: Union[str, Path], max_queue: int = 10000):
+        self.path = Path(path)
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.dropped = 0
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="tool-span-exporter", daemon=True)
+                    self._thread.start()
+
+    def export(self, span: Dict[str, Any]):
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until everything exported so far is on disk."""
+        self._ensure_started()
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def _run(self):
+        while True:
+            items = [self._queue.get()]
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            spans = [item for item in items if isinstance(item, dict)]
+            if spans:
+                try:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    with open(self.path, "a") as f:
+                        f.write("".join(json.dumps(span) + "\n" for span in spans))
+                except OSError as e:
+                    logger.warning(f"Failed to write {len(spans)} tool spans: {e}")
+            for item in items:
+                if isinstance(item, threading.Event):
+                    item.set()
+
+
+class TraceContext:
+    def __init__(self, session_id: str, sampled: bool, service_name: str):
+        self.session_id = session_id
+        self.trace_id = os.urandom(16).hex()
+        self.sampled = sampled
+        self.service_name = service_name
+
+
+class ToolTracer:
+    def __init__(
+        self,
+        exporter: JsonlSpanExporter,
+        sample_rate: float = TRACE_SAMPLE_RATE,
+        slow_ms: float = TRACE_SLOW_MS,
+        service_name: str = "nova-agent",
+    ):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.service_name = service_name
+        self._current: contextvars.ContextVar[Optional[TraceContext]] = contextvars.ContextVar(
+            "tool_trace", default=None
+        )
+
+    def bind(self, session_id: str, sampled: Optional[bool] = None, service_name: Optional[str] = None) -> TraceContext:
+        """
+        Start this conversation's trace (tasks created afterwards inherit it) and decide its sampling.
+        `service_name` labels the agent the spans come from (default: the tracer's).
+        """
+        if sampled is None:
+            sampled = random.random() < self.sample_rate
+        ctx = TraceContext(session_id, sampled, service_name or self.service_name)
+        self._current.set(ctx)
+        return ctx
+
+    async def aflush(self):
+        """Write out queued spans (shutdown callback)."""
+        await asyncio.to_thread(self.exporter.flush)
+
+    def traced(self, fn):
+        """Decorator for async tool methods (`self` is left out of the argument size); goes under `@function_tool`."""
+        name = fn.__name__
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            start_ns = time.time_ns()
+            wall_started = time.perf_counter()
+            cpu_started = time.thread_time()
+            otel_span = otel_trace.get_tracer("nova.tools").start_span(f"tool {name}") if otel_trace else None
+            result, error = None, None
+            try:
+                result = await fn(*args, **kwargs)
+                return result
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                wall = time.perf_counter() - wall_started
+                cpu = min(time.thread_time() - cpu_started, wall)
+                record_tool(name, wall)
+                self._finish(name, args[1:], kwargs, result, error, start_ns, wall, cpu, otel_span)
+
+        return wrapper
+
+    def _finish(self, name, args, kwargs, result, error, start_ns, wall, cpu, otel_span):
+        ctx = self._current.get()
+        sampled = ctx.sampled if ctx is not None else random.random() < self.sample_rate
+        export = sampled or error is not None or wall * 1000 >= self.slow_ms
+        attributes: Dict[str, Any] = {
+            "tool.name": name,
+            "tool.wall_ms": round(wall * 1000, 3),
+            "tool.cpu_ms": round(cpu * 1000, 3),
+            "tool.blocked_ms": round((wall - cpu) * 1000, 3),
+        }
+        if export or (otel_span is not None and otel_span.is_recording()):
+            attributes["tool.args_bytes"] = _payload_size({"args": list(args), "kwargs": kwargs})
+            attributes["tool.result_bytes"] = _payload_size(result) if error is None else 0
+        if ctx is not None:
+            attributes["session.id"] = ctx.session_id
+
+        if otel_span is not None:
+            otel_span.set_attributes(attributes)
+            if error is not None:
+                otel_span.record_exception(error)
+                otel_span.set_status(otel_trace.Status(otel_trace.StatusCode.ERROR, str(error)))
+            otel_span.end()
+
+        if not export:
+            return
+        attributes["service.name"] = ctx.service_name if ctx is not None else self.service_name
+        status = {"code": STATUS_OK} if error is None else {"code": STATUS_ERROR, "message": f"{type(error).__name__}: {error}"}
+        self.exporter.export({
+            "traceId": ctx.trace_id if ctx is not None else os.urandom(16).hex(),
+            "spanId": os.urandom(8).hex(),
+            "name": f"tool {name}",
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(start_ns),
+            "endTimeUnixNano": str(start_ns + int(wall * 1e9)),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()],
+            "status": status,
+        })
+
+
+def read_spans(path: Union[str, Path] = TRACE_PATH) -> List[Dict[str, Any]]:
+    """Spans from a local trace file, with attributes flattened to a dict (for ad-hoc analysis)."""
+    spans = []
+    with open(path, "r") as f:
+        for line in f:
+            span = json.loads(line)
+            span["attributes"] = {a["key"]: _from_otlp_value(a["value"]) for a in span["attributes"]}
+            spans.append(span)
+    return spans
+
+
+tool_tracer = ToolTracer(JsonlSpanExporter(TRACE_PATH))
+traced_tool = tool_tracer.traced
+bind_trace = tool_tracer.bind
@@ -0,0 +1,158 @@
+"""
+On-disk LRU cache of synthesized speech.
+
+NOVA speaks a handful of utterances verbatim on every call (the greeting
+first of all), and each one used to cost a full Murf round trip before the
+caller heard anything. Synthesized audio is stored here as raw PCM, one file
+per (text, voice, style, model, sample rate, channels), so a repeated
+utterance is a file read and a pinned one is already in memory.
+
+The directory is shared by every worker process on the machine. Recency is
+the file's mtime (touched on each hit) and the oldest files are evicted once
+the directory grows past `max_bytes`; a file another worker evicted is simply
+a miss. Pinned entries are served from memory, so their files are touched
+every `PIN_TOUCH_INTERVAL` seconds of use (and rewritten if another worker
+evicted them) to keep them on disk for workers that start later.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+logger = logging.getLogger("tts-cache")
+
+TTS_CACHE_DIR = Path(os.getenv("NOVA_TTS_CACHE_DIR", str(Path(__file__).resolve().parent.parent / ".tts_cache")))
+TTS_CACHE_MAX_BYTES = int(float(os.getenv("NOVA_TTS_CACHE_MB", "64")) * 1024 * 1024)
+PIN_TOUCH_INTERVAL = 60.0
+
+
+def cache_key(text: str, voice: str, style: str, model: str, sample_rate: int, num_channels: int = 1) -> str:
+    payload = json.dumps([" ".join(text.split()), voice, style, model, sample_rate, num_channels])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class PCMCache:
+    def __init__(self, cache_dir: Union[str, Path], max_bytes: int = TTS_CACHE_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index: "OrderedDict[str, int]" = OrderedDict()  # key -> size, least recently used first
+        self._pinned: Dict[str, bytes] = {}
+        self._pin_touched: Dict[str, float] = {}  # key -> monotonic time its file was last touched
+        self._scanned = False
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.pcm"
+
+    def _scan_locked(self):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        entries = []
+        for path in self.cache_dir.glob("*.pcm"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, path.stem, st.st_size))
+        self._index = OrderedDict((key, size) for _, key, size in sorted(entries))
+        self._scanned = True
+
+    def _ensure_scanned_locked(self):
+        if not self._scanned:
+            self._scan_locked()
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            self._ensure_scanned_locked()
+            return sum(self._index.values())
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._pinned or self._path(key).exists()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Cached PCM for `key` (marking it recently used), or None."""
+        pinned = self._pinned.get(key)
+        if pinned is not None:
+            self._touch_pinned(key, pinned)
+            return pinned
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self._index.pop(key, None)
+            return None
+        with self._lock:
+            self._ensure_scanned_locked()
+            self._index[key] = len(data)
+            self._index.move_to_end(key)
+        return data
+
+    def _touch_pinned(self, key: str, pcm: bytes):
+        """Mark a pinned entry's file recently used for other workers (at most every PIN_TOUCH_INTERVAL)."""
+        now = time.monotonic()
+        if now - self._pin_touched.get(key, 0.0) < PIN_TOUCH_INTERVAL:
+            return
+        self._pin_touched[key] = now
+        try:
+            os.utime(self._path(key))
+        except FileNotFoundError:
+            try:
+                self.put(key, pcm)  # evicted by another worker: restore it for the next fresh worker
+            except OSError as e:
+                logger.warning(f"Could not restore pinned utterance {key[:12]}: {e}")
+        except OSError:
+            pass
+
+    def put(self, key: str, pcm: bytes):
+        """Store PCM (atomically) and evict least recently used entries beyond `max_bytes`."""
+        if not pcm:
+            return
+        with self._lock:
+            self._ensure_scanned_locked()
+            path = self._path(key)
+            tmp_path = path.with_name(f"{path.name}.tmp.{os.getpid()}.{threading.get_ident()}")
+            with open(tmp_path, "wb") as f:
+                f.write(pcm)
+            os.replace(tmp_path, path)
+            self._index[key] = len(pcm)
+            self._index.move_to_end(key)
+            if key in self._pinned:
+                self._pinned[key] = pcm
+            if sum(self._index.values()) > self.max_bytes:
+                # Other workers write here too: rescan before deciding what to drop
+                self._scan_locked()
+                self._evict_locked(keep=key)
+
+    def _evict_locked(self, keep: str):
+        total = sum(self._index.values())
+        for key in list(self._index):
+            if total <= self.max_bytes:
+                break
+            if key == keep or key in self._pinned:
+                continue
+            total -= self._index.pop(key)
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            logger.debug(f"Evicted cached utterance {key[:12]}")
+
+    def pin(self, key: str) -> bool:
+        """Keep an entry in memory (and off the eviction list). False if it is not cached yet."""
+        data = self.get(key)
+        if data is None:
+            return False
+        self._pinned[key] = data
+        self._pin_touched[key] = time.monotonic()
+        return True
+
+
+# Shared cache for the voice agents in this worker process
+tts_cache = PCMCache(TTS_CACHE_DIR)
@@ -0,0 +1,57 @@
+"""
+Per-process warm-up of the voice pipeline's heavy components.
+
+LiveKit runs `prewarm` in an idle job process before any job is assigned to
+it, and the process then serves one job. Everything that can be built
+without a job (VAD weights, STT/LLM/TTS clients, cached audio) is built there
+and handed to the entrypoint through `proc.userdata`, so accepting a call
+only has to wire existing objects together. Components that need the job
+context (the turn detector binds to the job's inference client) are created
+once on first use and kept in the same place.
+
+Each step is timed so slow warm-ups show up in the worker logs:
+    Prewarm completed: vad=812ms stt=2ms llm=41ms tts=3ms tts_cache=6ms (total 864ms)
+"""
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, MutableMapping
+
+logger = logging.getLogger("warmup")
+
+
+class PrewarmTimer:
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+        self.failed: Dict[str, str] = {}
+
+    @contextmanager
+    def step(self, name: str, required: bool = True):
+        """Time one component. A failing optional step is logged and skipped (the entrypoint builds it per job)."""
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.failed[name] = f"{type(e).__name__}: {e}"
+            if required:
+                raise
+            logger.warning(f"Prewarm of {name} failed, it will be created per job: {e}")
+        finally:
+            self.timings[name] = time.perf_counter() - started
+
+    def summary(self) -> str:
+        parts = [
+            f"{name}={seconds * 1000:.0f}ms" + (" (failed)" if name in self.failed else "")
+            for name, seconds in self.timings.items()
+        ]
+        return f"{' '.join(parts)} (total {sum(self.timings.values()) * 1000:.0f}ms)"
+
+
+def shared(userdata: MutableMapping[str, Any], key: str, factory: Callable[[], Any]) -> Any:
+    """The process-wide component under `key`, created with `factory` if prewarm did not provide it."""
+    component = userdata.get(key)
+    if component is None:
+        started = time.perf_counter()
+        component = userdata[key] = factory()
+        logger.info(f"Created {key} on the job path in {(time.perf_counter() - started) * 1000:.0f}ms")
+    return component
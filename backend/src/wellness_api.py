@@ -0,0 +1,122 @@
+"""
+Async HTTP clients for the Notion and Todoist REST APIs.
+
+The official SDKs are synchronous, so every call from an agent tool blocked
+the event loop (and the audio and VAD processing running on it) for a full
+HTTP round trip. These clients use one pooled, keep-alive aiohttp session per
+service, a timeout on every call and a semaphore that bounds concurrent
+requests, so wellness logs sync in the background without touching voice
+latency. Base URLs can be overridden (NOTION_API_URL / TODOIST_API_URL /
+TODOIST_SYNC_URL) to point at the local stub server in wellness_api_stub.py.
+"""
+import asyncio
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+
+logger = logging.getLogger("wellness-api")
+
+NOTION_API_URL = os.getenv("NOTION_API_URL", "https://api.notion.com/v1")
+NOTION_VERSION = "2022-06-28"
+TODOIST_API_URL = os.getenv("TODOIST_API_URL", "https://api.todoist.com/rest/v2")
+TODOIST_SYNC_URL = os.getenv("TODOIST_SYNC_URL", "https://api.todoist.com/sync/v9/sync")
+
+
+class APIError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(f"HTTP {status}: {message}")
+        self.status = status
+
+
+class AsyncAPIClient:
+    def __init__(
+        self,
+        base_url: str,
+        headers: Dict[str, str],
+        timeout: float = 10.0,
+        max_concurrency: int = 4,
+        pool_size: int = 8,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.headers = headers
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.max_concurrency = max_concurrency
+        self.pool_size = pool_size
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # Created lazily so the session binds to the loop that first uses it.
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=30)
+            self._session = aiohttp.ClientSession(headers=self.headers, connector=connector, timeout=self.timeout)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    async def request(self, method: str, path: str, json: Any = None, timeout: Optional[float] = None) -> Any:
+        """
+        Send a request and return the decoded JSON body (None for empty
+        responses). `path` is relative to base_url unless it is a full URL.
+        """
+        session = self._get_session()
+        url = path if path.startswith(("http://", "https://")) else f"{self.base_url}{path}"
+        call_timeout = aiohttp.ClientTimeout(total=timeout) if timeout is not None else None
+        async with self._semaphore:
+            async with session.request(method, url, json=json, timeout=call_timeout) as resp:
+                if resp.status >= 400:
+                    raise APIError(resp.status, await resp.text())
+                if resp.status == 204 or resp.content_length == 0:
+                    return None
+                return await resp.json(content_type=None)
+
+    async def aclose(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class AsyncNotionClient(AsyncAPIClient):
+    def __init__(self, token: str, base_url: str = NOTION_API_URL, **kwargs):
+        super().__init__(
+            base_url,
+            {"Authorization": f"Bearer {token}", "Notion-Version": NOTION_VERSION},
+            **kwargs,
+        )
+
+    async def retrieve_database(self, database_id: str) -> Dict[str, Any]:
+        return await self.request("GET", f"/databases/{database_id}")
+
+    async def search(self, **body) -> Dict[str, Any]:
+        return await self.request("POST", "/search", json=body)
+
+    async def create_database(self, parent: Dict, title: List[Dict], properties: Dict) -> Dict[str, Any]:
+        return await self.request("POST", "/databases", json={"parent": parent, "title": title, "properties": properties})
+
+    async def create_page(self, parent: Dict, properties: Dict) -> Dict[str, Any]:
+        return await self.request("POST", "/pages", json={"parent": parent, "properties": properties})
+
+
+class AsyncTodoistClient(AsyncAPIClient):
+    def __init__(self, token: str, base_url: str = TODOIST_API_URL, sync_url: str = TODOIST_SYNC_URL, **kwargs):
+        super().__init__(base_url, {"Authorization": f"Bearer {token}"}, **kwargs)
+        self.sync_url = sync_url
+
+    async def get_projects(self) -> List[Dict[str, Any]]:
+        return await self.request("GET", "/projects")
+
+    async def add_project(self, name: str) -> Dict[str, Any]:
+        return await self.request("POST", "/projects", json={"name": name})
+
+    async def add_task(self, content: str, project_id: str, labels: Optional[List[str]] = None) -> Dict[str, Any]:
+        return await self.request(
+            "POST", "/tasks", json={"content": content, "project_id": project_id, "labels": labels or []}
+        )
+
+    async def close_task(self, task_id: str) -> None:
+        await self.request("POST", f"/tasks/{task_id}/close")
+
+    async def sync(self, commands: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Apply a batch of sync commands; returns sync_status and temp_id_mapping."""
+        return await self.request("POST", self.sync_url, json={"commands": commands})
@@ -0,0 +1,153 @@
+"""
+Local stand-in for the Notion and Todoist endpoints used by MCPIntegration.
+
+Serves both APIs from one aiohttp app with in-memory state and an optional
+artificial delay, so the integration can be exercised (and its effect on the
+event loop measured) without network access or real tokens:
+
+    python -m src.wellness_api_stub --port 8765 --delay 0.2
+    NOTION_API_URL=http://127.0.0.1:8765/notion TODOIST_API_URL=http://127.0.0.1:8765/todoist \
+        TODOIST_SYNC_URL=http://127.0.0.1:8765/todoist/sync ...
+"""
+import argparse
+import asyncio
+import itertools
+from typing import Any, Dict, List
+
+from aiohttp import web
+
+
+class StubState:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.ids = itertools.count(1)
+        self.databases: Dict[str, Dict[str, Any]] = {}
+        self.pages: List[Dict[str, Any]] = []
+        self.projects: List[Dict[str, Any]] = []
+        self.tasks: Dict[str, Dict[str, Any]] = {}
+        self.applied_commands: Dict[str, str] = {}  # sync command uuid -> task id
+        self.fail_next_syncs = 0
+        self.requests = 0
+
+    def new_id(self) -> str:
+        return str(next(self.ids))
+
+
+STATE_KEY = web.AppKey("state", StubState)
+
+
+def create_app(delay: float = 0.0) -> web.Application:
+    state = StubState(delay)
+    routes = web.RouteTableDef()
+
+    @web.middleware
+    async def simulate_latency(request, handler):
+        state.requests += 1
+        if state.delay:
+            await asyncio.sleep(state.delay)
+        return await handler(request)
+
+    @routes.get("/notion/databases/{database_id}")
+    async def retrieve_database(request):
+        database = state.databases.get(request.match_info["database_id"])
+        if database is None:
+            return web.json_response({"object": "error", "status": 404}, status=404)
+        return web.json_response(database)
+
+    @routes.post("/notion/search")
+    async def search(request):
+        return web.json_response({"results": []})
+
+    @routes.post("/notion/databases")
+    async def create_database(request):
+        body = await request.json()
+        database = {"object": "database", "id": state.new_id(), **body}
+        state.databases[database["id"]] = database
+        return web.json_response(database)
+
+    @routes.post("/notion/pages")
+    async def create_page(request):
+        body = await request.json()
+        if body["parent"].get("database_id") not in state.databases:
+            return web.json_response({"object": "error", "status": 404}, status=404)
+        page_id = state.new_id()
+        page = {"object": "page", "id": page_id, "url": f"https://notion.so/{page_id}", **body}
+        state.pages.append(page)
+        return web.json_response(page)
+
+    @routes.get("/todoist/projects")
+    async def get_projects(request):
+        return web.json_response(state.projects)
+
+    @routes.post("/todoist/projects")
+    async def add_project(request):
+        body = await request.json()
+        project = {"id": state.new_id(), "name": body["name"]}
+        state.projects.append(project)
+        return web.json_response(project)
+
+    @routes.post("/todoist/tasks")
+    async def add_task(request):
+        body = await request.json()
+        if not any(p["id"] == body.get("project_id") for p in state.projects):
+            return web.Response(status=404, text="Project not found")
+        task_id = state.new_id()
+        task = {"id": task_id, "url": f"https://todoist.com/showTask?id={task_id}", "is_completed": False, **body}
+        state.tasks[task_id] = task
+        return web.json_response(task)
+
+    @routes.post("/todoist/sync")
+    async def sync(request):
+        if state.fail_next_syncs:
+            state.fail_next_syncs -= 1
+            return web.Response(status=503, text="Service Unavailable")
+        body = await request.json()
+        sync_status, temp_id_mapping = {}, {}
+        for command in body["commands"]:
+            args = command["args"]
+            if command["uuid"] in state.applied_commands:
+                # Already applied: the same uuid is acknowledged, not repeated
+                sync_status[command["uuid"]] = "ok"
+                temp_id_mapping[command["temp_id"]] = state.applied_commands[command["uuid"]]
+                continue
+            if not any(p["id"] == args.get("project_id") for p in state.projects):
+                sync_status[command["uuid"]] = {"error": "Project not found", "error_code": 21, "http_code": 404}
+                continue
+            task_id = state.new_id()
+            state.tasks[task_id] = {"id": task_id, "is_completed": False, **args}
+            state.applied_commands[command["uuid"]] = task_id
+            sync_status[command["uuid"]] = "ok"
+            temp_id_mapping[command["temp_id"]] = task_id
+        return web.json_response({"sync_status": sync_status, "temp_id_mapping": temp_id_mapping})
+
+    @routes.post("/todoist/tasks/{task_id}/close")
+    async def close_task(request):
+        task = state.tasks.get(request.match_info["task_id"])
+        if task is None:
+            return web.Response(status=404, text="Task not found")
+        task["is_completed"] = True
+        return web.Response(status=204)
+
+    app = web.Application(middlewares=[simulate_latency])
+    app.add_routes(routes)
+    app[STATE_KEY] = state
+    return app
+
+
+async def start_stub(port: int = 0, delay: float = 0.0):
+    """Start the stub on 127.0.0.1. Returns (runner, base_url); call runner.cleanup() to stop."""
+    app = create_app(delay)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", port)
+    await site.start()
+    bound_port = runner.addresses[0][1]
+    return runner, f"http://127.0.0.1:{bound_port}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Notion/Todoist stub server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds to wait before each response")
+    args = parser.parse_args()
+    web.run_app(create_app(args.delay), host="127.0.0.1", port=args.port)